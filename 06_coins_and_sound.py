@@ -3,6 +3,10 @@ Platformer Game
 """
 import arcade
 
+import asset_manifest
+from camera import Camera
+from trigger_index import TriggerIndex
+
 # Constants
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 650
@@ -13,6 +17,9 @@ CHARACTER_SCALING = 1
 TILE_SCALING = 0.5
 COIN_SCALING = 0.5
 
+# Size of the cells coins are looked up by
+COIN_CELL_SIZE = 128
+
 # Movement speed of player, in pixels per frame
 PLAYER_MOVEMENT_SPEED = 5
 GRAVITY = 1
@@ -25,6 +32,10 @@ RIGHT_VIEWPORT_MARGIN = 150
 BOTTOM_VIEWPORT_MARGIN = 50
 TOP_VIEWPORT_MARGIN = 100
 
+# How much of the way to where it should be the camera moves each frame,
+# 1 keeps up exactly, less eases in and out
+CAMERA_FOLLOW_RATE = 0.25
+
 
 class MyGame(arcade.Window):
     """
@@ -39,6 +50,8 @@ class MyGame(arcade.Window):
         # These are 'lists' that keep track of our sprites. Each sprite should
         # go into a list.
         self.coin_list = None
+        # The coins again, filed by where they are
+        self.coin_index = None
         self.wall_list = None
         self.player_list = None
 
@@ -48,22 +61,24 @@ class MyGame(arcade.Window):
         # Our physics engine
         self.physics_engine = None
 
-        # Used to keep track of our scrolling
-        self.view_bottom = 0
-        self.view_left = 0
+        # Owns the viewport, and scrolls it to keep the player in view
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT,
+                             (LEFT_VIEWPORT_MARGIN, RIGHT_VIEWPORT_MARGIN,
+                              BOTTOM_VIEWPORT_MARGIN, TOP_VIEWPORT_MARGIN),
+                             CAMERA_FOLLOW_RATE)
 
-        # Load sounds
-        self.collect_coin_sound = arcade.load_sound("sounds/coin1.wav")
-        self.jump_sound = arcade.load_sound("sounds/jump1.wav")
+        # Sounds, loaded the first time they are played
+        self.assets = asset_manifest.AssetLibrary(asset_manifest.load())
+        self.collect_coin_sound = self.assets["sounds/coin1.wav"]
+        self.jump_sound = self.assets["sounds/jump1.wav"]
 
         arcade.set_background_color(arcade.csscolor.CORNFLOWER_BLUE)
 
     def setup(self):
         """ Set up the game here. Call this function to restart the game. """
 
-        # Used to keep track of our scrolling
-        self.view_bottom = 0
-        self.view_left = 0
+        # Start scrolled all the way back
+        self.camera.jump_to(0, 0)
 
         # Create the Sprite lists
         self.player_list = arcade.SpriteList()
@@ -102,6 +117,7 @@ class MyGame(arcade.Window):
             coin.center_x = x
             coin.center_y = 96
             self.coin_list.append(coin)
+        self.coin_index = TriggerIndex.from_sprites(self.coin_list, COIN_CELL_SIZE)
 
         # Create the 'physics engine'
         self.physics_engine = arcade.PhysicsEnginePlatformer(self.player_sprite,
@@ -114,6 +130,9 @@ class MyGame(arcade.Window):
         # Clear the screen to the background color
         arcade.start_render()
 
+        # Scroll to where the camera is, set_viewport is only called if that moved
+        self.camera.apply()
+
         # Draw our sprites
         self.wall_list.draw()
         self.coin_list.draw()
@@ -125,7 +144,7 @@ class MyGame(arcade.Window):
         if key == arcade.key.UP or key == arcade.key.W:
             if self.physics_engine.can_jump():
                 self.player_sprite.change_y = PLAYER_JUMP_SPEED
-                arcade.play_sound(self.jump_sound)
+                arcade.play_sound(self.jump_sound.load())
         elif key == arcade.key.LEFT or key == arcade.key.A:
             self.player_sprite.change_x = -PLAYER_MOVEMENT_SPEED
         elif key == arcade.key.RIGHT or key == arcade.key.D:
@@ -147,58 +166,19 @@ class MyGame(arcade.Window):
         self.physics_engine.update()
 
         # See if we hit any coins
-        coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                             self.coin_list)
+        coin_hit_list = self.coin_index.hits(self.player_sprite)
 
         # Loop through each coin we hit (if any) and remove it
         for coin in coin_hit_list:
             # Remove the coin
             coin.remove_from_sprite_lists()
+            self.coin_index.remove(coin)
             # Play a sound
-            arcade.play_sound(self.collect_coin_sound)
+            arcade.play_sound(self.collect_coin_sound.load())
             # Add one to the score
 
         # --- Manage Scrolling ---
-
-        # Track if we need to change the viewport
-
-        changed = False
-
-        # Scroll left
-        left_boundary = self.view_left + LEFT_VIEWPORT_MARGIN
-        if self.player_sprite.left < left_boundary:
-            self.view_left -= left_boundary - self.player_sprite.left
-            changed = True
-
-        # Scroll right
-        right_boundary = self.view_left + SCREEN_WIDTH - RIGHT_VIEWPORT_MARGIN
-        if self.player_sprite.right > right_boundary:
-            self.view_left += self.player_sprite.right - right_boundary
-            changed = True
-
-        # Scroll up
-        top_boundary = self.view_bottom + SCREEN_HEIGHT - TOP_VIEWPORT_MARGIN
-        if self.player_sprite.top > top_boundary:
-            self.view_bottom += self.player_sprite.top - top_boundary
-            changed = True
-
-        # Scroll down
-        bottom_boundary = self.view_bottom + BOTTOM_VIEWPORT_MARGIN
-        if self.player_sprite.bottom < bottom_boundary:
-            self.view_bottom -= bottom_boundary - self.player_sprite.bottom
-            changed = True
-
-        if changed:
-            # Only scroll to integers. Otherwise we end up with pixels that
-            # don't line up on the screen
-            self.view_bottom = int(self.view_bottom)
-            self.view_left = int(self.view_left)
-
-            # Do the scrolling
-            arcade.set_viewport(self.view_left,
-                                SCREEN_WIDTH + self.view_left,
-                                self.view_bottom,
-                                SCREEN_HEIGHT + self.view_bottom)
+        self.camera.follow(self.player_sprite)
 
 
 def main():
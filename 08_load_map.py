@@ -3,6 +3,12 @@ Platformer Game
 """
 import arcade
 
+import asset_manifest
+import texture_atlas
+from camera import Camera, map_bounds
+from level_cache import load_level
+from trigger_index import TriggerIndex
+
 # Constants
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 650
@@ -27,6 +33,10 @@ RIGHT_VIEWPORT_MARGIN = 150
 BOTTOM_VIEWPORT_MARGIN = 100
 TOP_VIEWPORT_MARGIN = 100
 
+# How much of the way to where it should be the camera moves each frame,
+# 1 keeps up exactly, less eases in and out
+CAMERA_FOLLOW_RATE = 0.25
+
 
 class MyGame(arcade.Window):
     """
@@ -41,6 +51,8 @@ class MyGame(arcade.Window):
         # These are 'lists' that keep track of our sprites. Each sprite should
         # go into a list.
         self.coin_list = None
+        # The coins again, filed by where they are
+        self.coin_index = None
         self.wall_list = None
         self.player_list = None
 
@@ -50,25 +62,27 @@ class MyGame(arcade.Window):
         # Our physics engine
         self.physics_engine = None
 
-        # Used to keep track of our scrolling
-        self.view_bottom = 0
-        self.view_left = 0
+        # Owns the viewport, and scrolls it to keep the player in view
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT,
+                             (LEFT_VIEWPORT_MARGIN, RIGHT_VIEWPORT_MARGIN,
+                              BOTTOM_VIEWPORT_MARGIN, TOP_VIEWPORT_MARGIN),
+                             CAMERA_FOLLOW_RATE)
 
         # Keep track of the score
         self.score = 0
 
-        # Load sounds
-        self.collect_coin_sound = arcade.load_sound("sounds/coin1.wav")
-        self.jump_sound = arcade.load_sound("sounds/jump1.wav")
+        # Sounds, loaded the first time they are played
+        self.assets = asset_manifest.AssetLibrary(asset_manifest.load())
+        self.collect_coin_sound = self.assets["sounds/coin1.wav"]
+        self.jump_sound = self.assets["sounds/jump1.wav"]
 
         arcade.set_background_color(arcade.csscolor.CORNFLOWER_BLUE)
 
     def setup(self):
         """ Set up the game here. Call this function to restart the game. """
 
-        # Used to keep track of our scrolling
-        self.view_bottom = 0
-        self.view_left = 0
+        # Start scrolled all the way back
+        self.camera.jump_to(0, 0)
 
         # Keep track of the score
         self.score = 0
@@ -79,7 +93,7 @@ class MyGame(arcade.Window):
         self.coin_list = arcade.SpriteList()
 
         # Set up the player, specifically placing it at these coordinates.
-        self.player_sprite = arcade.Sprite("images/player_1/player_stand.png", CHARACTER_SCALING)
+        self.player_sprite = texture_atlas.load_sprite("images/player_1/player_stand.png", CHARACTER_SCALING)
         self.player_sprite.center_x = 64
         self.player_sprite.center_y = 96
         self.player_list.append(self.player_sprite)
@@ -94,7 +108,7 @@ class MyGame(arcade.Window):
         coins_layer_name = 'Coins'
 
         # Read in the tiled map
-        my_map = arcade.read_tiled_map(map_name, TILE_SCALING)
+        my_map = load_level(map_name, TILE_SCALING)
 
         # -- Walls
         # Grab the layer of items we can't move through
@@ -103,11 +117,15 @@ class MyGame(arcade.Window):
         # Calculate the right edge of the my_map in pixels
         self.end_of_map = len(map_array[0]) * GRID_PIXEL_SIZE
 
+        # Don't scroll past the edges of the map
+        self.camera.set_bounds(*map_bounds(my_map, TILE_SCALING))
+
         # -- Platforms
-        self.wall_list = arcade.generate_sprites(my_map, platforms_layer_name, TILE_SCALING)
+        self.wall_list = texture_atlas.generate_sprites(my_map, platforms_layer_name, TILE_SCALING)
 
         # -- Coins
-        self.coin_list = arcade.generate_sprites(my_map, coins_layer_name, TILE_SCALING)
+        self.coin_list = texture_atlas.generate_sprites(my_map, coins_layer_name, TILE_SCALING)
+        self.coin_index = TriggerIndex.from_layer(my_map, coins_layer_name, self.coin_list, TILE_SCALING)
 
         # --- Other stuff
         # Set the background color
@@ -125,6 +143,9 @@ class MyGame(arcade.Window):
         # Clear the screen to the background color
         arcade.start_render()
 
+        # Scroll to where the camera is, set_viewport is only called if that moved
+        self.camera.apply()
+
         # Draw our sprites
         self.wall_list.draw()
         self.coin_list.draw()
@@ -132,7 +153,8 @@ class MyGame(arcade.Window):
 
         # Draw our score on the screen, scrolling it with the viewport
         score_text = f"Score: {self.score}"
-        arcade.draw_text(score_text, 10 + self.view_left, 10 + self.view_bottom,
+        left, right, bottom, top = self.camera.visible_rect()
+        arcade.draw_text(score_text, 10 + left, 10 + bottom,
                          arcade.csscolor.WHITE, 18)
 
     def on_key_press(self, key, modifiers):
@@ -141,7 +163,7 @@ class MyGame(arcade.Window):
         if key == arcade.key.UP or key == arcade.key.W:
             if self.physics_engine.can_jump():
                 self.player_sprite.change_y = PLAYER_JUMP_SPEED
-                arcade.play_sound(self.jump_sound)
+                arcade.play_sound(self.jump_sound.load())
         elif key == arcade.key.LEFT or key == arcade.key.A:
             self.player_sprite.change_x = -PLAYER_MOVEMENT_SPEED
         elif key == arcade.key.RIGHT or key == arcade.key.D:
@@ -163,59 +185,20 @@ class MyGame(arcade.Window):
         self.physics_engine.update()
 
         # See if we hit any coins
-        coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                             self.coin_list)
+        coin_hit_list = self.coin_index.hits(self.player_sprite)
 
         # Loop through each coin we hit (if any) and remove it
         for coin in coin_hit_list:
             # Remove the coin
             coin.remove_from_sprite_lists()
+            self.coin_index.remove(coin)
             # Play a sound
-            arcade.play_sound(self.collect_coin_sound)
+            arcade.play_sound(self.collect_coin_sound.load())
             # Add one to the score
             self.score += 1
 
         # --- Manage Scrolling ---
-
-        # Track if we need to change the viewport
-
-        changed = False
-
-        # Scroll left
-        left_boundary = self.view_left + LEFT_VIEWPORT_MARGIN
-        if self.player_sprite.left < left_boundary:
-            self.view_left -= left_boundary - self.player_sprite.left
-            changed = True
-
-        # Scroll right
-        right_boundary = self.view_left + SCREEN_WIDTH - RIGHT_VIEWPORT_MARGIN
-        if self.player_sprite.right > right_boundary:
-            self.view_left += self.player_sprite.right - right_boundary
-            changed = True
-
-        # Scroll up
-        top_boundary = self.view_bottom + SCREEN_HEIGHT - TOP_VIEWPORT_MARGIN
-        if self.player_sprite.top > top_boundary:
-            self.view_bottom += self.player_sprite.top - top_boundary
-            changed = True
-
-        # Scroll down
-        bottom_boundary = self.view_bottom + BOTTOM_VIEWPORT_MARGIN
-        if self.player_sprite.bottom < bottom_boundary:
-            self.view_bottom -= bottom_boundary - self.player_sprite.bottom
-            changed = True
-
-        if changed:
-            # Only scroll to integers. Otherwise we end up with pixels that
-            # don't line up on the screen
-            self.view_bottom = int(self.view_bottom)
-            self.view_left = int(self.view_left)
-
-            # Do the scrolling
-            arcade.set_viewport(self.view_left,
-                                SCREEN_WIDTH + self.view_left,
-                                self.view_bottom,
-                                SCREEN_HEIGHT + self.view_bottom)
+        self.camera.follow(self.player_sprite)
 
 
 def main():
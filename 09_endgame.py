@@ -1,8 +1,29 @@
 """
 Platformer Game
 """
+import argparse
+import time
+
+# When the game started, for --startup
+STARTED = time.perf_counter()
+
 import arcade
 
+import asset_manifest
+import texture_atlas
+import texture_cache
+from camera import Camera, map_bounds
+from fixed_timestep import FixedTimestep, SpriteInterpolator
+from frame_profiler import FrameProfiler
+from hud import Hud
+from input_replay import InputRecorder, InputReplayer
+from layer_manager import LayerManager
+from level_cache import load_level
+from level_streamer import LevelStreamer
+from sound_mixer import SoundMixer
+from tile_physics import GridPhysicsEngine, TileGrid
+from trigger_index import TriggerIndex
+
 # Constants
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 650
@@ -27,129 +48,257 @@ RIGHT_VIEWPORT_MARGIN = 500
 BOTTOM_VIEWPORT_MARGIN = 300
 TOP_VIEWPORT_MARGIN = 300
 
+# How much of the way to where it should be the camera moves each tick,
+# 1 keeps up exactly, less eases in and out
+CAMERA_FOLLOW_RATE = 0.2
+
 PLAYER_START_X = 64
 PLAYER_START_Y = 94
 
+# The game moves in fixed ticks, TICK_RATE of them per second
+TICK_RATE = 60
+# How often arcade calls update, drawing blends between ticks
+FRAME_RATE = 144
+# After a long stall, give up on catching up past this many ticks
+MAX_TICKS_PER_FRAME = 5
+
+# Shows and hides the frame profiler
+PROFILER_KEY = arcade.key.F1
+
+# The map's layers and the player, in the order they are drawn
+DRAW_ORDER = ("Background", "Platforms", "Coins", "Don't Touch", "Player", "Foreground")
+PLAYER_LAYER = "Player"
+MAP_LAYERS = tuple(name for name in DRAW_ORDER if name != PLAYER_LAYER)
+
+# Map layers are cut into chunks this many pixels square, and only the
+# chunks within CHUNK_MARGIN of the screen are drawn
+CHUNK_SIZE = 16 * GRID_PIXEL_SIZE
+CHUNK_MARGIN = GRID_PIXEL_SIZE
+
+# Layers that never change, painted into a texture per chunk on load
+STATIC_LAYERS = ("Background", "Foreground")
+# Layers sprites are taken out of while playing, their chunks aren't is_static
+DYNAMIC_LAYERS = ("Coins",)
+
+# Seconds the window size has to stay put before they are painted
+# again at the new size, so dragging an edge doesn't paint every step
+REBAKE_DELAY = 0.25
+
+# How far across a level, as a fraction of its width, the player gets
+# before the next level starts loading in the background
+PRELOAD_AT = 0.5
+
+# Assets loaded before a scene starts, anything else loads the first time it's used
+ASSET_SCENES = {"level": ("sounds/coin1.wav", "sounds/jump1.wav")}
+
+class Level:
+    """ Everything setup() needs from a level's map, made by build_level() """
+
+    def __init__(self, number):
+        self.number = number
+        # The map's layers, see DRAW_ORDER
+        self.layers = LayerManager()
+        # The Platforms layer as a grid, for the physics
+        self.grid = None
+        # Coins and things not to touch, filed by where they are
+        self.coin_index = None
+        self.dont_touch_index = None
+        # Where is the right edge of the map?
+        self.end_of_map = 0
+        # left, right, bottom, top of the map, what the camera stays inside
+        self.bounds = None
+        self.background_color = None
+        # How long building it took, in seconds
+        self.build_time = 0.0
+
+
+def build_level(level, bake_static=True, pixel_scale=1.0):
+    """
+    Load a level's map and make its sprites, baking STATIC_LAYERS if
+    bake_static. This doesn't touch the window, so it can run on the
+    level streamer's thread.
+    """
+    start = time.perf_counter()
+    built = Level(level)
+
+    # --- Load in a map from the tiled editor ---
+
+    # Map name
+    map_name = f"map2_level_{level}.tmx"
+    # Read in the tiled map
+    my_map = load_level(map_name, TILE_SCALING)
+
+    for name in MAP_LAYERS:
+        built.layers.build(my_map, name, TILE_SCALING, DRAW_ORDER.index(name),
+                           CHUNK_SIZE, CHUNK_MARGIN,
+                           bake_static and name in STATIC_LAYERS, pixel_scale,
+                           is_static=name not in DYNAMIC_LAYERS)
+
+    built.grid = TileGrid(my_map, 'Platforms', TILE_SCALING)
+    built.coin_index = TriggerIndex.from_layer(my_map, 'Coins', built.layers['Coins'],
+                                               TILE_SCALING)
+    built.dont_touch_index = TriggerIndex.from_layer(my_map, "Don't Touch",
+                                                     built.layers["Don't Touch"], TILE_SCALING)
+
+    # Calculate the right edge of the my_map in pixels
+    map_array = my_map.layers_int_data['Platforms']
+    built.end_of_map = (len(map_array[0]) - 1) * GRID_PIXEL_SIZE
+    built.bounds = map_bounds(my_map, TILE_SCALING)
+
+    built.background_color = my_map.backgroundcolor
+    built.build_time = time.perf_counter() - start
+    return built
+
+
 class MyGame(arcade.Window):
     """
     Main application class.
     """
 
-    def __init__(self):
+    def __init__(self, bake_static=True, grid_physics=True):
 
         # Call the parent class and set up the window
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE,
+                         update_rate=1 / FRAME_RATE)
 
         # These are 'lists' that keep track of our sprites. Each sprite should
         # go into a list.
-        self.coin_list = None
-        self.wall_list = None
-        self.foreground_list = None
-        self.background_list = None
-        self.dont_touch_list = None
         self.player_list = None
+        # The level's map layers and the player list, in drawing order
+        self.layers = None
+        # Coins and things not to touch, filed by where they are
+        self.coin_index = None
+        self.dont_touch_index = None
 
         # Separate variable that holds the player sprite
         self.player_sprite = None
 
-        # Our physics engine
+        # Our physics engine, and whether it works off the tile grid
+        # rather than the wall sprites
         self.physics_engine = None
+        self.grid_physics = grid_physics
+
+        # Owns the viewport, and scrolls it to keep the player in view
+        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT,
+                             (LEFT_VIEWPORT_MARGIN, RIGHT_VIEWPORT_MARGIN,
+                              BOTTOM_VIEWPORT_MARGIN, TOP_VIEWPORT_MARGIN),
+                             CAMERA_FOLLOW_RATE)
 
-        # Used to keep track of our scrolling
-        self.view_bottom = 0
-        self.view_left = 0
+        # Runs tick() at a fixed rate, whatever the frame rate is
+        self.timestep = FixedTimestep(self.tick, TICK_RATE, MAX_TICKS_PER_FRAME)
+        # Ticks run since the window opened
+        self.tick_count = 0
+
+        # Saves the keys pressed to a file, or plays them back from one
+        self.recorder = None
+        self.replayer = None
+
+        # Times the phases of update and draw
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
+        # Where to save the profile when the window closes, if anywhere
+        self.profile_path = None
+
+        # Where things were before the last tick, so drawing can blend
+        self.interpolator = SpriteInterpolator()
 
         # Keep track of the score
         self.score = 0
+        # Text drawn over the game, only rendered again when it changes
+        self.hud = Hud()
+        self.hud.add("score", "Score: {}", 10, 10, arcade.csscolor.BLACK, 18)
 
         # Where is the right edge of the map?
         self.end_of_map = 0
 
         # Level
         self.level = 1
-
-        # Load sounds
-        self.collect_coin_sound = arcade.load_sound("sounds/coin1.wav")
-        self.jump_sound = arcade.load_sound("sounds/jump1.wav")
-        self.game_over = arcade.load_sound("sounds/gameover1.wav")
-
-    def setup(self, level):
-        """ Set up the game here. Call this function to restart the game. """
-
-        # Used to keep track of our scrolling
-        self.view_bottom = 0
-        self.view_left = 0
+        # Whether STATIC_LAYERS are baked into textures
+        self.bake_static = bake_static
+        # Screen pixels per world unit, what baked layers are painted at
+        self.pixel_scale = 1.0
+        # When to paint the baked layers at pixel_scale after a resize, None if they are
+        self.rebake_at = None
+        # Builds the next level while this one is played
+        self.streamer = LevelStreamer(self.build_level)
+
+        # Sounds are mixed on their own thread, and like images only
+        # loaded when a scene warms them up or they are first used
+        self.sounds = SoundMixer()
+        self.assets = asset_manifest.AssetLibrary(
+            asset_manifest.load(),
+            {"image": texture_atlas.load_texture, "sound": self.sounds.load},
+            ASSET_SCENES)
+        self.collect_coin_sound = self.assets["sounds/coin1.wav"]
+        self.jump_sound = self.assets["sounds/jump1.wav"]
+        self.game_over = self.assets["sounds/gameover1.wav"]
+        self.sounds.start()
+
+        # How long after STARTED the first frame was drawn, and whether
+        # to say so and quit then
+        self.first_frame_ms = None
+        self.quit_after_first_frame = False
+
+    def setup(self, level, built=None):
+        """
+        Set up the game here. Call this function to restart the game.
+        built is the level from build_level(), if it was built already.
+        """
+
+        self.interpolator.capture([])
 
         # Keep track of the score
         self.score = 0
+        self.hud.set("score", self.score)
 
-        # Create the Sprite lists
-        self.player_list = arcade.SpriteList()
-        self.foreground_list = arcade.SpriteList()
-        self.background_list = arcade.SpriteList()
-        self.wall_list = arcade.SpriteList()
-        self.coin_list = arcade.SpriteList()
+        self.assets.warm_up("level")
+
+        # The level itself, built ahead of time if it was prefetched
+        if built is None:
+            built = self.build_level(level)
+        self.layers = built.layers
+        self.coin_index = built.coin_index
+        self.dont_touch_index = built.dont_touch_index
+        # the window may have been resized while it was being built
+        self.layers.set_pixel_scale(self.pixel_scale)
+        self.end_of_map = built.end_of_map
+
+        # Start scrolled all the way back, and don't scroll past the map
+        self.camera.set_bounds(*built.bounds)
+        self.camera.jump_to(0, 0)
 
         # Set up the player, specifically placing it at these coordinates.
-        self.player_sprite = arcade.Sprite("images/player_1/player_stand.png", CHARACTER_SCALING)
+        self.player_list = arcade.SpriteList()
+        self.player_sprite = texture_atlas.load_sprite("images/player_1/player_stand.png",
+                                                       CHARACTER_SCALING)
         self.player_sprite.center_x = PLAYER_START_X
         self.player_sprite.center_y = PLAYER_START_Y
         self.player_list.append(self.player_sprite)
-
-        # --- Load in a map from the tiled editor ---
-
-        # Name of the layer in the file that has our platforms/walls
-        platforms_layer_name = 'Platforms'
-        # Name of the layer that has items for pick-up
-        coins_layer_name = 'Coins'
-        # Name of the layer that has items for foreground
-        foreground_layer_name = 'Foreground'
-        # Name of the layer that has items for background
-        background_layer_name = 'Background'
-        # Name of the layer that has items we shouldn't touch
-        dont_touch_layer_name = "Don't Touch"
-
-        # Map name
-        map_name = f"map2_level_{level}.tmx"
-        # Read in the tiled map
-        my_map = arcade.read_tiled_map(map_name, TILE_SCALING)
-
-        # -- Walls
-        # Grab the layer of items we can't move through
-        map_array = my_map.layers_int_data[platforms_layer_name]
-
-        # Calculate the right edge of the my_map in pixels
-        self.end_of_map = len(map_array[0]) * GRID_PIXEL_SIZE
-
-        # -- Background
-        self.background_list = arcade.generate_sprites(my_map, background_layer_name, TILE_SCALING)
-
-        # -- Foreground
-        self.foreground_list = arcade.generate_sprites(my_map, foreground_layer_name, TILE_SCALING)
-
-        # -- Platforms
-        self.wall_list = arcade.generate_sprites(my_map, platforms_layer_name, TILE_SCALING)
-
-        # -- Platforms
-        self.wall_list = arcade.generate_sprites(my_map, platforms_layer_name, TILE_SCALING)
-
-        # -- Coins
-        self.coin_list = arcade.generate_sprites(my_map, coins_layer_name, TILE_SCALING)
-
-        # -- Don't Touch Layer
-        self.dont_touch_list = arcade.generate_sprites(my_map, dont_touch_layer_name, TILE_SCALING)
-
-        self.end_of_map = (len(map_array[0]) - 1) * GRID_PIXEL_SIZE
+        self.layers.add(PLAYER_LAYER, self.player_list, DRAW_ORDER.index(PLAYER_LAYER))
 
         # --- Other stuff
         # Set the background color
-        if my_map.backgroundcolor:
-            arcade.set_background_color(my_map.backgroundcolor)
+        if built.background_color:
+            arcade.set_background_color(built.background_color)
 
         # Create the 'physics engine'
-        self.physics_engine = arcade.PhysicsEnginePlatformer(self.player_sprite,
-                                                             self.wall_list,
-                                                             GRAVITY)
+        if self.grid_physics:
+            self.physics_engine = GridPhysicsEngine(self.player_sprite, built.grid, GRAVITY)
+        else:
+            self.physics_engine = arcade.PhysicsEnginePlatformer(self.player_sprite,
+                                                                 self.layers['Platforms'],
+                                                                 GRAVITY)
+
+    def build_level(self, level):
+        return build_level(level, self.bake_static, self.pixel_scale)
+
+    def on_resize(self, width, height):
+        super().on_resize(width, height)
+        # The view is always SCREEN_WIDTH wide, so baked layers need more
+        # or fewer pixels to stay sharp, once the size stops changing
+        self.pixel_scale = width / SCREEN_WIDTH
+        self.rebake_at = time.perf_counter() + REBAKE_DELAY
+        self.camera.set_pixel_scale(self.pixel_scale)
 
     def on_draw(self):
         """ Render the screen. """
@@ -157,27 +306,55 @@ class MyGame(arcade.Window):
         # Clear the screen to the background color
         arcade.start_render()
 
+        # Draw part way between the last two ticks
+        alpha = self.timestep.alpha
+        self.interpolator.blend(alpha)
+        self.camera.apply(alpha)
+        left, right, bottom, top = self.camera.visible_rect()
+
         # Draw our sprites
-        self.wall_list.draw()
-        self.background_list.draw()
-        self.wall_list.draw()
-        self.coin_list.draw()
-        self.dont_touch_list.draw()
-        self.player_list.draw()
-        self.foreground_list.draw()
+        with self.profiler.section("draw_sprites"):
+            self.layers.draw(left, right, bottom, top)
+        self.interpolator.restore()
 
         # Draw our score on the screen, scrolling it with the viewport
-        score_text = f"Score: {self.score}"
-        arcade.draw_text(score_text, 10 + self.view_left, 10 + self.view_bottom,
-                         arcade.csscolor.BLACK, 18)
+        with self.profiler.section("draw_hud"):
+            self.hud.move_to(left, bottom)
+            self.hud.draw()
+
+        if self.show_profiler:
+            self.profiler.draw_overlay(right - 280, top - 10,
+                                       arcade.csscolor.BLACK)
+        self.profiler.end_frame()
+
+        if self.first_frame_ms is None:
+            self.first_frame_ms = (time.perf_counter() - STARTED) * 1000
+            if self.quit_after_first_frame:
+                print(f"first frame {self.first_frame_ms:.0f}ms after start")
+                print("assets:", self.assets.stats())
+
+    def toggle_profiler(self):
+        """
+        Show or hide the profiler overlay. Timing only runs while it
+        shows, or all along when the profile is being saved.
+        """
+        self.show_profiler = not self.show_profiler
+        if self.profile_path is None:
+            self.profiler.enable(self.show_profiler)
 
     def on_key_press(self, key, modifiers):
         """Called whenever a key is pressed. """
 
+        if key == PROFILER_KEY:
+            self.toggle_profiler()
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, key, modifiers, True)
+
         if key == arcade.key.UP or key == arcade.key.W:
             if self.physics_engine.can_jump():
                 self.player_sprite.change_y = PLAYER_JUMP_SPEED
-                arcade.play_sound(self.jump_sound)
+                self.sounds.play(self.jump_sound.load())
         elif key == arcade.key.LEFT or key == arcade.key.A:
             self.player_sprite.change_x = -PLAYER_MOVEMENT_SPEED
         elif key == arcade.key.RIGHT or key == arcade.key.D:
@@ -186,33 +363,58 @@ class MyGame(arcade.Window):
     def on_key_release(self, key, modifiers):
         """Called when the user releases a key. """
 
+        if key == PROFILER_KEY:
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, key, modifiers, False)
+
         if key == arcade.key.LEFT or key == arcade.key.A:
             self.player_sprite.change_x = 0
         elif key == arcade.key.RIGHT or key == arcade.key.D:
             self.player_sprite.change_x = 0
 
     def update(self, delta_time):
-        """ Movement and game logic """
+        """ Run as many ticks as the time since the last update pays for """
+        with self.profiler.section("update"):
+            self.timestep.advance(delta_time)
+        self.sounds.end_frame()
+        if self.rebake_at is not None and time.perf_counter() >= self.rebake_at:
+            self.rebake_at = None
+            if self.layers is not None:
+                self.layers.set_pixel_scale(self.pixel_scale)
+        if self.quit_after_first_frame and self.first_frame_ms is not None:
+            self.close()
+
+    def tick(self):
+        """ Movement and game logic, one fixed step """
+
+        # Keys from a recording arrive just before the tick they came before
+        if self.replayer is not None:
+            self.replayer.feed(self.tick_count, self)
+        self.tick_count += 1
+
+        # Remember where we were, for drawing between ticks
+        self.interpolator.capture([self.player_sprite])
 
         # Call update on all sprites (The sprites don't do much in this
         # example though.)
-        self.physics_engine.update()
+        with self.profiler.section("physics"):
+            self.physics_engine.update()
 
         # See if we hit any coins
-        coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                             self.coin_list)
+        with self.profiler.section("coins"):
+            coin_hit_list = self.coin_index.hits(self.player_sprite)
 
         # Loop through each coin we hit (if any) and remove it
         for coin in coin_hit_list:
             # Remove the coin
             coin.remove_from_sprite_lists()
+            self.coin_index.remove(coin)
             # Play a sound
-            arcade.play_sound(self.collect_coin_sound)
+            self.sounds.play(self.collect_coin_sound.load())
             # Add one to the score
             self.score += 1
-
-        # Track if we need to change the viewport
-        changed_viewport = False
+            self.hud.set("score", self.score)
 
         # Did the player fall off the map?
         if self.player_sprite.center_y < -100:
@@ -220,78 +422,96 @@ class MyGame(arcade.Window):
             self.player_sprite.center_y = PLAYER_START_Y
 
             # Set the camera to the start
-            self.view_left = 0
-            self.view_bottom = 0
-            changed_viewport = True
-            arcade.play_sound(self.game_over)
+            self.camera.jump_to(0, 0)
+            self.sounds.play(self.game_over.load())
 
         # Did the player touch something they should not?
-        if arcade.check_for_collision_with_list(self.player_sprite, self.dont_touch_list):
+        with self.profiler.section("dont_touch"):
+            touched = self.dont_touch_index.hits(self.player_sprite)
+        if touched:
             self.player_sprite.center_x = PLAYER_START_X
             self.player_sprite.center_y = PLAYER_START_Y
 
             # Set the camera to the start
-            self.view_left = 0
-            self.view_bottom = 0
-            changed_viewport = True
-            arcade.play_sound(self.game_over)
+            self.camera.jump_to(0, 0)
+            self.sounds.play(self.game_over.load())
+
+        # Far enough in to start on the next level
+        if self.player_sprite.center_x >= self.end_of_map * PRELOAD_AT:
+            self.streamer.prefetch(self.level + 1)
 
         # See if the user got to the end of the level
         if self.player_sprite.center_x >= self.end_of_map:
             # Advance to the next level
             self.level += 1
 
-            # Load the next level
-            self.setup(self.level)
-
-            # Set the camera to the start
-            self.view_left = 0
-            self.view_bottom = 0
-            changed_viewport = True
+            # Swap in the next level, waiting for it only if it isn't ready
+            with self.profiler.section("load_level"):
+                self.setup(self.level, self.streamer.take(self.level))
 
         # --- Manage Scrolling ---
+        # The scrolling itself happens in on_draw
+        self.camera.follow(self.player_sprite)
 
-        # Scroll left
-        left_boundary = self.view_left + LEFT_VIEWPORT_MARGIN
-        if self.player_sprite.left < left_boundary:
-            self.view_left -= left_boundary - self.player_sprite.left
-            changed_viewport = True
-
-        # Scroll right
-        right_boundary = self.view_left + SCREEN_WIDTH - RIGHT_VIEWPORT_MARGIN
-        if self.player_sprite.right > right_boundary:
-            self.view_left += self.player_sprite.right - right_boundary
-            changed_viewport = True
-
-        # Scroll up
-        top_boundary = self.view_bottom + SCREEN_HEIGHT - TOP_VIEWPORT_MARGIN
-        if self.player_sprite.top > top_boundary:
-            self.view_bottom += self.player_sprite.top - top_boundary
-            changed_viewport = True
-
-        # Scroll down
-        bottom_boundary = self.view_bottom + BOTTOM_VIEWPORT_MARGIN
-        if self.player_sprite.bottom < bottom_boundary:
-            self.view_bottom -= bottom_boundary - self.player_sprite.bottom
-            changed_viewport = True
-
-        if changed_viewport:
-            # Only scroll to integers. Otherwise we end up with pixels that
-            # don't line up on the screen
-            self.view_bottom = int(self.view_bottom)
-            self.view_left = int(self.view_left)
-
-            # Do the scrolling
-            arcade.set_viewport(self.view_left,
-                                SCREEN_WIDTH + self.view_left,
-                                self.view_bottom,
-                                SCREEN_HEIGHT + self.view_bottom)
+    def on_close(self):
+        self.streamer.close()
+        self.sounds.close()
+        if self.recorder is not None:
+            self.recorder.close(self.tick_count)
+        if self.profile_path is not None:
+            self.profiler.export(self.profile_path)
+        super().on_close()
 
 
 def main():
     """ Main method """
-    window = MyGame()
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--record", metavar="FILE", help="save the keys pressed to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="play the game saved in FILE")
+    parser.add_argument("--fast", action="store_true",
+                        help="replay without drawing, as fast as possible, with the window hidden")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time every frame, saved as CSV (or JSON for .json) on exit")
+    parser.add_argument("--no-bake", action="store_true",
+                        help="draw the background and foreground tile by tile")
+    parser.add_argument("--sprite-physics", action="store_true",
+                        help="collide with the wall sprites instead of the tile grid")
+    parser.add_argument("--startup", action="store_true",
+                        help="print how long the first frame took to draw, then quit")
+    args = parser.parse_args()
+
+    window = MyGame(bake_static=not args.no_bake, grid_physics=not args.sprite_physics)
     window.setup(window.level)
+    window.quit_after_first_frame = args.startup
+    if args.profile:
+        window.profile_path = args.profile
+        window.profiler.enable()
+
+    if args.replay:
+        window.replayer = InputReplayer(args.replay)
+        if args.fast:
+            # MyGame is the window, so there is one, but nothing is drawn in it
+            window.set_visible(False)
+            def tick():
+                # every tick is a frame when nothing is drawn
+                window.tick()
+                window.profiler.end_frame()
+
+            rate = window.replayer.fast_forward(tick)
+            print(f"{window.replayer.ticks} ticks at {rate:.0f} ticks/s, "
+                  f"level {window.level}, score {window.score}")
+            print("level loads:", window.streamer.stats())
+            print("textures:", texture_cache.stats())
+            print("sounds:", window.sounds.stats())
+            for name, row in window.layers.stats().items():
+                print(f"  {name:<12} z {row['z']}  {row['sprites']:>4} sprites  "
+                      f"{row.get('chunks', 1):>3} chunks  built in {row['build_ms']:.1f}ms")
+            window.on_close()
+            return
+        window.replayer.attach(window, keys_through=(PROFILER_KEY,))
+    elif args.record:
+        window.recorder = InputRecorder(args.record, "platformer", tick_rate=TICK_RATE)
+
     arcade.run()
 
 
@@ -1,174 +1,80 @@
 '''
-A space based shooter based on the 
-Asteroid smasher tutorial for PyArcade 
+A space based shooter based on the
+Asteroid smasher tutorial for PyArcade
 
+The game itself is played out by a ShooterWorld (shooter_world.py),
+this window draws it, plays its sounds and feeds it the keyboard.
 '''
 
 
 
+import argparse
 import arcade
-import math
-import random
 import os
 
-from typing import cast
+from fixed_timestep import FixedTimestep, SpriteInterpolator
+from frame_profiler import FrameProfiler
+from hud import Hud
+from input_replay import InputRecorder, InputReplayer
+from shooter_world import (ShooterWorld, ASTEROID_TIERS, STARTING_ENEMY_COUNT, SCALE,
+                           SCREEN_WIDTH, SCREEN_HEIGHT, SHIP_IMAGE, BULLET_IMAGE,
+                           FIRE, TURN_LEFT, TURN_RIGHT, THRUST, REVERSE,
+                           BULLET_SPAWNED, BULLET_REMOVED, ASTEROID_SPAWNED, ASTEROID_REMOVED,
+                           ASTEROID_SPLIT, SHOT_FIRED, CRASH, GAME_OVER)
+from sound_mixer import SoundMixer
+from sprite_pool import SpritePool, reset_moving_sprite
+import texture_cache
 
-STARTING_ENEMY_COUNT = 5
-SCALE = 0.5
-OFFSCREEN_SPACE = 300
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
 SCREEN_TITLE = "Velocity of Escape"
-LEFT_LIMIT = -OFFSCREEN_SPACE
-RIGHT_LIMIT = SCREEN_WIDTH + OFFSCREEN_SPACE
-BOTTOM_LIMIT = -OFFSCREEN_SPACE
-TOP_LIMIT = SCREEN_HEIGHT + OFFSCREEN_SPACE
-
-class TurningSprite(arcade.Sprite):
-    ''' 
-    Sprite that sets its angle to the direction it is facing,
-    used to shoot projectiles
-    '''
-    def update(self):
-        super().update()
-        self.angle = math.degrees(math.atan2(self.change_y, self.change_x))
-
-class ShipSprite(arcade.Sprite):
-    '''
-    sprite that represents space ship
-    
-    derives from arcade.Sprite
-    '''
-    def __init__(self, filename, scale):
-        '''
-        initializer
-        '''
-        # call the parent Sprite constructor
-        super().__init__(filename, scale)
-
-        # info on where we are going.
-        # Angle comes in automatically from the parent class
-        self.thrust = 0
-        self.speed = 0
-        self.max_speed = 4
-        self.drag = 0.5
-        self.respawning = 0
 
-        # mark that we are respawning
-        self.respawn()
-
-    def respawn(self):
-        '''
-        called when the player dies and need to make a new ship.
-        "respawning" is an invulnerability timer.
-        TODO: change to respawning at last visited planet
-        '''
-        self.respawning = 1
-        self.center_x = SCREEN_WIDTH / 2
-        self.center_y = SCREEN_HEIGHT / 2
-        self.angle = 0
-
-    def update(self):
-        '''
-        update position and other variables, 
-        "update()" required symantics to adjust parent method
-        '''
-
-
-        if self.respawning:
-            # spawn timer more or less
-            self.respawning += 3
-            self.alpha = self.respawning
-            if self.respawning > 250:
-                self.respawning = 0
-                # makes the ship opaque
-                self.alpha = 255              
-
-        if self.speed > 0:
-            self.speed -= self.drag
-            if self.speed < 0:
-                self.speed = 0
-
-        if self.speed < 0:
-            self.speed += self.drag
-            if self.speed > 0:
-                self.speed = 0
-
-        self.speed += self.thrust
-        if self.speed > self.max_speed:
-            self.speed = self.max_speed
-        if self.speed < -self.max_speed:
-            self.speed = -self.max_speed
-        
-        # moves sprite in the direction of the sprite angle
-        # see 'velocity and vectors'
-        self.change_x += -math.sin(math.radians(self.angle)) * self.speed
-        self.change_y += math.cos(math.radians(self.angle)) * self.speed
-
-        self.center_x += self.change_x
-        self.center_y += self.change_y
-
-        #if the ship goes off screen, move it to the other side of the window
-        # TODO: change so that player is always centered but off screen logic still applies to the map
-        if self.right < 0:
-            self.left = SCREEN_WIDTH
-
-        if self.left > SCREEN_WIDTH:
-            self.right = 0
-
-        if self.bottom < 0:
-            self.top = SCREEN_HEIGHT
-
-        if self.top > SCREEN_HEIGHT:
-            self.bottom = 0
-
-        ''' call parent class '''
-        super().update()
+# the game moves in fixed ticks, TICK_RATE of them per second
+TICK_RATE = 60
+# how often arcade calls on_update, drawing blends between ticks
+FRAME_RATE = 144
+# after a long stall, give up on catching up past this many ticks
+MAX_TICKS_PER_FRAME = 5
+
+# bullets made up front, and the most there can be
+# the world won't fire while BULLET_POOL_CAP bullets are flying
+BULLET_POOL_SIZE = 30
+BULLET_POOL_CAP = 300
+
+# which key does what
+KEY_ACTIONS = {
+    arcade.key.SPACE: FIRE,
+    arcade.key.A: TURN_LEFT,
+    arcade.key.D: TURN_RIGHT,
+    # TODO: Pull thrust from ship class
+    arcade.key.W: THRUST,
+    arcade.key.S: REVERSE,
+}
+# shows and hides the frame profiler
+PROFILER_KEY = arcade.key.F1
 
 class AsteroidSprite(arcade.Sprite):
-    ''' 
-    Sprite that represents an asteroid 
+    '''
+    Sprite that draws an asteroid
     TODO: change to planet
     '''
+    # SpritePool this sprite came from, if any
+    pool = None
 
-    def __init__(self, image_file_name, scale):
-        super().__init__(image_file_name, scale=scale)
-        self.size = 0
-
-    def update(self):
-        '''
-        Moves asteroids around
-        TODO: convert to landing/defence
+    def set_image(self, image_no):
         '''
-        super().update()
-        if self.center_x < LEFT_LIMIT:
-            self.center_x = RIGHT_LIMIT
-        if self.center_x > RIGHT_LIMIT:
-            self.center_x = LEFT_LIMIT
-        if self.center_y > TOP_LIMIT:
-            self.center_y = BOTTOM_LIMIT
-        if self.center_y < BOTTOM_LIMIT:
-            self.center_y = TOP_LIMIT
-
-class BulletSprite(TurningSprite):
+        switch to another of the textures this sprite was made with
+        the hit box is set first, the texture setter clears the cached one
         '''
-        class for bullets
+        texture = self.textures[image_no]
+        self.hit_box = texture.hit_box_points
+        self.texture = texture
 
-        derives from arcade.TurningSprite 
-        which is just a Sprite that aligns to its direction
-        '''
-        def update(self):
-            super().update()
-            if self.center_x < -100 or self.center_x > 1500 or \
-                    self.center_y > 1100 or self.center_y < -100:
-                self.remove_from_sprite_lists()
-                
 
 class MyGame(arcade.Window):
     """ Main application class. """
 
     def __init__(self):
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE,
+                         update_rate=1 / FRAME_RATE)
 
         # Set the working directory (where we expect to find files) to the same
         # directory this .py file is in. You can leave this out of your own
@@ -177,34 +83,97 @@ class MyGame(arcade.Window):
         file_path = os.path.dirname(os.path.abspath(__file__))
         os.chdir(file_path)
 
-        self.frame_count = 0
-
-        self.game_over = False
+        # times the phases of update and draw, see frame_profiler.py
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
+        # where to save the profile when the window closes, if anywhere
+        self.profile_path = None
+        # whether to print how the sprite pools, textures and sounds did when a game ends
+        self.print_stats = False
+
+        # the game being drawn
+        self.world = ShooterWorld(max_bullets=BULLET_POOL_CAP, profiler=self.profiler)
+        # key presses and releases waiting for the next tick, as (action, pressed)
+        self.pending_inputs = []
+        # writes the keys to a file, see input_replay.py
+        self.recorder = None
+        # or plays them back from one
+        self.replayer = None
+
+        self.timestep = FixedTimestep(self.tick, TICK_RATE, MAX_TICKS_PER_FRAME)
+        # blends the ship and bullets between ticks when drawing
+        self.interpolator = SpriteInterpolator()
 
         # sprite lists
         self.all_sprites_list = arcade.SpriteList()
         self.asteroid_list = arcade.SpriteList()
         self.bullet_list = arcade.SpriteList()
         self.ship_life_list = arcade.SpriteList()
-
-        # Set up the player
-        self.score = 0
         self.player_sprite = None
-        self.lives = 3
 
-        # sounds
-        self.laser_sound = arcade.load_sound(":resources:sounds/hurt5.wav")
-        self.hit_sound1 = arcade.load_sound(":resources:sounds/explosion1.wav")
-        self.hit_sound2 = arcade.load_sound(":resources:sounds/explosion2.wav")
-        self.hit_sound3 = arcade.load_sound(":resources:sounds/hit1.wav")
-        self.hit_sound4 = arcade.load_sound(":resources:sounds/hit2.wav")
+        # asteroid or bullet in the world -> the sprite drawing it
+        self.sprites = {}
+
+        # the text on the screen, only redrawn when what it says changes
+        self.hud = Hud()
+        self.hud.add("score", "Score: {}", 10, 70, arcade.color.WHITE, 13)
+        self.hud.add("asteroids", "Asteroid Count: {}", 10, 50, arcade.color.WHITE, 13)
+
+        # recycled bullets and asteroids, one pool per asteroid size
+        # sized for every starting asteroid being shot all the way down
+        self.bullet_pool = SpritePool(lambda: texture_cache.load_sprite(BULLET_IMAGE, SCALE),
+                                      BULLET_POOL_SIZE, BULLET_POOL_CAP, reset_moving_sprite)
+        self.asteroid_pools = {}
+        preallocate = STARTING_ENEMY_COUNT
+        for size in sorted(ASTEROID_TIERS, reverse=True):
+            tier = ASTEROID_TIERS[size]
+            self.asteroid_pools[size] = self.make_asteroid_pool(tier["images"], tier["scale"], preallocate)
+            preallocate *= tier["fragments"]
+
+        # sounds, decoded up front and mixed on their own thread
+        # splits in the same frame only play their sound once
+        self.sounds = SoundMixer()
+        self.laser_sound = self.sounds.load(":resources:sounds/hurt5.wav")
+        self.hit_sounds = {size: self.sounds.load(tier["sound"])
+                           for size, tier in ASTEROID_TIERS.items()}
+        self.sounds.start()
+
+    def make_asteroid_pool(self, image_list, scale, preallocate):
+        '''
+        pool of asteroids that can take on any of the images in image_list
+        no cap, ASTEROID_TIERS already limits how many asteroids there can be
+        '''
+        def make_asteroid():
+            asteroid = AsteroidSprite(scale=scale)
+            asteroid.textures = [texture_cache.load_texture(image) for image in image_list]
+            asteroid.texture = asteroid.textures[0]
+            return asteroid
+
+        return SpritePool(make_asteroid, preallocate, None, reset_moving_sprite)
 
-    def start_new_game(self):
+    def pool_stats(self):
+        '''
+        hit/miss/high water counts for every pool
+        '''
+        stats = {"bullets": self.bullet_pool.stats()}
+        for size, pool in self.asteroid_pools.items():
+            stats[f"asteroids_{size}"] = pool.stats()
+        return stats
+
+    def start_new_game(self, seed=None):
         '''
         sets up game and initalizes the variables
+        the same seed and keys always play the same game
         '''
-        self.frame_count = 0
-        self.game_over = False
+        self.timestep.reset()
+        self.interpolator.capture([])
+        self.pending_inputs = []
+
+        # hand back anything the last game left out
+        self.bullet_pool.release_all()
+        for pool in self.asteroid_pools.values():
+            pool.release_all()
+        self.sprites = {}
 
         # Sprite lists
         self.all_sprites_list = arcade.SpriteList()
@@ -212,15 +181,16 @@ class MyGame(arcade.Window):
         self.bullet_list = arcade.SpriteList()
         self.ship_life_list = arcade.SpriteList()
 
+        self.world.rng.reseed(seed)
+        self.world.start_new_game()
+
         # Set up the player
-        self.score = 0
-        self.player_sprite = ShipSprite(":resources:images/space_shooter/playerShip1_orange.png", SCALE)
+        self.player_sprite = arcade.Sprite(SHIP_IMAGE, SCALE)
         self.all_sprites_list.append(self.player_sprite)
-        self.lives = 3
 
         # Set up the little icons that represent the player lives.
         cur_pos = 10
-        for i in range(self.lives):
+        for i in range(self.world.lives):
             life = arcade.Sprite(":resources:images/space_shooter/playerLife1_orange.png", SCALE)
             life.center_x = cur_pos + life.width
             life.center_y = life.height
@@ -228,31 +198,9 @@ class MyGame(arcade.Window):
             self.all_sprites_list.append(life)
             self.ship_life_list.append(life)
 
-
-        # Make asteroids
-        image_list = (":resources:images/space_shooter/meteorGrey_big1.png",
-                      ":resources:images/space_shooter/meteorGrey_big2.png",
-                      ":resources:images/space_shooter/meteorGrey_big3.png",
-                      ":resources:images/space_shooter/meteorGrey_big4.png")
-        
-        for i in range(STARTING_ENEMY_COUNT):
-            image_no = random.randrange(4)
-            enemy_sprite = AsteroidSprite(image_list[image_no], SCALE)
-            enemy_sprite.guid = "Asteroid"
-
-            # spawn asteroid
-            enemy_sprite.center_x = random.randrange(LEFT_LIMIT, RIGHT_LIMIT)
-            enemy_sprite.center_y = random.randrange(BOTTOM_LIMIT, TOP_LIMIT)
-
-            # randomizes asteroid speed
-            enemy_sprite.change_x = random.random() * 2 - 1
-            enemy_sprite.change_y = random.random() * 2 - 1
-
-            # sets asteroid off in random direction
-            enemy_sprite.change_angle = (random.random() - 0.5) * 2
-            enemy_sprite.size = 4
-            self.all_sprites_list.append(enemy_sprite)
-            self.asteroid_list.append(enemy_sprite)
+        # sprites for the asteroids the world just made
+        self.handle_events()
+        self.sync_sprites()
 
     def on_draw(self):
         '''
@@ -262,215 +210,187 @@ class MyGame(arcade.Window):
         # required before we start drawing
         arcade.start_render()
 
+        # only asteroids on screen need their sprites brought up to date
+        # everything is drawn part way between the last two ticks
+        profiler = self.profiler
+        alpha = self.timestep.alpha
+        with profiler.section("visible_asteroids"):
+            sprites = self.sprites
+            for asteroid, x, y, angle in self.world.asteroid_field.visible(
+                    0, SCREEN_WIDTH, 0, SCREEN_HEIGHT, alpha=alpha):
+                sprite = sprites[asteroid]
+                sprite.position = (x, y)
+                sprite.angle = angle
+
         # draw all the sprites
-        self.all_sprites_list.draw()
+        with profiler.section("draw_sprites"):
+            self.interpolator.blend(alpha)
+            self.all_sprites_list.draw()
+            self.interpolator.restore()
 
         # Put the text on the screen.
-        output = f"Score: {self.score}"
-        arcade.draw_text(output, 10, 70, arcade.color.WHITE, 13)
+        with profiler.section("draw_hud"):
+            self.hud.draw()
 
-        output = f"Asteroid Count: {len(self.asteroid_list)}"
-        arcade.draw_text(output, 10, 50, arcade.color.WHITE, 13)
+        if self.show_profiler:
+            profiler.draw_overlay(SCREEN_WIDTH - 280, SCREEN_HEIGHT - 10)
+        profiler.end_frame()
+
+    def toggle_profiler(self):
+        '''
+        show or hide the profiler overlay, timing only runs while it shows
+        (or all along, when the profile is being saved)
+        '''
+        self.show_profiler = not self.show_profiler
+        if self.profile_path is None:
+            self.profiler.enable(self.show_profiler)
 
     def on_key_press(self, symbol, modifiers):
         '''
         called on key press
-        controls
+        the world gets it on the next tick
         '''
-        # shoot if the player presses key and not respawning
-        # TODO: fire two projectiles at a time (spawn offset)
-        if not self.player_sprite.respawning and symbol == arcade.key.SPACE:
-            bullet_sprite = BulletSprite(":resources:images/space_shooter/laserBlue01.png", SCALE)
-            bullet_sprite.guid = "Bullet"
-
-            # sets bullet in direction player is facing (player angle)
-            # sets bullet speed
-            # TODO: create seperate class for different weapons with different speeds / range
-            bullet_speed = 13
-            bullet_sprite.change_x = \
-                -math.sin(math.radians(self.player_sprite.angle)) * bullet_speed
-            bullet_sprite.change_y = \
-                math.cos(math.radians(self.player_sprite.angle)) * bullet_speed
-
-            # spawns bullet at player center
-            # TODO: offset projectile spawn from weapon locations on player
-            bullet_sprite.center_x = self.player_sprite.center_x
-            bullet_sprite.center_y = self.player_sprite.center_y
-            bullet_sprite.update()
-
-            # adds new bullet to all/list and bullet list
-            self.all_sprites_list.append(bullet_sprite)
-            self.bullet_list.append(bullet_sprite)
-
-            # TODO: derive sound from new weapon class
-            arcade.play_sound(self.laser_sound)
-
-        if symbol == arcade.key.A:
-            self.player_sprite.change_angle = 3
-        elif symbol == arcade.key.D:
-            self.player_sprite.change_angle = -3
-        # TODO: Pull thrust from ship class
-        elif symbol == arcade.key.W:
-            self.player_sprite.thrust = 0.15
-        # TODO: Pull reverse thrust from ship class
-        elif symbol == arcade.key.S:
-            self.player_sprite.thrust = -0.2
+        if symbol == PROFILER_KEY:
+            self.toggle_profiler()
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.world.frame_count, symbol, modifiers, True)
+        action = KEY_ACTIONS.get(symbol)
+        if action is not None:
+            self.pending_inputs.append((action, True))
 
     def on_key_release(self, symbol, modifiers):
         '''
         called when key is released
         '''
-        if symbol == arcade.key.A:
-            self.player_sprite.change_angle = 0
-        elif symbol == arcade.key.D:
-            self.player_sprite.change_angle = 0
-        elif symbol == arcade.key.W:
-            self.player_sprite.thrust = 0
-        elif symbol == arcade.key.S:
-            self.player_sprite.thrust = 0
-
-    def split_asteroid(self, asteroid: AsteroidSprite):
+        if symbol == PROFILER_KEY:
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.world.frame_count, symbol, modifiers, False)
+        action = KEY_ACTIONS.get(symbol)
+        if action is not None:
+            self.pending_inputs.append((action, False))
+
+    def handle_events(self):
         '''
-        Split an asteroid into chunks
-        Deletion of original asteroid is handled elsewhere
+        give whatever the world spawned last tick a sprite, take back the
+        sprites of whatever it removed, and play the sounds
         '''
-        # sets spawn coords and increments score
-        x = asteroid.center_x
-        y = asteroid.center_y
-        self.score += 1
-
-        if asteroid.size == 4:
-            # splits into range(3) (so three) smaller asteroids
-            # TODO: pull pieces from class 
-            for i in range(3):
-                image_no = random.randrange(2)
-                image_list = [":resources:images/space_shooter/meteorGrey_med1.png",
-                              ":resources:images/space_shooter/meteorGrey_med2.png"]
-                
-                enemy_sprite = AsteroidSprite(image_list[image_no], SCALE * 1.5)
-
-                # spawn coords
-                enemy_sprite.center_x = x
-                enemy_sprite.center_y = y
-
-                # randomizes velocity
-                enemy_sprite.change_x = random.random() * 2.5 - 1.25
-                enemy_sprite.change_y = random.random() * 2.5 - 1.25
-
-                # sets vector for new asteroids
-                enemy_sprite.change_angle = (random.random() - 0.5) * 2
-                enemy_sprite.size = 3
-
-                # adds new asteroid "pieces" to related lists
-                self.all_sprites_list.append(enemy_sprite)
-                self.asteroid_list.append(enemy_sprite)
-                self.hit_sound1.play()
-
-
-        elif asteroid.size == 3:
-            # splits into range(3) (so three) smaller asteroids
-            # TODO: pull pieces from class 
-            for i in range(3):
-                image_no = random.randrange(2)
-                image_list = [":resources:images/space_shooter/meteorGrey_small1.png",
-                              ":resources:images/space_shooter/meteorGrey_small2.png"]
-                
-                enemy_sprite = AsteroidSprite(image_list[image_no], SCALE * 1.5)
-
-                # spawn coords
-                enemy_sprite.center_x = x
-                enemy_sprite.center_y = y
-
-                # randomizes velocity
-                enemy_sprite.change_x = random.random() * 3 - 1.5
-                enemy_sprite.change_y = random.random() * 3 - 1.5
-
-                # sets vector for new asteroids
-                enemy_sprite.change_angle = (random.random() - 0.5) * 2
-                enemy_sprite.size = 2
-
-                # adds new asteroid "pieces" to related lists
-                self.all_sprites_list.append(enemy_sprite)
-                self.asteroid_list.append(enemy_sprite)
-                self.hit_sound2.play()
-
-
-        elif asteroid.size == 2:
-            # splits into range(3) (so three) smaller asteroids
-            # TODO: pull pieces from class 
-            for i in range(3):
-                image_no = random.randrange(2)
-                image_list = [":resources:images/space_shooter/meteorGrey_tiny1.png",
-                              ":resources:images/space_shooter/meteorGrey_tiny2.png"]
-                
-                enemy_sprite = AsteroidSprite(image_list[image_no], SCALE * 1.5)
-
-                # spawn coords
-                enemy_sprite.center_x = x
-                enemy_sprite.center_y = y
-
-                # randomizes velocity
-                enemy_sprite.change_x = random.random() * 3.5 - 1.75
-                enemy_sprite.change_y = random.random() * 3.5 - 1.75
-
-                # sets vector for new asteroids
-                enemy_sprite.change_angle = (random.random() - 0.5) * 2
-                enemy_sprite.size = 1
-
-                # adds new asteroid "pieces" to related lists
-                self.all_sprites_list.append(enemy_sprite)
-                self.asteroid_list.append(enemy_sprite)
-                self.hit_sound3.play()
-
-
-        elif asteroid.size == 1:
-            self.hit_sound4.play()
-
-    def on_update(self, x):
+        new_asteroids = []
+        for kind, thing in self.world.events:
+            if kind == ASTEROID_SPAWNED:
+                sprite = self.asteroid_pools[thing.size].acquire()
+                sprite.set_image(thing.image_no)
+                sprite.position = thing.position
+                sprite.angle = thing.angle
+                self.sprites[thing] = sprite
+                new_asteroids.append(thing)
+
+            elif kind == BULLET_SPAWNED:
+                sprite = self.bullet_pool.acquire()
+                sprite.position = thing.position
+                sprite.angle = thing.angle
+                self.interpolator.forget(sprite)
+                self.sprites[thing] = sprite
+                self.all_sprites_list.append(sprite)
+                self.bullet_list.append(sprite)
+
+            elif kind == ASTEROID_REMOVED or kind == BULLET_REMOVED:
+                sprite = self.sprites.pop(thing)
+                sprite.pool.release(sprite)
+
+            elif kind == ASTEROID_SPLIT:
+                self.sounds.play(self.hit_sounds[thing])
+
+            elif kind == SHOT_FIRED:
+                # TODO: derive sound from new weapon class
+                self.sounds.play(self.laser_sound)
+
+            elif kind == CRASH:
+                self.ship_life_list.pop().remove_from_sprite_lists()
+                print("Crash")
+
+            elif kind == GAME_OVER:
+                print("Game over")
+                if self.print_stats:
+                    print(self.pool_stats())
+                    print("textures:", texture_cache.stats())
+                    print("sounds:", self.sounds.stats())
+
+        # adds new asteroid "pieces" to related lists all at once,
+        # leaving out any that were shot again in the same tick
+        fragments = [self.sprites[asteroid] for asteroid in new_asteroids
+                     if asteroid in self.sprites]
+        self.all_sprites_list.extend(fragments)
+        self.asteroid_list.extend(fragments)
+
+        # the hud only does anything if these changed
+        self.hud.set("score", self.world.score)
+        self.hud.set("asteroids", len(self.world.asteroids))
+
+    def sync_sprites(self):
         '''
-        move all the things
+        put the ship and bullet sprites where the world has them
+        asteroids are left to on_draw, which only does the visible ones
         '''
-        self.frame_count += 1
-
-        if not self.game_over:
-            # here is why the ShipSprite class needs update()
-            # so that it can be called while nested within the list
-            self.all_sprites_list.update()       
-
-            # checks for collisions between bullets and asteroids
-            for bullet in self.bullet_list:
-                asteroids_plain = arcade.check_for_collision_with_list(bullet, self.asteroid_list)
-                asteroids_spatial = arcade.check_for_collision_with_list(bullet, self.asteroid_list)
-                if len(asteroids_plain) != len(asteroids_spatial):
-                    print('ERROR')
-
-                asteroids = asteroids_spatial
-
-                for asteroid in asteroids:
-                    # creates new smaller asteroids
-                    self.split_asteroid(cast(AsteroidSprite, asteroid))
-                    # deletes original asteroid and bullet (collide with bullet)
-                    asteroid.remove_from_sprite_lists()
-                    bullet.remove_from_sprite_lists()
-
-            if not self.player_sprite.respawning:
-                # same as for bullets but with player instead
-                asteroids = arcade.check_for_collision_with_list(self.player_sprite, self.asteroid_list)
-                # if there is an asteroid collision then asteroids is at least 1
-                if len(asteroids) > 0:
-                    # number of lives check
-                    if self.lives > 0:
-                        self.lives -= 1
-                        self.player_sprite.respawn()
-                        # asteroids[0] refers to the first asteroid in case several collide at once
-                        self.split_asteroid(cast(AsteroidSprite, asteroids[0]))
-                        asteroids[0].remove_from_sprite_lists()
-                        self.ship_life_list.pop().remove_from_sprite_lists()
-                        print("Crash")
-                    else:
-                        self.game_over = True
-                        print("Game over")
-                        
+        ship = self.world.ship
+        self.player_sprite.position = ship.position
+        self.player_sprite.angle = ship.angle
+        self.player_sprite.alpha = ship.alpha
+
+        # bullets keep the angle they were fired at
+        sprites = self.sprites
+        for bullet, x, y in self.world.bullet_field.positions():
+            sprites[bullet].position = (x, y)
+
+    def on_update(self, delta_time):
+        '''
+        run as many ticks as the time since the last update pays for
+        '''
+        with self.profiler.section("update"):
+            self.timestep.advance(delta_time)
+        self.sounds.end_frame()
+
+    def tick(self):
+        '''
+        move all the things, one fixed step
+        '''
+        if self.replayer is not None:
+            self.replayer.feed(self.world.frame_count, self)
+        self.interpolator.capture([self.player_sprite, *self.bullet_list])
+
+        inputs, self.pending_inputs = self.pending_inputs, []
+        self.world.step(inputs)
+        with self.profiler.section("sprite_events"):
+            self.handle_events()
+            self.sync_sprites()
+
+    def on_close(self):
+        if self.recorder is not None:
+            self.recorder.close(self.world.frame_count)
+        if self.profile_path is not None:
+            self.profiler.export(self.profile_path)
+        self.sounds.close()
+        super().on_close()
+
+
+def replay_headless(replayer):
+    '''
+    play a recording straight into a ShooterWorld, no window,
+    as fast as it will go
+    '''
+    world = ShooterWorld(max_bullets=BULLET_POOL_CAP, seed=replayer.seed)
+    world.start_new_game()
+
+    def tick():
+        inputs = [(KEY_ACTIONS[symbol], pressed)
+                  for symbol, modifiers, pressed in replayer.events.get(world.frame_count, ())
+                  if symbol in KEY_ACTIONS]
+        world.step(inputs)
+
+    rate = replayer.fast_forward(tick)
+    print(f"{replayer.ticks} ticks at {rate:.0f} ticks/s, score {world.score}, lives {world.lives}")
+    return world
 
 
 
@@ -481,10 +401,40 @@ Game Open
 '''
 
 def main():
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", metavar="FILE", help="save the keys pressed to FILE")
+    parser.add_argument("--replay", metavar="FILE", help="play the game saved in FILE")
+    parser.add_argument("--headless", action="store_true",
+                        help="replay without a window, as fast as possible")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time every frame, saved as CSV (or JSON for .json) on exit")
+    parser.add_argument("--stats", action="store_true",
+                        help="print sprite pool, texture and sound stats when a game ends")
+    args = parser.parse_args()
+
+    replayer = None
+    if args.replay:
+        replayer = InputReplayer(args.replay)
+        if args.headless:
+            replay_headless(replayer)
+            return
+
     window = MyGame()
-    window.start_new_game()
+    window.print_stats = args.stats
+    if args.profile:
+        window.profile_path = args.profile
+        window.profiler.enable()
+    if replayer is not None:
+        window.replayer = replayer
+        replayer.attach(window, keys_through=(PROFILER_KEY,))
+        window.start_new_game(replayer.seed)
+    else:
+        window.start_new_game(args.seed)
+        if args.record:
+            window.recorder = InputRecorder(args.record, "shooter", window.world.rng.seed, TICK_RATE)
     arcade.run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,365 @@
+"""
+Asset manifest
+
+The games used to load their sounds the moment the window was made,
+and pick their images off disk one at a time as they went. This lists
+every image, sound and font under ASSET_DIRS in assets.json:
+
+    {"roots": ["images", "sounds"],
+     "assets": {"sounds/coin1.wav":
+                    {"type": "sound", "size": 17340, "sha256": "...",
+                     "mtime_ns": ..., "channels": 1, "rate": 44100, "frames": 8648},
+                "images/tiles/grassMid.png":
+                    {"type": "image", "size": 1312, "sha256": "...",
+                     "mtime_ns": ..., "width": 128, "height": 128}, ...}}
+
+so a game can hold a handle to an asset without touching the file, and
+only load it the first time it is used:
+
+    assets = AssetLibrary(load(), scenes={"level": ["sounds/jump1.wav"]})
+    jump = assets["sounds/jump1.wav"]       # KeyError if there's no such file
+    assets.warm_up("level")                 # load a scene's assets ahead of time
+    arcade.play_sound(jump.load())          # or on first use
+
+What loading means for each type is up to the library's loaders, by
+default images become textures from texture_cache, sounds arcade
+Sounds and fonts are left as paths.
+
+load() trusts the manifest that is there, it only builds one if there
+isn't one, so starting a game doesn't walk the asset tree. Instead each
+asset is checked as it's loaded: if its file's size or mtime aren't
+what the manifest says, that one entry is described again, and a file
+the manifest doesn't list yet gets an entry when it's asked for. Those
+fixes only last for the run, python asset_manifest.py rebuilds the
+manifest after assets were added or changed.
+
+python asset_manifest.py --benchmark times the platformer's startup
+work, loading every sound up front against loading through the
+manifest. 09_endgame.py --startup times the real thing, up to the first
+frame drawn.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+import PIL.Image
+
+ASSET_DIRS = ("images", "sounds")
+# made from the other images, see texture_atlas.py
+SKIP_DIRS = (os.path.join("images", "atlas"),)
+MANIFEST_PATH = "assets.json"
+TYPES = {".png": "image", ".jpg": "image", ".gif": "image", ".bmp": "image",
+         ".wav": "sound", ".ogg": "sound", ".mp3": "sound",
+         ".ttf": "font", ".otf": "font"}
+
+
+def _key(path):
+    """ The name a path is filed under in the manifest """
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def find_assets(roots=ASSET_DIRS):
+    """ path -> os.stat() of every file under roots of a type in TYPES """
+    found = {}
+    for root in roots:
+        for directory, subdirectories, files in os.walk(root):
+            if directory in SKIP_DIRS:
+                subdirectories[:] = []
+                continue
+            for name in files:
+                if os.path.splitext(name)[1].lower() in TYPES:
+                    path = os.path.join(directory, name)
+                    found[_key(path)] = os.stat(path)
+    return found
+
+
+def describe(path, file=None):
+    """
+    The type of an asset and its dimensions, what can be had without
+    decoding it. Read from file if given, otherwise from path.
+    """
+    kind = TYPES[os.path.splitext(path)[1].lower()]
+    entry = {"type": kind}
+    if kind == "image":
+        # only reads the header
+        with PIL.Image.open(file or path) as image:
+            entry["width"], entry["height"] = image.size
+    elif kind == "sound" and path.lower().endswith(".wav"):
+        with wave.open(file or path) as wav:
+            entry["channels"] = wav.getnchannels()
+            entry["rate"] = wav.getframerate()
+            entry["frames"] = wav.getnframes()
+    return entry
+
+
+def entry_for(path, stat=None):
+    """ The manifest entry for the asset at path, described and hashed """
+    if stat is None:
+        stat = os.stat(path)
+    entry = describe(path)
+    with open(path, "rb") as file:
+        entry["sha256"] = hashlib.sha256(file.read()).hexdigest()
+    entry["size"] = stat.st_size
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return entry
+
+
+def pack_entry_for(pack, path):
+    """ The manifest entry for an asset that's only in an asset pack """
+    key = _key(path)
+    offset, size, mtime_ns = pack.entries[key]
+    entry = describe(key, pack.open(key))
+    entry["sha256"] = hashlib.sha256(pack.view(key)).hexdigest()
+    entry["size"] = size
+    entry["mtime_ns"] = mtime_ns
+    return entry
+
+
+def build(roots=ASSET_DIRS, path=MANIFEST_PATH):
+    """ Describe and hash every asset under roots, write the manifest to path and return it """
+    assets = {key: entry_for(key, stat) for key, stat in sorted(find_assets(roots).items())}
+
+    manifest = {"roots": list(roots), "assets": assets}
+    # write then rename, so nobody reads half a manifest
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(temp_path, path)
+    return manifest
+
+
+def read_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_stale(manifest, roots=ASSET_DIRS):
+    """
+    Whether the manifest is missing or any asset was added, removed or
+    changed. This stats every file under roots, it's for the command
+    line, games check each asset as they load it instead.
+    """
+    if manifest is None or manifest.get("roots") != list(roots):
+        return True
+    assets = manifest["assets"]
+    found = find_assets(roots)
+    if found.keys() != assets.keys():
+        return True
+    return any(stat.st_size != assets[key]["size"] or stat.st_mtime_ns != assets[key]["mtime_ns"]
+               for key, stat in found.items())
+
+
+def load(roots=ASSET_DIRS, path=MANIFEST_PATH):
+    """ The manifest in path, only built if there isn't one for roots """
+    manifest = read_manifest(path)
+    if manifest is None or manifest.get("roots") != list(roots):
+        manifest = build(roots, path)
+    return manifest
+
+
+def _load_sound(path):
+    import arcade
+    return arcade.load_sound(path)
+
+
+def _load_texture(path):
+    import texture_cache
+    return texture_cache.load_texture(path)
+
+
+DEFAULT_LOADERS = {"image": _load_texture, "sound": _load_sound, "font": lambda path: path}
+
+
+class Asset:
+    """ A handle to one asset in the manifest, loaded the first time load() is called """
+
+    def __init__(self, library, path, entry):
+        self.library = library
+        self.path = path
+        self.entry = entry
+        self.type = entry["type"]
+        self.value = None
+        self.loaded = False
+
+    def load(self):
+        if not self.loaded:
+            self.library._load(self)
+        return self.value
+
+    def __repr__(self):
+        return f"<Asset {self.path} {'loaded' if self.loaded else 'not loaded'}>"
+
+
+class AssetLibrary:
+    """
+    Handles to the assets in a manifest, loaded with loaders by type.
+    scenes maps a scene name to the paths warm_up(name) loads.
+    """
+
+    def __init__(self, manifest, loaders=None, scenes=None):
+        self.entries = manifest["assets"]
+        self.loaders = dict(DEFAULT_LOADERS)
+        self.loaders.update(loaders or {})
+        self.scenes = dict(scenes or {})
+        # path -> Asset, made when first asked for
+        self.handles = {}
+        # assets are loaded on loader threads too
+        self.lock = threading.RLock()
+
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.bytes_loaded = 0
+        # entries described again since the manifest was built
+        self.refreshed = 0
+
+    def __contains__(self, path):
+        return _key(path) in self.entries
+
+    def __getitem__(self, path):
+        """
+        The handle to the asset at path. One the manifest doesn't list
+        yet is added if the file is there or the asset pack has it,
+        otherwise it's a KeyError.
+        """
+        key = _key(path)
+        handle = self.handles.get(key)
+        if handle is None:
+            with self.lock:
+                handle = self.handles.get(key)
+                if handle is None:
+                    entry = self.entries.get(key)
+                    if entry is None:
+                        entry = self.entries[key] = self._new_entry(key)
+                        self.refreshed += 1
+                    handle = self.handles[key] = Asset(self, key, entry)
+        return handle
+
+    def _new_entry(self, key):
+        """ The entry for an asset the manifest doesn't list, from its loose file or the pack """
+        if os.path.splitext(key)[1].lower() not in TYPES:
+            raise KeyError(key)
+        if os.path.isfile(key):
+            return entry_for(key)
+        # asset_pack imports this module, so not at the top
+        import asset_pack
+        pack = asset_pack.default_pack()
+        if pack is not None and key in pack:
+            return pack_entry_for(pack, key)
+        raise KeyError(key)
+
+    def _refresh(self, handle):
+        """ Describe an asset again if its file changed since the manifest was built """
+        try:
+            stat = os.stat(handle.path)
+        except FileNotFoundError:
+            # shipped in the asset pack without the loose files
+            return
+        entry = handle.entry
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            handle.entry = self.entries[handle.path] = entry_for(handle.path, stat)
+            self.refreshed += 1
+
+    def _load(self, handle):
+        with self.lock:
+            if handle.loaded:
+                return
+            self._refresh(handle)
+            start = time.perf_counter()
+            handle.value = self.loaders[handle.type](handle.path)
+            handle.loaded = True
+            self.loads += 1
+            self.load_seconds += time.perf_counter() - start
+            self.bytes_loaded += handle.entry["size"]
+
+    def warm_up(self, scene):
+        """ Load a scene's assets, or a list of paths, now rather than on first use """
+        paths = self.scenes[scene] if isinstance(scene, str) else scene
+        for path in paths:
+            self[path].load()
+
+    def stats(self):
+        return {"assets": len(self.entries), "handles": len(self.handles), "loaded": self.loads,
+                "bytes_loaded": self.bytes_loaded, "load_ms": self.load_seconds * 1000,
+                "refreshed": self.refreshed}
+
+
+# the platformer's startup, loading every sound up front or only what the
+# level warms up through the manifest, with the time taken printed as the
+# last line; run in a fresh process each time so nothing is cached already
+_STARTUP = """
+import time, warnings
+start = time.perf_counter()
+import texture_atlas
+from level_cache import load_level
+from layer_manager import LayerManager
+from sound_mixer import NullBackend, SoundMixer
+warnings.simplefilter("ignore", DeprecationWarning)
+imported = time.perf_counter()
+sounds = SoundMixer(NullBackend())
+if {lazy}:
+    import asset_manifest
+    assets = asset_manifest.AssetLibrary(asset_manifest.load(),
+                                         {{"image": texture_atlas.load_texture, "sound": sounds.load}})
+    assets.warm_up(["sounds/coin1.wav", "sounds/jump1.wav"])
+else:
+    sounds.load_dir("sounds")
+player = texture_atlas.load_sprite("images/player_1/player_stand.png", 1)
+my_map = load_level("map2_level_1.tmx", 0.5)
+layers = LayerManager()
+for z, name in enumerate(("Background", "Platforms", "Coins", "Don't Touch", "Foreground")):
+    layers.build(my_map, name, 0.5, z)
+done = time.perf_counter()
+print((imported - start) * 1000, (done - imported) * 1000)
+"""
+
+
+def benchmark(runs=3):
+    """ {mode: (import ms, startup ms)}, the best of runs fresh processes each """
+    results = {}
+    for mode, lazy in (("eager", False), ("manifest", True)):
+        timings = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", _STARTUP.format(lazy=lazy)],
+                                    capture_output=True, text=True, check=True).stdout
+            timings.append(tuple(float(number) for number in output.split()[-2:]))
+        results[mode] = min(timings, key=lambda timing: timing[1])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the asset manifest")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="time the platformer's startup loading everything against using the manifest")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build()
+    assets = manifest["assets"]
+    print(f"{len(assets)} assets, {sum(entry['size'] for entry in assets.values()) / 2 ** 20:.1f}MB, "
+          f"manifest built in {(time.perf_counter() - start) * 1000:.0f}ms")
+    for kind in sorted(set(TYPES.values())):
+        entries = [entry for entry in assets.values() if entry["type"] == kind]
+        print(f"    {len(entries):>4} {kind}s, {sum(entry['size'] for entry in entries) / 2 ** 20:.1f}MB")
+    start = time.perf_counter()
+    stale = is_stale(manifest)
+    print(f"checked it was up to date in {(time.perf_counter() - start) * 1000:.1f}ms: "
+          f"{'stale' if stale else 'up to date'}")
+
+    if args.benchmark:
+        for mode, (imported, startup) in benchmark(args.runs).items():
+            print(f"{mode:<9} imports {imported:.0f}ms, then startup {startup:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Asset pack
+
+The ship sprites, the tiles and the sounds are hundreds of loose files,
+each opened, stat'ed and read on its own on a cold start, and copied
+one by one on a deploy. python asset_pack.py packs everything under
+PACK_DIRS into one file, assets.pak, with an offset table up front.
+
+At runtime the pack is opened and memory mapped once. view(path) is a
+memoryview straight into the map, no read and no copy, and open(path)
+wraps one as a file for decoders that want a file. texture_cache and
+sound_mixer get their bytes through open_asset() and read_asset(),
+which use the pack when there is one and it has the file, and the
+loose file otherwise:
+
+    image = PIL.Image.open(asset_pack.open_asset("images/tiles/grassMid.png"))
+    data = asset_pack.read_asset("sounds/coin1.wav")    # a memoryview
+
+The pack is for shipping, where only it is there. In a dev tree, one
+where the PACK_DIRS are there too, the loose files win over any that
+changed since the pack was built: when the pack is opened the loose
+files are compared with it once, and a packed file whose loose copy has
+a different size or mtime is read from the loose file, with a warning,
+so build the pack again or delete it. Reads never stat the loose files
+themselves. python asset_pack.py --check lists every file that differs
+from it.
+
+File layout, little endian:
+    header  "APAK", version, entry count
+    entries offset, size, source mtime_ns, path length, path (utf-8)
+    data    each file's bytes, starting on an ALIGN byte boundary
+"""
+
+import argparse
+import io
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from asset_manifest import find_assets
+
+MAGIC = b"APAK"
+VERSION = 1
+PACK_DIRS = ("images/SpaceShipSprites/spaceshooter/PNG", "images/tiles", "sounds")
+PACK_PATH = "assets.pak"
+ALIGN = 16
+
+HEADER = struct.Struct("<4sHxxI")
+ENTRY = struct.Struct("<QQqH")
+
+
+def _key(path):
+    """ The name a path is packed under """
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def _align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def build(roots=PACK_DIRS, path=PACK_PATH):
+    """ Pack every asset under roots into path, returns how many files and bytes went in """
+    sources = sorted(find_assets(roots).items())
+    names = [key.encode() for key, stat in sources]
+    table_size = HEADER.size + sum(ENTRY.size + len(name) for name in names)
+
+    offsets = []
+    offset = _align(table_size)
+    for key, stat in sources:
+        offsets.append(offset)
+        offset = _align(offset + stat.st_size)
+
+    # write then rename, so a running game never maps half a pack
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(sources)))
+        for (key, stat), name, start in zip(sources, names, offsets):
+            file.write(ENTRY.pack(start, stat.st_size, stat.st_mtime_ns, len(name)))
+            file.write(name)
+        for (key, stat), start in zip(sources, offsets):
+            file.write(b"\0" * (start - file.tell()))
+            with open(key, "rb") as source:
+                data = source.read()
+            if len(data) != stat.st_size:
+                raise OSError(f"{key} changed while it was being packed")
+            file.write(data)
+        size = file.tell()
+    os.replace(temp_path, path)
+    return len(sources), size
+
+
+class ViewFile(io.RawIOBase):
+    """ A read only file over a memoryview, for decoders that want a file """
+
+    def __init__(self, view, name=""):
+        super().__init__()
+        self.view = view
+        self.name = name
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        self.position = max(0, offset)
+        return self.position
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else self.position + size
+        data = self.view[self.position:end]
+        self.position += len(data)
+        # decoders want bytes, this copies only what they asked for
+        return data.tobytes()
+
+    def readinto(self, buffer):
+        data = self.view[self.position:self.position + len(buffer)]
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+class AssetPack:
+    """ A memory mapped asset pack """
+
+    def __init__(self, path=PACK_PATH):
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.map)
+
+        magic, version, count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} isn't a version {VERSION} asset pack")
+        # path -> (offset, size, source mtime_ns)
+        self.entries = {}
+        position = HEADER.size
+        for _ in range(count):
+            offset, size, mtime_ns, length = ENTRY.unpack_from(self.buffer, position)
+            position += ENTRY.size
+            name = self.buffer[position:position + length].tobytes().decode()
+            position += length
+            self.entries[name] = (offset, size, mtime_ns)
+        # packed paths whose loose file differs, see check_loose()
+        self.changed_keys = set()
+
+    def __contains__(self, path):
+        return _key(path) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def view(self, path):
+        """ The bytes of the file packed as path, a memoryview into the map """
+        offset, size, mtime_ns = self.entries[_key(path)]
+        return self.buffer[offset:offset + size]
+
+    def open(self, path):
+        return ViewFile(self.view(path), _key(path))
+
+    def changed(self, path):
+        """ Whether check_loose() found the loose file packed as path changed, so the pack's copy is out of date """
+        return _key(path) in self.changed_keys
+
+    def stale(self, roots=PACK_DIRS):
+        """ The packed paths whose loose file has changed or gone since, and loose files not packed """
+        changed = []
+        found = find_assets(roots)
+        for path, (offset, size, mtime_ns) in self.entries.items():
+            stat = found.get(path)
+            if stat is None or stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                changed.append(path)
+        changed.extend(sorted(path for path in found if path not in self.entries))
+        return changed
+
+    def check_loose(self, roots=PACK_DIRS):
+        """
+        Compare the pack with the loose files once, if there are any, so
+        changed() knows which packed copies are out of date. A shipped
+        game has no loose tree and this does nothing.
+        """
+        if not any(os.path.isdir(root) for root in roots):
+            return
+        self.changed_keys = {path for path in self.stale(roots) if path in self.entries}
+        if self.changed_keys:
+            print(f"Warning, {len(self.changed_keys)} files changed since {self.path} was built, "
+                  f"using the loose files: {sorted(self.changed_keys)}")
+
+    def close(self):
+        """ Unmap the pack, nothing may still hold a view() """
+        self.buffer.release()
+        self.map.close()
+
+
+_default = None
+_default_opened = False
+# textures and sounds are loaded on loader threads too
+_default_lock = threading.Lock()
+
+
+def default_pack():
+    """ The pack in PACK_PATH, opened the first time it is asked for, None if there isn't one """
+    global _default, _default_opened
+    if not _default_opened:
+        with _default_lock:
+            if not _default_opened:
+                if os.path.exists(PACK_PATH):
+                    _default = AssetPack(PACK_PATH)
+                    _default.check_loose()
+                _default_opened = True
+    return _default
+
+
+def _packed(path):
+    """ The default pack if it has an up to date copy of path, otherwise None """
+    pack = default_pack()
+    if pack is None or path not in pack or pack.changed(path):
+        return None
+    return pack
+
+
+def open_asset(path):
+    """ A file to read path from, out of the pack if it has it """
+    pack = _packed(path)
+    if pack is not None:
+        return pack.open(path)
+    return open(path, "rb")
+
+
+def read_asset(path):
+    """ The bytes of path as a memoryview, straight out of the pack if it has it """
+    pack = _packed(path)
+    if pack is not None:
+        return pack.view(path)
+    with open(path, "rb") as file:
+        return memoryview(file.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the game's loose assets into one file")
+    parser.add_argument("roots", nargs="*", default=list(PACK_DIRS))
+    parser.add_argument("--output", default=PACK_PATH)
+    parser.add_argument("--check", action="store_true",
+                        help="don't pack, list the files that differ from the pack")
+    args = parser.parse_args()
+
+    if args.check:
+        changed = AssetPack(args.output).stale(args.roots)
+        print("the pack is up to date" if not changed else f"{len(changed)} files differ: {changed}")
+        return
+
+    start = time.perf_counter()
+    count, size = build(args.roots, args.output)
+    print(f"packed {count} files, {size / 2 ** 20:.1f}MB, into {args.output} "
+          f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    # read everything back both ways, checksumming so every byte is touched
+    pack = AssetPack(args.output)
+    start = time.perf_counter()
+    for path in pack.entries:
+        with open(path, "rb") as file:
+            zlib.crc32(file.read())
+    loose = time.perf_counter() - start
+    start = time.perf_counter()
+    for path in pack.entries:
+        zlib.crc32(pack.view(path))
+    packed = time.perf_counter() - start
+    print(f"reading every file: loose {loose * 1000:.1f}ms, from the pack {packed * 1000:.1f}ms")
+    pack.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Asteroid field simulation
+
+Keeps every asteroid's position, velocity, angle, spin and size tier in
+flat NumPy arrays and moves the whole field in one vectorized step,
+instead of calling AsteroidSprite.update() once per rock.
+
+The sprites are only a view of the arrays. They get their position and
+angle copied over when they are about to be tested for a collision, and
+visible() hands out just the on screen ones for drawing, so rocks
+drifting around off screen cost nothing.
+"""
+
+import math
+
+import numpy as np
+
+
+class AsteroidField:
+    """
+    Structure-of-arrays store for asteroids.
+
+    Slot i of every array belongs to self.sprites[i]. Slots are packed,
+    removing an asteroid moves the last one into its place.
+    """
+
+    # per-asteroid arrays and their types
+    ARRAYS = (('x', np.float64), ('y', np.float64),
+              ('change_x', np.float64), ('change_y', np.float64),
+              ('angle', np.float64), ('change_angle', np.float64),
+              # radius of a circle around the sprite at any rotation
+              ('half_size', np.float64),
+              ('size', np.int8),
+              # where it was before the last step, for drawing between steps
+              ('prev_x', np.float64), ('prev_y', np.float64),
+              ('prev_angle', np.float64))
+
+    def __init__(self, left_limit, right_limit, bottom_limit, top_limit,
+                 capacity=64):
+        # where asteroids wrap around to the other side
+        self.left_limit = left_limit
+        self.right_limit = right_limit
+        self.bottom_limit = bottom_limit
+        self.top_limit = top_limit
+
+        self.count = 0
+        self.capacity = 0
+        self.sprites = []
+        for name, dtype in self.ARRAYS:
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """ Resize the arrays, keeping the live slots """
+        for name, dtype in self.ARRAYS:
+            array = np.zeros(capacity, dtype=dtype)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def add(self, sprite):
+        """
+        Take over an already set up asteroid sprite.
+        Its position, change_x/y, angle, change_angle and size are copied
+        into the arrays and the sprite stops moving itself.
+        """
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        i = self.count
+        self.x[i] = self.prev_x[i] = sprite.center_x
+        self.y[i] = self.prev_y[i] = sprite.center_y
+        self.change_x[i] = sprite.change_x
+        self.change_y[i] = sprite.change_y
+        self.angle[i] = self.prev_angle[i] = sprite.angle
+        self.change_angle[i] = sprite.change_angle
+        self.half_size[i] = math.hypot(sprite.width, sprite.height) / 2
+        self.size[i] = sprite.size
+
+        sprite.field_index = i
+        self.sprites.append(sprite)
+        self.count += 1
+
+    def remove(self, sprite):
+        """ Drop an asteroid, swapping the last slot into the hole """
+        i = sprite.field_index
+        if i is None:
+            return
+        last = self.count - 1
+        if i != last:
+            for name, _ in self.ARRAYS:
+                array = getattr(self, name)
+                array[i] = array[last]
+            moved = self.sprites[last]
+            self.sprites[i] = moved
+            moved.field_index = i
+        self.sprites.pop()
+        sprite.field_index = None
+        self.count = last
+
+    def clear(self):
+        for sprite in self.sprites:
+            sprite.field_index = None
+        self.sprites = []
+        self.count = 0
+
+    def step(self):
+        """
+        Move and spin every asteroid one frame, then wrap the ones that
+        went past the limits. Same rules as AsteroidSprite.update().
+        """
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        prev_x = self.prev_x[:n]
+        prev_y = self.prev_y[:n]
+        prev_x[:] = x
+        prev_y[:] = y
+        self.prev_angle[:n] = self.angle[:n]
+
+        x += self.change_x[:n]
+        y += self.change_y[:n]
+        self.angle[:n] += self.change_angle[:n]
+
+        wrapped = x < self.left_limit
+        x[wrapped] = self.right_limit
+        wrap = x > self.right_limit
+        x[wrap] = self.left_limit
+        wrapped |= wrap
+        wrap = y > self.top_limit
+        y[wrap] = self.bottom_limit
+        wrapped |= wrap
+        wrap = y < self.bottom_limit
+        y[wrap] = self.top_limit
+        wrapped |= wrap
+
+        # don't draw a wrapped asteroid sliding across the whole field
+        prev_x[wrapped] = x[wrapped]
+        prev_y[wrapped] = y[wrapped]
+
+    def sync_sprite(self, sprite):
+        """ Copy one asteroid's state onto its sprite """
+        i = sprite.field_index
+        sprite.position = (float(self.x[i]), float(self.y[i]))
+        sprite.angle = float(self.angle[i])
+
+    def sync_all(self):
+        n = self.count
+        self._sync(np.arange(n), self.x[:n], self.y[:n], self.angle[:n])
+
+    def visible(self, left, right, bottom, top, margin=8, alpha=1.0):
+        """
+        (asteroid, x, y, angle) for just the asteroids overlapping the
+        given view box, for drawing. margin should be at least the fastest
+        asteroid speed, so a sprite that stops being updated is already
+        fully out of view.
+
+        With alpha under 1 the asteroids are placed that far between the
+        previous step and the current one.
+        """
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        angle = self.angle[:n]
+        if alpha < 1:
+            prev_x = self.prev_x[:n]
+            prev_y = self.prev_y[:n]
+            prev_angle = self.prev_angle[:n]
+            x = prev_x + (x - prev_x) * alpha
+            y = prev_y + (y - prev_y) * alpha
+            angle = prev_angle + (angle - prev_angle) * alpha
+
+        reach = self.half_size[:n] + margin
+        indexes = np.flatnonzero((x + reach >= left) & (x - reach <= right) &
+                                 (y + reach >= bottom) & (y - reach <= top))
+        sprites = self.sprites
+        return zip([sprites[i] for i in indexes.tolist()],
+                   x[indexes].tolist(), y[indexes].tolist(),
+                   angle[indexes].tolist())
+
+    def _sync(self, indexes, x, y, angle):
+        sprites = self.sprites
+        xs = x[indexes].tolist()
+        ys = y[indexes].tolist()
+        angles = angle[indexes].tolist()
+        for i, x, y, angle in zip(indexes.tolist(), xs, ys, angles):
+            sprite = sprites[i]
+            sprite.position = (x, y)
+            sprite.angle = angle
+
+    def rebuild_hash(self, spatial_hash):
+        """
+        Re-bucket every asteroid in a SpatialHash straight from the arrays,
+        without touching the (possibly stale) sprites.
+        """
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        half = self.half_size[:n]
+        lefts = (x - half).tolist()
+        rights = (x + half).tolist()
+        bottoms = (y - half).tolist()
+        tops = (y + half).tolist()
+
+        spatial_hash.clear()
+        insert_box = spatial_hash.insert_box
+        for sprite, left, right, bottom, top in zip(self.sprites, lefts, rights,
+                                                    bottoms, tops):
+            insert_box(sprite, left, right, bottom, top)
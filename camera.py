@@ -0,0 +1,152 @@
+"""
+Scrolling camera
+
+Each platformer used to work out its scrolling by hand: check the
+player against four margins, truncate the view to whole pixels and
+call arcade.set_viewport whenever a margin was crossed, even when the
+whole pixel view came out the same. A Camera owns the viewport instead:
+
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT,
+                    (LEFT_VIEWPORT_MARGIN, RIGHT_VIEWPORT_MARGIN,
+                     BOTTOM_VIEWPORT_MARGIN, TOP_VIEWPORT_MARGIN))
+    camera.set_bounds(map_left, map_right, map_bottom, map_top)
+
+    # every update or tick
+    camera.follow(player_sprite)
+
+    # in on_draw
+    camera.apply()
+    walls.draw(*camera.visible_rect())
+
+The margins are a dead zone, the camera only wants to move once the
+sprite leaves it. It then moves part of the way there each tick
+(follow_rate, 1 jumps straight there), keeping its position to a
+fraction of a pixel, and never shows anything outside the bounds.
+apply() snaps that to whole screen pixels, so the tiles don't shimmer,
+and only calls set_viewport when the snapped view has moved.
+
+For drawing between fixed ticks, apply(alpha) blends from where the
+camera was before the last tick, like SpriteInterpolator does for
+sprites.
+"""
+
+import math
+
+import arcade
+
+from fixed_timestep import lerp
+
+
+class Camera:
+    """ A width by height view of the world that follows a sprite """
+
+    def __init__(self, width, height, margins=(0, 0, 0, 0), follow_rate=1.0, bounds=None):
+        self.width = width
+        self.height = height
+        # left, right, bottom and top dead zone margins
+        self.margins = margins
+        self.follow_rate = follow_rate
+        # left, right, bottom, top the view has to stay inside, if anything
+        self.bounds = bounds
+        # screen pixels per world unit, what the view is snapped to
+        self.pixel_scale = 1.0
+
+        # where the view's bottom left is, and where it's heading
+        self.left = self.bottom = 0.0
+        self.target_left = self.target_bottom = 0.0
+        # where it was before the last follow(), for blending
+        self.previous = (0.0, 0.0)
+        # the snapped (left, bottom) last handed to set_viewport
+        self.applied = None
+        # how many times apply() did call set_viewport
+        self.viewport_updates = 0
+
+    def set_bounds(self, left, right, bottom, top):
+        self.bounds = (left, right, bottom, top)
+        self.target_left, self.target_bottom = self._clamp(self.target_left, self.target_bottom)
+        self.left, self.bottom = self._clamp(self.left, self.bottom)
+
+    def set_pixel_scale(self, pixel_scale):
+        """ Snap to a different number of screen pixels per world unit, e.g. after a resize """
+        self.pixel_scale = pixel_scale
+        self.invalidate()
+
+    def invalidate(self):
+        """ Call set_viewport on the next apply() whether or not the view moved """
+        self.applied = None
+
+    def _clamp(self, left, bottom):
+        if self.bounds is None:
+            return left, bottom
+        bounds_left, bounds_right, bounds_bottom, bounds_top = self.bounds
+        # a map smaller than the view sits in its bottom left corner
+        left = max(bounds_left, min(left, bounds_right - self.width))
+        bottom = max(bounds_bottom, min(bottom, bounds_top - self.height))
+        return left, bottom
+
+    def jump_to(self, left, bottom):
+        """ Move the view straight to (left, bottom), no easing and no blending, e.g. on a respawn """
+        self.left, self.bottom = self._clamp(left, bottom)
+        self.target_left, self.target_bottom = self.left, self.bottom
+        self.previous = (self.left, self.bottom)
+
+    def follow(self, sprite):
+        """ Move a step towards keeping sprite inside the dead zone """
+        self.previous = (self.left, self.bottom)
+        margin_left, margin_right, margin_bottom, margin_top = self.margins
+
+        # move the target so the sprite is back inside the dead zone, one
+        # edge after the other, so if the sprite is wider than the dead
+        # zone the right and bottom edges win
+        left, bottom = self.target_left, self.target_bottom
+        if sprite.left < left + margin_left:
+            left = sprite.left - margin_left
+        if sprite.right > left + self.width - margin_right:
+            left = sprite.right - self.width + margin_right
+        if sprite.top > bottom + self.height - margin_top:
+            bottom = sprite.top - self.height + margin_top
+        if sprite.bottom < bottom + margin_bottom:
+            bottom = sprite.bottom - margin_bottom
+        self.target_left, self.target_bottom = self._clamp(left, bottom)
+
+        # ease towards it, stopping once it's less than a hundredth of a pixel away
+        rate = self.follow_rate
+        self.left += (self.target_left - self.left) * rate
+        self.bottom += (self.target_bottom - self.bottom) * rate
+        if abs(self.target_left - self.left) * self.pixel_scale < 0.01:
+            self.left = self.target_left
+        if abs(self.target_bottom - self.bottom) * self.pixel_scale < 0.01:
+            self.bottom = self.target_bottom
+
+    def _snap(self, value):
+        return math.floor(value * self.pixel_scale + 0.5) / self.pixel_scale
+
+    def view(self, alpha=1.0):
+        """ The snapped (left, bottom) alpha of the way from before the last follow() to now """
+        left = lerp(self.previous[0], self.left, alpha, self.width / 2)
+        bottom = lerp(self.previous[1], self.bottom, alpha, self.height / 2)
+        return self._snap(left), self._snap(bottom)
+
+    def apply(self, alpha=1.0):
+        """ Set arcade's viewport to view(alpha) if it moved, returns whether it did """
+        view = self.view(alpha)
+        if view == self.applied:
+            return False
+        self.applied = view
+        left, bottom = view
+        arcade.set_viewport(left, left + self.width, bottom, bottom + self.height)
+        self.viewport_updates += 1
+        return True
+
+    def visible_rect(self):
+        """ left, right, bottom, top of what the last apply() shows, for culling """
+        left, bottom = self.applied if self.applied is not None else self.view()
+        return left, left + self.width, bottom, bottom + self.height
+
+
+def map_bounds(my_map, scaling):
+    """ left, right, bottom, top of a tiled map's sprites, as generate_sprites places them """
+    cell_width = my_map.tilewidth * scaling
+    cell_height = my_map.tileheight * scaling
+    # column 0 is centered half a tile left of x = 0
+    return -cell_width, (my_map.width - 1) * cell_width, 0, my_map.height * cell_height
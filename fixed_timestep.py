@@ -0,0 +1,125 @@
+"""
+Fixed timestep game loop
+
+arcade calls update with however much time passed since the last
+frame. Stepping the game once per call ties game speed to frame rate,
+so instead the elapsed time is saved up and the game is stepped in
+fixed sized ticks. Whatever is left over, less than one tick, tells the
+renderer how far to blend between the last two ticks.
+"""
+
+
+def lerp(previous, current, alpha, max_jump=None):
+    """
+    Blend from previous to current. Jumps bigger than max_jump, like a
+    wrap around or a respawn, snap straight to current.
+    """
+    if max_jump is not None and abs(current - previous) > max_jump:
+        return current
+    return previous + (current - previous) * alpha
+
+
+class FixedTimestep:
+    """
+    Runs tick() tick_rate times per second of elapsed time.
+
+    Never runs more than max_ticks_per_frame ticks in one advance(), and
+    counts frame times over max_frame_time as max_frame_time. Time that
+    can't be caught up is dropped, so one slow frame can't leave the
+    game trying to catch up forever (the "spiral of death").
+    """
+
+    def __init__(self, tick, tick_rate=60, max_ticks_per_frame=5,
+                 max_frame_time=0.25):
+        self.tick = tick
+        self.tick_rate = tick_rate
+        self.dt = 1 / tick_rate
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.max_frame_time = max_frame_time
+
+        # time saved up that hasn't been ticked yet
+        self.accumulator = 0.0
+        self.ticks = 0
+        # seconds thrown away to stay out of the spiral of death
+        self.dropped_time = 0.0
+
+    @property
+    def alpha(self):
+        """ How far between the last tick and the next one we are, 0 to 1 """
+        return self.accumulator / self.dt
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, delta_time):
+        """ Add elapsed time and run the ticks it pays for """
+        if delta_time > self.max_frame_time:
+            self.dropped_time += delta_time - self.max_frame_time
+            delta_time = self.max_frame_time
+        self.accumulator += delta_time
+
+        ticks = 0
+        while self.accumulator >= self.dt:
+            if ticks == self.max_ticks_per_frame:
+                # can't keep up, keep only the part of a tick
+                backlog = self.accumulator - self.accumulator % self.dt
+                self.dropped_time += backlog
+                self.accumulator -= backlog
+                break
+            self.tick()
+            self.accumulator -= self.dt
+            ticks += 1
+
+        self.ticks += ticks
+        return ticks
+
+    def run(self, ticks):
+        """ Run ticks straight away, as fast as they go, e.g. headless """
+        for i in range(ticks):
+            self.tick()
+        self.ticks += ticks
+
+
+class SpriteInterpolator:
+    """
+    Remembers where sprites were before the last tick so drawing can
+    blend them towards where they are now.
+
+    capture() before each tick, blend() before drawing and restore()
+    after drawing, so the game logic only ever sees the real positions.
+    """
+
+    def __init__(self, max_jump=100):
+        self.max_jump = max_jump
+        # sprite -> (x, y, angle) before the last tick
+        self.previous = {}
+        # sprite -> (x, y, angle) to put back after drawing
+        self.saved = {}
+
+    def capture(self, sprites):
+        self.previous = {sprite: (sprite.center_x, sprite.center_y, sprite.angle)
+                         for sprite in sprites}
+
+    def forget(self, sprite):
+        """ Don't blend a sprite that was just (re)spawned """
+        self.previous.pop(sprite, None)
+
+    def blend(self, alpha):
+        max_jump = self.max_jump
+        saved = self.saved
+        for sprite, (x, y, angle) in self.previous.items():
+            if not sprite.sprite_lists:
+                # despawned since the last tick
+                continue
+            cur_x, cur_y = sprite.position
+            cur_angle = sprite.angle
+            saved[sprite] = (cur_x, cur_y, cur_angle)
+            sprite.position = (lerp(x, cur_x, alpha, max_jump),
+                               lerp(y, cur_y, alpha, max_jump))
+            sprite.angle = lerp(angle, cur_angle, alpha)
+
+    def restore(self):
+        for sprite, (x, y, angle) in self.saved.items():
+            sprite.position = (x, y)
+            sprite.angle = angle
+        self.saved = {}
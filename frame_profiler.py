@@ -0,0 +1,176 @@
+"""
+Frame profiler
+
+Named timers around the phases of update and draw, so a slow frame can
+be pinned on the part that was slow:
+
+    with self.profiler.section("collisions"):
+        ...
+    self.profiler.end_frame()
+
+Each section's time is added up over a frame, end_frame() files the
+totals, along with how long the whole frame took, into rolling windows
+of the last few hundred frames. stats() turns those into p50/p95/p99,
+which can be drawn over the game or exported as CSV or JSON.
+
+A disabled profiler hands every section() the same do-nothing context
+manager and end_frame() returns straight away, so the timers can stay
+in the game code for good.
+"""
+
+import csv
+import json
+import time
+from collections import deque
+
+
+class _NullSection:
+    """ What section() returns while profiling is off """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """ Adds the time spent inside it to its profiler's current frame """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class FrameProfiler:
+    """
+    Per-section and whole-frame times over the last window frames.
+
+    Frames are whatever happens between two end_frame() calls. A section
+    that didn't run in a frame counts as 0 for that frame.
+    """
+
+    # name the whole frame is filed under
+    FRAME = "frame"
+
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window
+        # section name -> _Section, reused every frame
+        self.sections = {}
+        # section name -> seconds so far this frame
+        self.current = {}
+        # section name -> deque of seconds per frame
+        self.samples = {}
+        self.frames = 0
+        self.last_frame_end = None
+
+        # what the overlay shows, only worked out every few frames
+        self.overlay_lines = []
+        self.overlay_refresh = 30
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+        self.current = {}
+        self.last_frame_end = None
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL_SECTION
+        section = self.sections.get(name)
+        if section is None:
+            section = self.sections[name] = _Section(self, name)
+        return section
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.last_frame_end is not None:
+            self.current[self.FRAME] = now - self.last_frame_end
+        self.last_frame_end = now
+
+        samples = self.samples
+        current = self.current
+        for name in current.keys() - samples.keys():
+            # pad with the frames it wasn't around for, so windows line up
+            samples[name] = deque([0.0] * min(self.frames, self.window),
+                                  maxlen=self.window)
+        for name, window in samples.items():
+            window.append(current.get(name, 0.0))
+        self.current = {}
+        self.frames += 1
+
+    def reset(self):
+        self.current = {}
+        self.samples = {}
+        self.frames = 0
+        self.last_frame_end = None
+        self.overlay_lines = []
+
+    def stats(self):
+        """ {name: {"p50", "p95", "p99", "mean", "max"}} in milliseconds """
+        stats = {}
+        for name, window in self.samples.items():
+            values = sorted(window)
+            if not values:
+                continue
+            last = len(values) - 1
+            stats[name] = {
+                "p50": values[int(last * 0.50)] * 1000,
+                "p95": values[int(last * 0.95)] * 1000,
+                "p99": values[int(last * 0.99)] * 1000,
+                "mean": sum(values) / len(values) * 1000,
+                "max": values[-1] * 1000,
+            }
+        return stats
+
+    def export(self, path):
+        """ Write stats() to path, JSON if it ends in .json, otherwise CSV """
+        stats = self.stats()
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"frames": self.frames, "window": self.window,
+                           "stats_ms": stats,
+                           "samples_s": {name: list(window)
+                                         for name, window in self.samples.items()}},
+                          file, indent=1)
+            return
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["section", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms"])
+            for name, row in sorted(stats.items()):
+                writer.writerow([name] + [f"{row[key]:.4f}"
+                                          for key in ("p50", "p95", "p99", "mean", "max")])
+
+    def draw_overlay(self, left, top, color=(255, 255, 0), font_size=10):
+        """ Draw the stats as text, top left corner at (left, top) """
+        import arcade
+
+        if self.frames % self.overlay_refresh == 0 or not self.overlay_lines:
+            lines = ["section         p50    p95    p99 ms"]
+            stats = self.stats()
+            # slowest first, the whole frame on top
+            for name in sorted(stats, key=lambda name: (name != self.FRAME,
+                                                        -stats[name]["p95"])):
+                row = stats[name]
+                lines.append(f"{name[:14]:<14}{row['p50']:>6.2f} {row['p95']:>6.2f} {row['p99']:>6.2f}")
+            self.overlay_lines = lines
+
+        y = top
+        for line in self.overlay_lines:
+            y -= font_size + 4
+            arcade.draw_text(line, left, y, color, font_size, font_name=("Courier New", "Courier", "monospace"))
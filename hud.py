@@ -0,0 +1,169 @@
+"""
+Heads-up display
+
+arcade.draw_text works out a cache key, looks the label up, moves it and
+draws it on its own every time it is called, and renders a whole new
+texture for every string it hasn't seen before. That is a lot of work
+for a score that changes a few times a minute.
+
+A Hud keeps one sprite per piece of text. Game code tells it when a
+value changes with set(), only texts whose value actually changed get
+their texture rendered again, and draw() puts all of them on screen
+with one SpriteList draw.
+
+    hud = Hud()
+    hud.add("score", "Score: {}", 10, 70)
+    hud.set("score", 12)
+    hud.draw()
+"""
+
+import itertools
+
+import arcade
+import PIL.Image
+import PIL.ImageDraw
+import PIL.ImageFont
+from arcade.text import DEFAULT_FONT_NAMES
+
+# (font names, size) -> PIL font, fonts are slow to look up
+_fonts = {}
+
+
+def _find_font(font_name, size):
+    key = (font_name, size)
+    font = _fonts.get(key)
+    if font is not None:
+        return font
+
+    if isinstance(font_name, str):
+        font_name = font_name,
+    names = itertools.chain(*[(name, f"{name}.ttf") for name in font_name],
+                            DEFAULT_FONT_NAMES)
+    for name in names:
+        try:
+            font = PIL.ImageFont.truetype(name, size)
+        except OSError:
+            continue
+        _fonts[key] = font
+        return font
+    raise RuntimeError("Unable to find a default font on this system. Please specify an available font.")
+
+
+def render_text(text, color, font_size=12, font_name=('calibri', 'arial')):
+    """
+    An image of text, sized and anti-aliased the way arcade.draw_text
+    does it: drawn at twice the size and shrunk down.
+    """
+    font_size = int(font_size * 1.25 * 2)
+    font = _find_font(font_name, font_size)
+
+    draw = PIL.ImageDraw.Draw(PIL.Image.new("RGBA", (1, 1)))
+    left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font)
+    # extra room for the letters that drop below the baseline
+    width = max(1, right)
+    height = max(1, bottom) + int(font_size * 0.25)
+
+    image = PIL.Image.new("RGBA", (width, height))
+    draw = PIL.ImageDraw.Draw(image)
+    draw.multiline_text((0, 0), text, tuple(color), font=font)
+    return image.resize((max(1, width // 2), max(1, height // 2)),
+                        resample=PIL.Image.LANCZOS)
+
+
+class HudText:
+    """
+    One piece of HUD text, template.format(value) drawn with its bottom
+    left corner at (x, y) relative to the Hud's origin.
+    """
+
+    def __init__(self, template, x, y, color=arcade.color.WHITE, font_size=12,
+                 font_name=('calibri', 'arial'), value=None):
+        self.template = template
+        self.x = x
+        self.y = y
+        self.color = color
+        self.font_size = font_size
+        self.font_name = font_name
+        self.value = value
+        self.text = None
+
+        self.sprite = arcade.Sprite()
+        self.dirty = True
+        # how many times the texture has been rendered
+        self.rebuilds = 0
+
+    def set(self, value):
+        """ Change the value, returns True if that means a rebuild """
+        if value == self.value:
+            return False
+        self.value = value
+        self.dirty = True
+        return True
+
+    def rebuild(self):
+        self.dirty = False
+        text = self.template.format(self.value)
+        if text == self.text:
+            # e.g. a float that rounds to the same thing
+            return
+        self.text = text
+        image = render_text(text, self.color, self.font_size, self.font_name)
+        self.sprite.texture = arcade.Texture(f"hud:{text}:{self.color}:{self.font_size}:{self.font_name}", image)
+        self.rebuilds += 1
+
+    def place(self, origin_x, origin_y):
+        sprite = self.sprite
+        sprite.center_x = origin_x + self.x + sprite.width / 2
+        sprite.center_y = origin_y + self.y + sprite.height / 2
+
+
+class Hud:
+    """
+    A set of named HudTexts, drawn together.
+
+    The origin is where (0, 0) for the texts is in world coordinates,
+    move it along with the viewport to keep the HUD on screen.
+    """
+
+    def __init__(self):
+        self.texts = {}
+        self.sprite_list = arcade.SpriteList()
+        self.origin = (0, 0)
+        # names of texts that need rendering again before the next draw
+        self.dirty = set()
+
+    def add(self, name, template, x, y, color=arcade.color.WHITE, font_size=12,
+            font_name=('calibri', 'arial'), value=None):
+        text = HudText(template, x, y, color, font_size, font_name, value)
+        self.texts[name] = text
+        self.dirty.add(name)
+        return text
+
+    def set(self, name, value):
+        if self.texts[name].set(value):
+            self.dirty.add(name)
+
+    def move_to(self, x, y):
+        """ Put the HUD's origin at (x, y) """
+        if (x, y) == self.origin:
+            return
+        self.origin = (x, y)
+        for text in self.texts.values():
+            if text.sprite.sprite_lists:
+                text.place(x, y)
+
+    def draw(self):
+        origin_x, origin_y = self.origin
+        for name, text in self.texts.items():
+            if name not in self.dirty:
+                continue
+            text.rebuild()
+            if not text.sprite.sprite_lists:
+                # first time it has something to show
+                self.sprite_list.append(text.sprite)
+            text.place(origin_x, origin_y)
+        self.dirty.clear()
+        self.sprite_list.draw()
+
+    def stats(self):
+        return {name: text.rebuilds for name, text in self.texts.items()}
@@ -0,0 +1,127 @@
+"""
+Input recording and replay
+
+Both games run on fixed ticks (see fixed_timestep.py), and the only
+thing from outside that changes how a game plays out is the keyboard.
+So a game can be played again exactly from the keys that were pressed
+and the tick each one arrived before, plus the seed for games that draw
+random numbers.
+
+InputRecorder writes those to a small binary file as they happen.
+InputReplayer reads one back and hands the keys to the game's own
+on_key_press/on_key_release at the same ticks, either in a normal
+window at normal speed or as fast as the ticks will run.
+
+File layout, little endian:
+    header  "INPT", version (H), tick rate (H), seed (q, -1 for none),
+            ticks played (I), game name (16s)
+    events  tick (I), key symbol (I), modifiers (H), pressed (B)
+"""
+
+import struct
+import time
+
+MAGIC = b"INPT"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHqI16s")
+EVENT = struct.Struct("<IIHB")
+
+
+class InputRecorder:
+    """
+    Writes key presses and releases to a file as they happen.
+
+    tick is how many ticks the game had run when the key came in, so it
+    takes effect during tick number tick + 1. Call close() with the
+    number of ticks played when the game ends.
+    """
+
+    def __init__(self, path, game, seed=None, tick_rate=60):
+        self.path = path
+        self.game = game
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.events = 0
+
+        self.file = open(path, "wb")
+        self._write_header(0)
+
+    def _write_header(self, ticks):
+        seed = -1 if self.seed is None else self.seed
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.tick_rate, seed, ticks,
+                                    self.game.encode()[:16]))
+
+    def record(self, tick, symbol, modifiers, pressed):
+        self.file.write(EVENT.pack(tick, symbol, modifiers & 0xFFFF, pressed))
+        self.events += 1
+
+    def close(self, ticks):
+        """ Fill in how long the game ran and finish the file """
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self._write_header(ticks)
+        self.file.close()
+
+
+class InputReplayer:
+    """
+    Plays a recording back into a game.
+
+    The game calls feed() at the start of every tick, which calls its
+    key handlers for the keys recorded before that tick. attach() stops
+    the real keyboard getting in the way while a window is replaying,
+    apart from the keys it is told to let through.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, self.tick_rate, seed, self.ticks, game = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an input recording")
+        self.seed = None if seed == -1 else seed
+        self.game = game.rstrip(b"\0").decode()
+
+        # tick -> [(symbol, modifiers, pressed)] for the keys before that tick
+        self.events = {}
+        for tick, symbol, modifiers, pressed in EVENT.iter_unpack(data[HEADER.size:]):
+            self.events.setdefault(tick, []).append((symbol, modifiers, bool(pressed)))
+
+    def feed(self, tick, window):
+        """ Hand the window the keys recorded after tick ticks """
+        for symbol, modifiers, pressed in self.events.get(tick, ()):
+            if pressed:
+                window.on_key_press(symbol, modifiers)
+            else:
+                window.on_key_release(symbol, modifiers)
+
+    def attach(self, window, keys_through=()):
+        """
+        Swallow live key events, the recording does the typing. Keys in
+        keys_through that don't play the game, like a profiler toggle,
+        still reach the window.
+        """
+        def swallow(symbol, modifiers):
+            # True stops the event, None lets the window have it
+            return None if symbol in keys_through else True
+
+        window.push_handlers(on_key_press=swallow, on_key_release=swallow)
+
+    def done(self, tick):
+        return tick >= self.ticks
+
+    def fast_forward(self, tick, ticks=None):
+        """
+        Call tick() back to back, no drawing and no waiting, for the
+        length of the recording (or ticks). Returns ticks per second.
+        """
+        if ticks is None:
+            ticks = self.ticks
+        start = time.perf_counter()
+        for i in range(ticks):
+            tick()
+        elapsed = time.perf_counter() - start
+        return ticks / elapsed if elapsed else float("inf")
@@ -0,0 +1,140 @@
+"""
+Baked static layers
+
+Background and foreground tiles never move, yet each one is a sprite
+that gets drawn every frame. A BakedLayer paints each chunk's tiles
+into one image when the level loads and draws that instead, a handful
+of big textured quads in place of every tile.
+
+The painting is done on the CPU with PIL by rasterize(), so it needs
+no window, runs fine on the level streamer's thread and can be checked
+headless. Pass a different rasterize to BakedLayer to paint some other
+way, it gets the same arguments.
+
+Images are painted at pixel_scale screen pixels per world unit. When
+the window is resized that changes, and set_pixel_scale() paints the
+chunks again at the new size so they stay sharp.
+
+Sprites are painted as their texture stretched over their bounding
+box, so rotation, color and alpha are not carried over. That's fine
+for tiles.
+"""
+
+import itertools
+
+import arcade
+import PIL.Image
+
+from tile_chunks import ChunkedSpriteList, chunk_key
+
+# baked textures need names no other texture has, arcade tells textures apart by name
+_texture_names = (f"baked:{number}" for number in itertools.count())
+
+
+def _paste(canvas, image, x, y):
+    """ Alpha blend image onto canvas with its top left at (x, y), clipped to the canvas """
+    left = max(0, -x)
+    top = max(0, -y)
+    right = min(image.width, canvas.width - x)
+    bottom = min(image.height, canvas.height - y)
+    if right <= left or bottom <= top:
+        return
+    if (left, top, right, bottom) != (0, 0, image.width, image.height):
+        image = image.crop((left, top, right, bottom))
+    canvas.alpha_composite(image, (x + left, y + top))
+
+
+def _extent(sprite):
+    """ left, right, bottom, top of the sprite's whole texture, left and so on only cover the hit box """
+    half_width = sprite.width / 2
+    half_height = sprite.height / 2
+    return (sprite.center_x - half_width, sprite.center_x + half_width,
+            sprite.center_y - half_height, sprite.center_y + half_height)
+
+
+def rasterize(sprites, left, bottom, width, height, pixel_scale=1.0):
+    """
+    An RGBA image of sprites drawn in the world rectangle starting at
+    (left, bottom), pixel_scale pixels per world unit, later sprites on top
+    """
+    top = bottom + height
+    canvas = PIL.Image.new("RGBA", (max(1, round(width * pixel_scale)),
+                                    max(1, round(height * pixel_scale))))
+    # tiles share textures, so only resize each one once
+    resized = {}
+    for sprite in sprites:
+        size = (max(1, round(sprite.width * pixel_scale)),
+                max(1, round(sprite.height * pixel_scale)))
+        key = (sprite.texture.name, size)
+        image = resized.get(key)
+        if image is None:
+            image = sprite.texture.image.convert("RGBA")
+            if image.size != size:
+                image = image.resize(size, resample=PIL.Image.LANCZOS)
+            resized[key] = image
+        sprite_left, sprite_right, sprite_bottom, sprite_top = _extent(sprite)
+        _paste(canvas, image,
+               round((sprite_left - left) * pixel_scale),
+               round((top - sprite_top) * pixel_scale))
+    return canvas
+
+
+class BakedLayer:
+    """
+    A static layer's sprites painted into one quad per chunk_size
+    square chunk. The original sprite list is left alone.
+    """
+
+    def __init__(self, sprite_list, chunk_size, pixel_scale=1.0, rasterize=rasterize):
+        self.sprite_list = sprite_list
+        self.chunk_size = chunk_size
+        self.rasterize = rasterize
+        # (column, row) -> the sprites centered in that chunk
+        self.groups = {}
+        for sprite in sprite_list:
+            self.groups.setdefault(chunk_key(sprite, chunk_size), []).append(sprite)
+
+        self.pixel_scale = None
+        # ChunkedSpriteList of the baked quads
+        self.quads = None
+        # how many times the layer has been painted
+        self.bakes = 0
+        self.set_pixel_scale(pixel_scale)
+
+    def set_pixel_scale(self, pixel_scale):
+        """ Paint the chunks again if they were painted at a different scale """
+        if pixel_scale != self.pixel_scale:
+            self.bake(pixel_scale)
+
+    def invalidate(self):
+        """ Paint the chunks again, e.g. after the tiles were changed """
+        self.bake(self.pixel_scale)
+
+    def bake(self, pixel_scale):
+        self.pixel_scale = pixel_scale
+        quads = arcade.SpriteList(is_static=True)
+        margin = 0
+        for sprites in self.groups.values():
+            lefts, rights, bottoms, tops = zip(*map(_extent, sprites))
+            left, right, bottom, top = min(lefts), max(rights), min(bottoms), max(tops)
+            image = self.rasterize(sprites, left, bottom, right - left, top - bottom, pixel_scale)
+
+            quad = arcade.Sprite()
+            quad.texture = arcade.Texture(next(_texture_names), image)
+            # back to world size, the image has pixel_scale pixels per unit
+            quad.scale = (right - left) / image.width
+            quad.center_x = (left + right) / 2
+            quad.center_y = (bottom + top) / 2
+            quads.append(quad)
+            margin = max(margin, quad.width / 2, quad.height / 2)
+        self.quads = ChunkedSpriteList(quads, self.chunk_size, margin)
+        self.bakes += 1
+
+    def __len__(self):
+        return len(self.quads)
+
+    def draw(self, left=None, right=None, bottom=None, top=None):
+        if left is None:
+            self.quads.sprite_list.draw()
+        else:
+            self.quads.draw(left, right, bottom, top)
@@ -0,0 +1,140 @@
+"""
+Layer manager
+
+A level is a stack of named layers: the sprite lists made from the
+map's layers plus whatever the game adds in between, like the player.
+A LayerManager builds each map layer once, keeps them in the order they
+are drawn, and draws the lot in one pass:
+
+    layers = LayerManager()
+    layers.build(my_map, "Background", TILE_SCALING, z=0)
+    layers.build(my_map, "Platforms", TILE_SCALING, z=1)
+    layers.add("Player", player_list, z=2)
+    ...
+    layers["Platforms"]     # the sprite list, for physics and collisions
+    layers.draw()
+
+Layers with a lower z are drawn first, layers with the same z in the
+order they were added.
+
+Map layers built with a chunk_size are split into chunks (see
+tile_chunks), and when draw() is given the view only the chunks near it
+are drawn. Layers that never change can also be baked, each chunk
+painted into one texture when the level loads (see layer_baker).
+"""
+
+import time
+
+import texture_atlas
+from layer_baker import BakedLayer
+from tile_chunks import ChunkedSpriteList
+
+
+class Layer:
+    """ One named sprite list in a LayerManager """
+
+    def __init__(self, name, sprite_list, z, build_time=0.0):
+        self.name = name
+        self.sprite_list = sprite_list
+        self.z = z
+        # seconds spent making sprite_list, 0 for lists made elsewhere
+        self.build_time = build_time
+        # ChunkedSpriteList of sprite_list, if the layer is chunked
+        self.chunks = None
+        # BakedLayer of sprite_list, drawn instead of it if the layer is baked
+        self.baked = None
+
+    def draw(self, view=None):
+        if self.baked is not None:
+            self.baked.draw(*(view or ()))
+        elif self.chunks is None or view is None:
+            self.sprite_list.draw()
+        else:
+            self.chunks.draw(*view)
+
+
+class LayerManager:
+    """
+    Owns a level's Layers, by name and in drawing order. Lower z draws
+    first, so a game that gives each layer its index in its DRAW_ORDER
+    as z draws them in that order.
+    """
+
+    def __init__(self):
+        # name -> Layer
+        self.layers = {}
+        # the Layers, in drawing order
+        self.order = []
+
+    def build(self, my_map, name, scaling, z, chunk_size=None, margin=0,
+              bake=False, pixel_scale=1.0, is_static=True):
+        """
+        Make the sprites for the map layer called name, returns their
+        sprite list. With a chunk_size, the layer is also split into
+        chunks that many pixels square, is_static ones unless sprites are
+        taken out of the layer while playing, and with bake those chunks
+        are painted into textures at pixel_scale pixels per world unit.
+        """
+        start = time.perf_counter()
+        sprite_list = texture_atlas.generate_sprites(my_map, name, scaling)
+        layer = Layer(name, sprite_list, z)
+        if bake:
+            if chunk_size is None:
+                raise ValueError("Baking a layer needs a chunk_size")
+            layer.baked = BakedLayer(sprite_list, chunk_size, pixel_scale)
+        elif chunk_size is not None:
+            layer.chunks = ChunkedSpriteList(sprite_list, chunk_size, margin, is_static)
+        layer.build_time = time.perf_counter() - start
+        self._insert(layer)
+        return sprite_list
+
+    def add(self, name, sprite_list, z):
+        """ Put a sprite list made somewhere else into the stack """
+        self._insert(Layer(name, sprite_list, z))
+        return sprite_list
+
+    def _insert(self, layer):
+        if layer.name in self.layers:
+            raise ValueError(f"There is already a layer called {layer.name!r}")
+        self.layers[layer.name] = layer
+        # insertion order is kept for equal z, sort is stable
+        self.order.append(layer)
+        self.order.sort(key=lambda layer: layer.z)
+
+    def __getitem__(self, name):
+        return self.layers[name].sprite_list
+
+    def __contains__(self, name):
+        return name in self.layers
+
+    def draw(self, left=None, right=None, bottom=None, top=None):
+        """ Draw every layer, or for chunked layers the part near the view if one is given """
+        view = None if left is None else (left, right, bottom, top)
+        for layer in self.order:
+            layer.draw(view)
+
+    def set_pixel_scale(self, pixel_scale):
+        """ Paint the baked layers again if the screen's pixels per world unit changed """
+        for layer in self.order:
+            if layer.baked is not None:
+                layer.baked.set_pixel_scale(pixel_scale)
+
+    def stats(self):
+        """
+        {name: {"z", "sprites", "build_ms"}} in drawing order, chunked
+        layers also have "chunks" and how many were "visible" last draw,
+        baked ones the number of "quads" and how many "bakes" so far
+        """
+        stats = {}
+        for layer in self.order:
+            row = stats[layer.name] = {"z": layer.z, "sprites": len(layer.sprite_list),
+                                       "build_ms": layer.build_time * 1000}
+            if layer.chunks is not None:
+                row["chunks"] = len(layer.chunks.chunks)
+                row["visible"] = layer.chunks.visible
+            if layer.baked is not None:
+                row["chunks"] = len(layer.baked.quads.chunks)
+                row["visible"] = layer.baked.quads.visible
+                row["quads"] = len(layer.baked)
+                row["bakes"] = layer.baked.bakes
+        return stats
@@ -0,0 +1,263 @@
+"""
+Compiled level cache
+
+arcade.read_tiled_map parses the XML, base64 and zlib decodes every
+layer and builds a Tile for every image in the tileset, every time a
+level is set up. load_level() does that once per .tmx file and saves
+the result in .level_cache/ next to it: the map size, background color,
+tileset table and each layer's tile ids as a flat array. Loading after
+that is a memory map and a walk over the tileset table.
+
+A cache is used while the .tmx file's mtime and size match the ones it
+was built from. If they don't, the .tmx file is hashed, and the cache is
+only rebuilt when the contents really changed.
+
+load_level() returns the same arcade TiledMap that read_tiled_map does,
+so arcade.generate_sprites works on it, except that the per-tile
+GridLocation objects in map.layers are left out. layers_int_data rows
+are views straight into the memory map. map.layer_arrays has each layer
+as one flat array, row after row.
+
+File layout, native byte order:
+    header  "LVL1", version, byte order, source mtime_ns, source size,
+            source sha256, scaling, width, height, tile width and
+            height, background color, tile count, layer count
+    strings version, orientation, renderorder, nextobjectid
+    tiles   id, width, height, source, hit box points
+    layers  name, rows, columns, then rows * columns uint32 tile ids,
+            starting on a 4 byte boundary
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import time
+import warnings
+from array import array
+
+import arcade
+from arcade.read_tiled_map import Tile, TiledMap
+
+MAGIC = b"LVL1"
+VERSION = 1
+CACHE_DIR = ".level_cache"
+
+HEADER = struct.Struct("=4sHBxqq32sdIIII?3BII")
+TILE = struct.Struct("=III")
+LAYER = struct.Struct("=II")
+LENGTH = struct.Struct("=H")
+POINT = struct.Struct("=ii")
+
+BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+def cache_path(tmx_file, scaling):
+    directory, name = os.path.split(os.path.abspath(tmx_file))
+    return os.path.join(directory, CACHE_DIR, f"{name}.{scaling:g}.lvl")
+
+
+def _file_hash(path):
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).digest()
+
+
+def _pack_string(text):
+    data = str(text).encode()
+    return LENGTH.pack(len(data)) + data
+
+
+def compile_level(tmx_file, scaling=1, path=None):
+    """ Read tmx_file with arcade and write its cache, returns the cache path """
+    if path is None:
+        path = cache_path(tmx_file, scaling)
+    stat = os.stat(tmx_file)
+    source_hash = _file_hash(tmx_file)
+
+    with warnings.catch_warnings():
+        # read_tiled_map is deprecated, but it's what the games were built on
+        warnings.simplefilter("ignore", DeprecationWarning)
+        my_map = arcade.read_tiled_map(tmx_file, scaling)
+
+    background = my_map.backgroundcolor or (0, 0, 0)
+    data = bytearray(HEADER.pack(
+        MAGIC, VERSION, BYTE_ORDER, stat.st_mtime_ns, stat.st_size, source_hash,
+        scaling, my_map.width, my_map.height, my_map.tilewidth, my_map.tileheight,
+        my_map.backgroundcolor is not None, *background,
+        len(my_map.global_tile_set), len(my_map.layers_int_data)))
+
+    for text in (my_map.version, my_map.orientation, my_map.renderorder, my_map.nextobjectid):
+        data += _pack_string(text)
+
+    for key, tile in my_map.global_tile_set.items():
+        data += TILE.pack(int(key), tile.width, tile.height)
+        data += _pack_string(tile.source)
+        points = tile.points or []
+        data += LENGTH.pack(len(points))
+        for x, y in points:
+            data += POINT.pack(x, y)
+
+    for name, rows in my_map.layers_int_data.items():
+        data += _pack_string(name)
+        columns = len(rows[0]) if rows else 0
+        data += LAYER.pack(len(rows), columns)
+        data += bytes(-len(data) % 4)
+        for row in rows:
+            data += array('I', row).tobytes()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write then rename, so a half written cache is never picked up
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+    return path
+
+
+class _Reader:
+    """ Walks through a memory mapped cache """
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.offset = 0
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.buffer, self.offset)
+        self.offset += layout.size
+        return values
+
+    def string(self):
+        length, = self.unpack(LENGTH)
+        text = bytes(self.buffer[self.offset:self.offset + length]).decode()
+        self.offset += length
+        return text
+
+
+def _read_header(path):
+    try:
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size:
+        return None
+    return HEADER.unpack(header)
+
+
+def _is_fresh(tmx_file, path):
+    """
+    Whether the cache at path was built from tmx_file as it is now.
+    A cache whose mtime is out of date but whose hash still matches is
+    brought up to date in place.
+    """
+    header = _read_header(path)
+    if header is None:
+        return False
+    magic, version, byte_order, mtime_ns, size, source_hash = header[:6]
+    if magic != MAGIC or version != VERSION or byte_order != BYTE_ORDER:
+        return False
+
+    stat = os.stat(tmx_file)
+    if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+        return True
+    if size != stat.st_size or _file_hash(tmx_file) != source_hash:
+        return False
+
+    # touched but not changed
+    with open(path, "r+b") as file:
+        file.seek(8)
+        file.write(struct.pack("=q", stat.st_mtime_ns))
+    return True
+
+
+def read_level(path):
+    """ Memory map a compiled level into an arcade TiledMap """
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    reader = _Reader(view)
+
+    (magic, version, byte_order, mtime_ns, size, source_hash, scaling,
+     width, height, tilewidth, tileheight, has_background, red, green, blue,
+     tile_count, layer_count) = reader.unpack(HEADER)
+
+    my_map = TiledMap()
+    my_map.width = width
+    my_map.height = height
+    my_map.tilewidth = tilewidth
+    my_map.tileheight = tileheight
+    if has_background:
+        my_map.backgroundcolor = (red, green, blue)
+    my_map.version = reader.string()
+    my_map.orientation = reader.string()
+    my_map.renderorder = reader.string()
+    my_map.nextobjectid = reader.string()
+
+    for i in range(tile_count):
+        key, tile_width, tile_height = reader.unpack(TILE)
+        tile = Tile()
+        tile.local_id = str(key - 1)
+        tile.width = tile_width
+        tile.height = tile_height
+        tile.source = reader.string()
+        point_count, = reader.unpack(LENGTH)
+        if point_count:
+            tile.points = [list(reader.unpack(POINT)) for j in range(point_count)]
+        my_map.global_tile_set[str(key)] = tile
+
+    my_map.layer_arrays = {}
+    for i in range(layer_count):
+        name = reader.string()
+        rows, columns = reader.unpack(LAYER)
+        reader.offset += -reader.offset % 4
+        end = reader.offset + rows * columns * 4
+        tiles = view[reader.offset:end].cast('I')
+        reader.offset = end
+        my_map.layer_arrays[name] = tiles
+        my_map.layers_int_data[name] = [tiles[row * columns:(row + 1) * columns]
+                                        for row in range(rows)]
+
+    # keep the memory map open for as long as the map is around
+    my_map.cache_buffer = buffer
+    return my_map
+
+
+def load_level(tmx_file, scaling=1):
+    """
+    read_tiled_map(tmx_file, scaling), from the cache when there is an
+    up to date one, otherwise building it first
+    """
+    path = cache_path(tmx_file, scaling)
+    if not _is_fresh(tmx_file, path):
+        compile_level(tmx_file, scaling, path)
+    return read_level(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile .tmx levels and time loading them")
+    parser.add_argument("tmx_files", nargs="+")
+    parser.add_argument("--scaling", type=float, default=0.5)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", DeprecationWarning)
+    for tmx_file in args.tmx_files:
+        start = time.perf_counter()
+        compile_level(tmx_file, args.scaling)
+        compiled = time.perf_counter() - start
+
+        start = time.perf_counter()
+        arcade.read_tiled_map(tmx_file, args.scaling)
+        parsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        load_level(tmx_file, args.scaling)
+        loaded = time.perf_counter() - start
+
+        print(f"{tmx_file}: compiled in {compiled * 1000:.1f}ms, "
+              f"read_tiled_map {parsed * 1000:.1f}ms, load_level {loaded * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Level streaming
+
+Building a level means reading the map and turning every layer into
+sprites, which is too slow to do between two frames without a visible
+hitch. A LevelStreamer builds the next level on a worker thread while
+the current one is being played:
+
+    streamer = LevelStreamer(build_level)
+    ...
+    if player_is_far_enough_in:
+        streamer.prefetch(level + 1)
+    ...
+    if player_is_at_the_end:
+        built = streamer.take(level + 1)
+
+take() hands back the prebuilt level straight away if it is ready. If
+it is still being built it waits for it, and if it was never asked for
+it builds it there and then, so the game never has to care which.
+
+Whatever build() makes must not need the GL context, which is fine for
+arcade sprites and sprite lists until they are first drawn. A thread
+rather than a process, since sprites can't be sent between processes.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LevelStreamer:
+    """ Builds levels with build(level) ahead of time, one at a time """
+
+    def __init__(self, build):
+        self.build = build
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level")
+        # level -> Future of whatever build made of it
+        self.pending = {}
+
+        # how take() went: ready in time, waited for, or built on the spot
+        self.ready = 0
+        self.waited = 0
+        self.missed = 0
+        # seconds the game spent stuck in take()
+        self.stalled = 0.0
+
+    def prefetch(self, level):
+        """ Start building level, unless it already is """
+        if level not in self.pending:
+            self.pending[level] = self.executor.submit(self.build, level)
+
+    def is_ready(self, level):
+        future = self.pending.get(level)
+        return future is not None and future.done()
+
+    def take(self, level):
+        """ The built level, however long that takes. Errors from the build come out here. """
+        start = time.perf_counter()
+        future = self.pending.pop(level, None)
+        if future is None:
+            self.missed += 1
+            built = self.build(level)
+        else:
+            if future.done():
+                self.ready += 1
+            else:
+                self.waited += 1
+            built = future.result()
+        self.stalled += time.perf_counter() - start
+        return built
+
+    def cancel(self):
+        """ Drop everything prefetched, e.g. when starting over """
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+    def stats(self):
+        return {"ready": self.ready, "waited": self.waited, "missed": self.missed,
+                "stalled_ms": self.stalled * 1000}
@@ -0,0 +1,168 @@
+"""
+Projectile field
+
+Bullets used to move themselves one at a time, check four hard coded
+bounds each in Python and then take themselves out of every list they
+were in, a linear search each time. With a fast firing weapon that was
+most of the tick.
+
+A ProjectileField keeps every projectile's position and velocity in
+flat NumPy arrays like AsteroidField does for the rocks. step() moves
+them all at once, finds the ones that left the limits with one mask and
+drops those by moving the last slot into each hole.
+
+The projectiles themselves, the world's Bullet bodies or a window's
+bullet sprites, are only a view of the arrays. sync() and sync_all()
+copy the positions over when something needs them. Projectiles don't
+turn, so how far each one's hit box reaches from its center is worked
+out once, and boxes() hands out every hit box for collision queries
+without touching the projectiles at all.
+"""
+
+import numpy as np
+
+
+class ProjectileField:
+    """
+    Structure-of-arrays store for projectiles that fly in a straight line
+    until they leave the limits.
+
+    Slot i of every array belongs to self.items[i]. Slots are packed,
+    removing a projectile moves the last one into its place.
+    """
+
+    # per-projectile arrays and their types
+    ARRAYS = (('x', np.float64), ('y', np.float64),
+              ('change_x', np.float64), ('change_y', np.float64),
+              # how far the hit box reaches from the center
+              ('reach_left', np.float64), ('reach_right', np.float64),
+              ('reach_bottom', np.float64), ('reach_top', np.float64))
+
+    def __init__(self, left_limit, right_limit, bottom_limit, top_limit,
+                 capacity=64):
+        # past these a projectile is gone
+        self.left_limit = left_limit
+        self.right_limit = right_limit
+        self.bottom_limit = bottom_limit
+        self.top_limit = top_limit
+
+        self.count = 0
+        self.capacity = 0
+        self.items = []
+        for name, dtype in self.ARRAYS:
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """ Resize the arrays, keeping the live slots """
+        for name, dtype in self.ARRAYS:
+            array = np.zeros(capacity, dtype=dtype)
+            array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def add(self, item):
+        """
+        Take over a projectile that is already on its way.
+        Its position, change_x/y and hit box are copied into the arrays,
+        it keeps its angle, which doesn't change in flight, and it is up
+        to its own update() to stop moving itself.
+        """
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+
+        i = self.count
+        self.x[i] = item.center_x
+        self.y[i] = item.center_y
+        self.change_x[i] = item.change_x
+        self.change_y[i] = item.change_y
+        self.reach_left[i] = item.left - item.center_x
+        self.reach_right[i] = item.right - item.center_x
+        self.reach_bottom[i] = item.bottom - item.center_y
+        self.reach_top[i] = item.top - item.center_y
+
+        item.field_index = i
+        self.items.append(item)
+        self.count += 1
+
+    def _remove_slot(self, i):
+        """ Empty slot i by moving the last slot into it """
+        item = self.items[i]
+        last = self.count - 1
+        if i != last:
+            for name, _ in self.ARRAYS:
+                array = getattr(self, name)
+                array[i] = array[last]
+            moved = self.items[last]
+            self.items[i] = moved
+            moved.field_index = i
+        self.items.pop()
+        item.field_index = None
+        self.count = last
+
+    def remove(self, item):
+        """ Drop a projectile, e.g. one that hit something. Does nothing if it's already gone """
+        if item.field_index is not None:
+            self._remove_slot(item.field_index)
+
+    def clear(self):
+        for item in self.items:
+            item.field_index = None
+        self.items = []
+        self.count = 0
+
+    def step(self):
+        """
+        Move every projectile one frame and drop the ones that went past
+        the limits. Returns those, in the order they were in the field.
+        """
+        n = self.count
+        if not n:
+            # most ticks nothing is flying, skip the fixed cost of numpy
+            return []
+        x = self.x[:n]
+        y = self.y[:n]
+        x += self.change_x[:n]
+        y += self.change_y[:n]
+
+        gone = np.flatnonzero((x < self.left_limit) | (x > self.right_limit) |
+                              (y > self.top_limit) | (y < self.bottom_limit)).tolist()
+        if not gone:
+            return []
+        expired = [self.items[i] for i in gone]
+        # from the back, so the last slot moved into each hole is one that stays
+        for i in reversed(gone):
+            self._remove_slot(i)
+        return expired
+
+    def positions(self):
+        """ (projectile, x, y) for every projectile """
+        n = self.count
+        return zip(self.items, self.x[:n].tolist(), self.y[:n].tolist())
+
+    def sync(self, item):
+        """ Copy one projectile's position onto it """
+        i = item.field_index
+        item.position = (float(self.x[i]), float(self.y[i]))
+
+    def sync_all(self):
+        for item, x, y in self.positions():
+            item.position = (x, y)
+
+    def boxes(self):
+        """
+        (projectile, left, right, bottom, top) of every projectile's hit
+        box where it is now, the same box its left/right/bottom/top would
+        give once synced. Safe to remove projectiles while going through it.
+        """
+        n = self.count
+        if not n:
+            return ()
+        x = self.x[:n]
+        y = self.y[:n]
+        return zip(list(self.items),
+                   (x + self.reach_left[:n]).tolist(), (x + self.reach_right[:n]).tolist(),
+                   (y + self.reach_bottom[:n]).tolist(), (y + self.reach_top[:n]).tolist())
@@ -0,0 +1,64 @@
+"""
+Seeded random number streams
+
+A game that draws everything from the global random module can't be
+played back: anything else touching random (another game in the same
+process, a bot picking inputs, a library) shifts every number after it.
+RandomStreams gives each game its own named random.Random streams, all
+derived from one seed, so the same seed and the same inputs always give
+the same game, and drawing more from one stream (say, a tier that splits
+into more fragments) leaves the numbers the others hand out unchanged.
+"""
+
+import random
+
+
+class RandomStreams:
+    """
+    Named random.Random streams derived from one seed.
+
+    The streams in NAMES are attributes (streams.spawn), any other name
+    is made the first time get() is asked for it. With no seed a random
+    one is picked and kept in self.seed, so the game can be played again.
+    """
+
+    # the streams the games use
+    #   spawn: where new games put their asteroids, and how they move
+    #   split: how the fragments of a hit asteroid move
+    #   texture: which image each new asteroid gets
+    NAMES = ("spawn", "split", "texture")
+
+    def __init__(self, seed=None):
+        self.streams = {}
+        self.seed = None
+        self.reseed(seed)
+        for name in self.NAMES:
+            setattr(self, name, self.get(name))
+
+    def reseed(self, seed=None):
+        """ Start every stream over from a new seed """
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        for name, stream in self.streams.items():
+            stream.seed(self._stream_seed(name))
+
+    def _stream_seed(self, name):
+        # string seeds are hashed with sha512, so this is the same in
+        # every process whatever PYTHONHASHSEED is
+        return f"{self.seed}:{name}"
+
+    def get(self, name):
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = random.Random(self._stream_seed(name))
+            self.streams[name] = stream
+        return stream
+
+    def getstate(self):
+        """ {name: state} of every stream made so far """
+        return {name: stream.getstate() for name, stream in self.streams.items()}
+
+    def setstate(self, state):
+        for name, stream_state in state.items():
+            self.get(name).setstate(stream_state)
@@ -0,0 +1,257 @@
+"""
+Batch runner for the headless shooter
+
+Plays lots of seeded ShooterWorld games spread over a pool of worker
+processes, for tuning STARTING_ENEMY_COUNT and the split rules in
+ASTEROID_TIERS without sitting through the games one at a time:
+
+    python shooter_batch.py --episodes 200 --policy random --starting-asteroids 8
+    python shooter_batch.py --episodes 200 --fragments 4=2,3=2 --json results.json
+
+Every episode is played out by one worker from its seed alone, so the
+same seed, policy and settings always give the same game however many
+workers there are. Workers send each finished episode back in one
+message with its curves packed into flat arrays (see Episode).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from array import array
+
+from shooter_world import (ShooterWorld, ASTEROID_TIERS, STARTING_ENEMY_COUNT,
+                           FIRE, TURN_LEFT, random_inputs)
+
+# games still going after this many ticks are stopped
+MAX_TICKS = 10000
+
+# ASTEROID_TIERS entries that can be tuned from the command line
+TUNABLE = ("speed", "fragments")
+
+
+def idle_policy(rng, world):
+    """ Never touches the controls """
+    return []
+
+
+def random_policy(rng, world):
+    """ Mashes random controls """
+    return random_inputs(rng)
+
+
+def spinner_policy(rng, world):
+    """ Turns on the spot, firing every 10 ticks """
+    tick = world.frame_count
+    if tick == 0:
+        return [(TURN_LEFT, True)]
+    if tick % 10 == 0:
+        return [(FIRE, True)]
+    return []
+
+
+# policies by name, each called once per tick as policy(rng, world) and
+# returning that tick's inputs
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "spinner": spinner_policy,
+}
+
+
+def tuned_tiers(overrides):
+    """
+    A copy of ASTEROID_TIERS with overrides applied,
+    overrides is {entry: {size: value}}, e.g. {"fragments": {4: 2}}
+    """
+    tiers = {size: dict(tier) for size, tier in ASTEROID_TIERS.items()}
+    for entry, values in overrides.items():
+        for size, value in values.items():
+            tiers[size][entry] = value
+    return tiers
+
+
+class Episode:
+    """
+    What happened in one game.
+
+    The per tick curves are arrays, asteroid_counts and scores ('I') and
+    tick_times in seconds ('f'). Between processes an episode travels as
+    a tuple of plain numbers and the raw bytes of those arrays.
+    """
+
+    def __init__(self, seed, score, lifetime, game_over,
+                 asteroid_counts, scores, tick_times):
+        self.seed = seed
+        self.score = score
+        # ticks played until the game ended or was stopped
+        self.lifetime = lifetime
+        self.game_over = game_over
+        self.asteroid_counts = asteroid_counts
+        self.scores = scores
+        self.tick_times = tick_times
+
+    def pack(self):
+        return (self.seed, self.score, self.lifetime, self.game_over,
+                self.asteroid_counts.tobytes(), self.scores.tobytes(),
+                self.tick_times.tobytes())
+
+    @classmethod
+    def unpack(cls, packed):
+        seed, score, lifetime, game_over, counts, scores, times = packed
+        return cls(seed, score, lifetime, game_over,
+                   array('I', counts), array('I', scores), array('f', times))
+
+    def outcome(self):
+        """ Everything but the timings, which differ from run to run """
+        return (self.seed, self.score, self.lifetime, self.game_over,
+                self.asteroid_counts.tolist(), self.scores.tolist())
+
+    def to_json(self):
+        return {"seed": self.seed,
+                "score": self.score,
+                "lifetime": self.lifetime,
+                "game_over": self.game_over,
+                "asteroid_counts": self.asteroid_counts.tolist(),
+                "scores": self.scores.tolist(),
+                "tick_times": self.tick_times.tolist()}
+
+
+def play_episode(seed, policy="random", max_ticks=MAX_TICKS,
+                 starting_asteroids=STARTING_ENEMY_COUNT, overrides=None):
+    """ Play one game to the end (or max_ticks) and return its Episode """
+    # the policy gets its own stream so it can't shift the world's
+    rng = random.Random(f"{seed}:policy")
+    choose_inputs = POLICIES[policy]
+
+    world = ShooterWorld(starting_asteroids=starting_asteroids,
+                         tiers=tuned_tiers(overrides or {}), seed=seed)
+    world.start_new_game()
+
+    asteroid_counts = array('I')
+    scores = array('I')
+    tick_times = array('f')
+    clock = time.perf_counter
+
+    while world.frame_count < max_ticks and not world.game_over:
+        inputs = choose_inputs(rng, world)
+        start = clock()
+        world.step(inputs)
+        tick_times.append(clock() - start)
+        asteroid_counts.append(len(world.asteroid_field))
+        scores.append(world.score)
+
+    return Episode(seed, world.score, world.frame_count, world.game_over,
+                   asteroid_counts, scores, tick_times)
+
+
+def _play_packed(args):
+    """ Worker side of run_batch() """
+    return play_episode(*args).pack()
+
+
+def run_batch(seeds, policy="random", max_ticks=MAX_TICKS,
+              starting_asteroids=STARTING_ENEMY_COUNT, overrides=None,
+              workers=None):
+    """
+    Play one episode per seed on a pool of worker processes (all cores
+    by default, 1 plays them here without a pool). Returns the Episodes
+    in seed order.
+    """
+    jobs = [(seed, policy, max_ticks, starting_asteroids, overrides)
+            for seed in seeds]
+    if workers == 1:
+        results = [_play_packed(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count() or 1
+        # a few jobs per message keeps the pipes quiet without
+        # leaving workers idle at the end
+        chunksize = max(1, len(jobs) // (workers * 8))
+        with multiprocessing.Pool(workers) as pool:
+            results = list(pool.imap_unordered(_play_packed, jobs, chunksize))
+
+    episodes = [Episode.unpack(packed) for packed in results]
+    episodes.sort(key=lambda episode: episode.seed)
+    return episodes
+
+
+def percentile(values, fraction):
+    """ Nearest rank percentile of an already sorted list """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+
+def summarize(episodes):
+    """ Averages over a batch, plus tick time percentiles in microseconds """
+    count = len(episodes)
+    times = sorted(t for episode in episodes for t in episode.tick_times)
+    return {"episodes": count,
+            "mean_score": sum(e.score for e in episodes) / count,
+            "mean_lifetime": sum(e.lifetime for e in episodes) / count,
+            "game_overs": sum(1 for e in episodes if e.game_over),
+            "max_asteroids": max(max(e.asteroid_counts, default=0) for e in episodes),
+            "tick_us_p50": percentile(times, 0.50) * 1e6,
+            "tick_us_p95": percentile(times, 0.95) * 1e6,
+            "tick_us_p99": percentile(times, 0.99) * 1e6}
+
+
+def parse_sizes(text):
+    """ "4=2,3=1.5" -> {4: 2, 3: 1.5} """
+    values = {}
+    for item in text.split(","):
+        size, value = item.split("=")
+        value = float(value)
+        values[int(size)] = int(value) if value.is_integer() else value
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless space shooter games at once")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--workers", type=int, default=None, help="default: one per core")
+    parser.add_argument("--starting-asteroids", type=int, default=STARTING_ENEMY_COUNT)
+    for entry in TUNABLE:
+        parser.add_argument(f"--{entry}", type=parse_sizes, default={},
+                            help=f"override ASTEROID_TIERS {entry}, as size=value,...")
+    parser.add_argument("--json", help="also write every episode to this file")
+    parser.add_argument("--check", action="store_true",
+                        help="replay the batch on one process and compare the games")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.episodes)
+    overrides = {entry: getattr(args, entry) for entry in TUNABLE if getattr(args, entry)}
+    settings = (args.policy, args.max_ticks, args.starting_asteroids, overrides)
+
+    start = time.perf_counter()
+    episodes = run_batch(seeds, *settings, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(episodes)
+    for name, value in summary.items():
+        print(f"{name:>15}: {value:.1f}" if isinstance(value, float) else f"{name:>15}: {value}")
+    print(f"{len(episodes)} episodes in {elapsed:.2f}s: {len(episodes) / elapsed:.1f} episodes/s")
+
+    if args.check:
+        serial = run_batch(seeds, *settings, workers=1)
+        same = [e.outcome() for e in episodes] == [e.outcome() for e in serial]
+        print("deterministic" if same else "MISMATCH between pooled and serial runs")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"settings": {"policy": args.policy,
+                                    "max_ticks": args.max_ticks,
+                                    "starting_asteroids": args.starting_asteroids,
+                                    "overrides": overrides},
+                       "summary": summary,
+                       "episodes": [episode.to_json() for episode in episodes]}, file)
+
+
+if __name__ == "__main__":
+    main()
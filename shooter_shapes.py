@@ -0,0 +1,67 @@
+"""
+Sizes and hit boxes of the space shooter's images
+
+The headless ShooterWorld can't load textures, so it looks the shapes
+up here. They are what arcade works out for each texture, so the world
+collides exactly like the sprites would. Regenerate with
+
+    python shooter_shapes.py
+
+after changing any of the images.
+"""
+
+# image -> (width, height, hit box points relative to the center)
+SHAPES = {
+    ":resources:images/space_shooter/playerShip1_orange.png":
+        (99, 75, ((-17.5, 37.5), (16.5, 37.5), (48.5, 5.5), (48.5, -20.5),
+                  (32.5, -36.5), (-32.5, -36.5), (-49.5, -19.5), (-49.5, 5.5))),
+    ":resources:images/space_shooter/laserBlue01.png":
+        (54, 9, ((-23.0, 4.5), (24.0, 4.5), (26.0, 2.5), (26.0, -1.5),
+                  (24.0, -3.5), (-23.0, -3.5), (-27.0, 0.5))),
+    ":resources:images/space_shooter/meteorGrey_big1.png":
+        (101, 84, ((-32.5, 42.0), (21.5, 42.0), (49.5, 14.0), (49.5, -16.0),
+                  (24.5, -41.0), (-21.5, -41.0), (-50.5, -12.0), (-50.5, 24.0))),
+    ":resources:images/space_shooter/meteorGrey_big2.png":
+        (120, 98, ((-32.0, 49.0), (39.0, 49.0), (59.0, 29.0), (59.0, -3.0),
+                  (14.0, -48.0), (-32.0, -48.0), (-60.0, -20.0), (-60.0, 21.0))),
+    ":resources:images/space_shooter/meteorGrey_big3.png":
+        (89, 82, ((-22.5, 41.0), (15.5, 41.0), (43.5, 13.0), (43.5, -17.0),
+                  (20.5, -40.0), (-21.5, -40.0), (-44.5, -17.0), (-44.5, 19.0))),
+    ":resources:images/space_shooter/meteorGrey_big4.png":
+        (98, 96, ((-21.0, 48.0), (16.0, 48.0), (48.0, 16.0), (48.0, -23.0),
+                  (24.0, -47.0), (-19.0, -47.0), (-49.0, -17.0), (-49.0, 20.0))),
+    ":resources:images/space_shooter/meteorGrey_med1.png":
+        (43, 43, ((-8.5, 21.5), (13.5, 21.5), (20.5, 14.5), (20.5, -6.5),
+                  (6.5, -20.5), (-8.5, -20.5), (-21.5, -7.5), (-21.5, 8.5))),
+    ":resources:images/space_shooter/meteorGrey_med2.png":
+        (45, 40, ((-11.5, 20.0), (7.5, 20.0), (21.5, 6.0), (21.5, -4.0),
+                  (6.5, -19.0), (-8.5, -19.0), (-22.5, -5.0), (-22.5, 9.0))),
+    ":resources:images/space_shooter/meteorGrey_small1.png":
+        (28, 28, ((-6.0, 14.0), (8.0, 14.0), (13.0, 9.0), (13.0, -3.0),
+                  (3.0, -13.0), (-6.0, -13.0), (-14.0, -5.0), (-14.0, 6.0))),
+    ":resources:images/space_shooter/meteorGrey_small2.png":
+        (29, 26, ((-6.5, 13.0), (4.5, 13.0), (13.5, 4.0), (13.5, -2.0),
+                  (3.5, -12.0), (-5.5, -12.0), (-14.5, -3.0), (-14.5, 5.0))),
+    ":resources:images/space_shooter/meteorGrey_tiny1.png":
+        (18, 18, ((-2.0, 9.0), (3.0, 9.0), (8.0, 4.0), (8.0, -3.0),
+                  (3.0, -8.0), (-2.0, -8.0), (-9.0, -1.0), (-9.0, 2.0))),
+    ":resources:images/space_shooter/meteorGrey_tiny2.png":
+        (16, 15, ((-2.0, 7.5), (2.0, 7.5), (7.0, 2.5), (7.0, -1.5),
+                  (2.0, -6.5), (-1.0, -6.5), (-8.0, 0.5), (-8.0, 1.5))),
+}
+
+
+def main():
+    """ Print SHAPES again, worked out from the textures by arcade """
+    import arcade
+
+    print("SHAPES = {")
+    for image in SHAPES:
+        texture = arcade.load_texture(image)
+        print(f'    "{image}":')
+        print(f"        ({texture.width}, {texture.height}, {tuple(texture.hit_box_points)}),")
+    print("}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,742 @@
+"""
+Headless space shooter
+
+Everything PracticeSpaceShooter needs to play a game, the ship,
+asteroids, bullets, collisions and splitting, without a window, a GL
+context or sound. The windowed game draws a ShooterWorld; bots and load
+tests can step one directly as fast as it will go:
+
+    world = ShooterWorld()
+    world.start_new_game()
+    world.step([(FIRE, True)])
+
+Run this file to benchmark how many ticks per second it manages, or
+with --check-determinism to check a seed always plays the same game.
+"""
+
+import argparse
+import hashlib
+import math
+import multiprocessing
+import random
+import struct
+import time
+
+from asteroid_field import AsteroidField
+from frame_profiler import FrameProfiler
+from projectile_field import ProjectileField
+from random_streams import RandomStreams
+from shooter_shapes import SHAPES
+from spatial_hash import SpatialHash
+
+STARTING_ENEMY_COUNT = 5
+SCALE = 0.5
+OFFSCREEN_SPACE = 300
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+LEFT_LIMIT = -OFFSCREEN_SPACE
+RIGHT_LIMIT = SCREEN_WIDTH + OFFSCREEN_SPACE
+BOTTOM_LIMIT = -OFFSCREEN_SPACE
+TOP_LIMIT = SCREEN_HEIGHT + OFFSCREEN_SPACE
+
+# size of a grid cell in the asteroid collision index, roughly a big meteor
+COLLISION_CELL_SIZE = 64
+# also run the brute force collision check and report any disagreement
+DEBUG_COLLISIONS = False
+
+SHIP_IMAGE = ":resources:images/space_shooter/playerShip1_orange.png"
+BULLET_IMAGE = ":resources:images/space_shooter/laserBlue01.png"
+BULLET_SPEED = 13
+
+# one entry per asteroid size, biggest first
+#   images/scale: what asteroids of this size look like
+#   speed: asteroids of this size move up to this fast on each axis
+#   fragments: how many of the next size down it splits into when hit
+#   sound: played once when it is hit
+ASTEROID_TIERS = {
+    4: {"images": (":resources:images/space_shooter/meteorGrey_big1.png",
+                   ":resources:images/space_shooter/meteorGrey_big2.png",
+                   ":resources:images/space_shooter/meteorGrey_big3.png",
+                   ":resources:images/space_shooter/meteorGrey_big4.png"),
+        "scale": SCALE, "speed": 1, "fragments": 3,
+        "sound": ":resources:sounds/explosion1.wav"},
+    3: {"images": (":resources:images/space_shooter/meteorGrey_med1.png",
+                   ":resources:images/space_shooter/meteorGrey_med2.png"),
+        "scale": SCALE * 1.5, "speed": 1.25, "fragments": 3,
+        "sound": ":resources:sounds/explosion2.wav"},
+    2: {"images": (":resources:images/space_shooter/meteorGrey_small1.png",
+                   ":resources:images/space_shooter/meteorGrey_small2.png"),
+        "scale": SCALE * 1.5, "speed": 1.5, "fragments": 3,
+        "sound": ":resources:sounds/hit1.wav"},
+    1: {"images": (":resources:images/space_shooter/meteorGrey_tiny1.png",
+                   ":resources:images/space_shooter/meteorGrey_tiny2.png"),
+        "scale": SCALE * 1.5, "speed": 1.75, "fragments": 0,
+        "sound": ":resources:sounds/hit2.wav"},
+}
+BIGGEST_ASTEROID = max(ASTEROID_TIERS)
+
+# things the player can do, step() takes (action, pressed) pairs
+FIRE = "fire"
+TURN_LEFT = "turn_left"
+TURN_RIGHT = "turn_right"
+THRUST = "thrust"
+REVERSE = "reverse"
+ACTIONS = (FIRE, TURN_LEFT, TURN_RIGHT, THRUST, REVERSE)
+
+# what step() reports back in ShooterWorld.events
+BULLET_SPAWNED = "bullet_spawned"
+BULLET_REMOVED = "bullet_removed"
+ASTEROID_SPAWNED = "asteroid_spawned"
+ASTEROID_REMOVED = "asteroid_removed"
+ASTEROID_SPLIT = "asteroid_split"
+SHOT_FIRED = "shot_fired"
+CRASH = "crash"
+GAME_OVER = "game_over"
+
+
+def rotate_point(x, y, angle_degrees):
+    """ Rotate a point around the origin, rounded like arcade does it """
+    angle_radians = math.radians(angle_degrees)
+    cos_angle = math.cos(angle_radians)
+    sin_angle = math.sin(angle_radians)
+    rotated_x = x * cos_angle - y * sin_angle
+    rotated_y = x * sin_angle + y * cos_angle
+    return round(rotated_x, 2), round(rotated_y, 2)
+
+
+def are_polygons_intersecting(poly_a, poly_b):
+    """ Separating axis test, the same one arcade uses """
+    for polygon in (poly_a, poly_b):
+        for i1 in range(len(polygon)):
+            i2 = (i1 + 1) % len(polygon)
+            projection_1 = polygon[i1]
+            projection_2 = polygon[i2]
+
+            normal = (projection_2[1] - projection_1[1],
+                      projection_1[0] - projection_2[0])
+
+            projected = [normal[0] * x + normal[1] * y for x, y in poly_a]
+            min_a = min(projected)
+            max_a = max(projected)
+            projected = [normal[0] * x + normal[1] * y for x, y in poly_b]
+            min_b = min(projected)
+            max_b = max(projected)
+
+            if max_a <= min_b or max_b <= min_a:
+                return False
+
+    return True
+
+
+def check_for_collision(body1, body2):
+    """ Same as arcade.check_for_collision, for bodies """
+    radius_sum = body1.collision_radius + body2.collision_radius
+    diff_x = body1.center_x - body2.center_x
+    diff_y = body1.center_y - body2.center_y
+    if diff_x * diff_x + diff_y * diff_y > radius_sum * radius_sum:
+        return False
+    return are_polygons_intersecting(body1.get_adjusted_hit_box(),
+                                     body2.get_adjusted_hit_box())
+
+
+class Body:
+    """
+    Something in the world with a position and a hit box.
+    Moves and collides like an arcade.Sprite, but can't be drawn.
+    """
+
+    def __init__(self, image, scale):
+        self.scale = scale
+        self.center_x = 0.0
+        self.center_y = 0.0
+        self.angle = 0.0
+        self.change_x = 0.0
+        self.change_y = 0.0
+        self.change_angle = 0.0
+        self.set_image(image)
+
+    def set_image(self, image):
+        width, height, hit_box = SHAPES[image]
+        self.image = image
+        self.width = width * self.scale
+        self.height = height * self.scale
+        self.hit_box = hit_box
+        # rough radius for the quick "too far apart to touch" check
+        self.collision_radius = max(self.width, self.height)
+        # (x, y, angle) the cached hit box was worked out for
+        self._hit_box_key = None
+        self._hit_box_cache = None
+
+    def _get_position(self):
+        return self.center_x, self.center_y
+
+    def _set_position(self, position):
+        self.center_x, self.center_y = position
+
+    position = property(_get_position, _set_position)
+
+    def get_adjusted_hit_box(self):
+        """ Hit box scaled, rotated and moved to where the body is """
+        key = (self.center_x, self.center_y, self.angle)
+        if key == self._hit_box_key:
+            return self._hit_box_cache
+
+        points = []
+        for x, y in self.hit_box:
+            if self.scale != 1:
+                x *= self.scale
+                y *= self.scale
+            if self.angle:
+                x, y = rotate_point(x, y, self.angle)
+            points.append((x + self.center_x, y + self.center_y))
+
+        self._hit_box_key = key
+        self._hit_box_cache = points
+        return points
+
+    def _get_left(self):
+        return min(x for x, y in self.get_adjusted_hit_box())
+
+    def _set_left(self, amount):
+        self.center_x += amount - self._get_left()
+
+    left = property(_get_left, _set_left)
+
+    def _get_right(self):
+        return max(x for x, y in self.get_adjusted_hit_box())
+
+    def _set_right(self, amount):
+        self.center_x -= self._get_right() - amount
+
+    right = property(_get_right, _set_right)
+
+    def _get_bottom(self):
+        return min(y for x, y in self.get_adjusted_hit_box())
+
+    def _set_bottom(self, amount):
+        self.center_y -= self._get_bottom() - amount
+
+    bottom = property(_get_bottom, _set_bottom)
+
+    def _get_top(self):
+        return max(y for x, y in self.get_adjusted_hit_box())
+
+    def _set_top(self, amount):
+        self.center_y -= self._get_top() - amount
+
+    top = property(_get_top, _set_top)
+
+    def update(self):
+        self.center_x = self.center_x + self.change_x
+        self.center_y = self.center_y + self.change_y
+        self.angle += self.change_angle
+
+
+class Ship(Body):
+    """
+    the player's space ship
+    """
+
+    def __init__(self):
+        super().__init__(SHIP_IMAGE, SCALE)
+
+        # info on where we are going.
+        self.thrust = 0
+        self.speed = 0
+        self.max_speed = 4
+        self.drag = 0.5
+        self.respawning = 0
+        self.alpha = 255
+
+        # mark that we are respawning
+        self.respawn()
+
+    def respawn(self):
+        """
+        called when the player dies and need to make a new ship.
+        "respawning" is an invulnerability timer.
+        TODO: change to respawning at last visited planet
+        """
+        self.respawning = 1
+        self.center_x = SCREEN_WIDTH / 2
+        self.center_y = SCREEN_HEIGHT / 2
+        self.angle = 0
+
+    def update(self):
+        if self.respawning:
+            # spawn timer more or less
+            self.respawning += 3
+            self.alpha = self.respawning
+            if self.respawning > 250:
+                self.respawning = 0
+                # makes the ship opaque
+                self.alpha = 255
+
+        if self.speed > 0:
+            self.speed -= self.drag
+            if self.speed < 0:
+                self.speed = 0
+
+        if self.speed < 0:
+            self.speed += self.drag
+            if self.speed > 0:
+                self.speed = 0
+
+        self.speed += self.thrust
+        if self.speed > self.max_speed:
+            self.speed = self.max_speed
+        if self.speed < -self.max_speed:
+            self.speed = -self.max_speed
+
+        # moves in the direction of the ship angle
+        # see 'velocity and vectors'
+        self.change_x += -math.sin(math.radians(self.angle)) * self.speed
+        self.change_y += math.cos(math.radians(self.angle)) * self.speed
+
+        self.center_x += self.change_x
+        self.center_y += self.change_y
+
+        # if the ship goes off screen, move it to the other side of the window
+        # TODO: change so that player is always centered but off screen logic still applies to the map
+        if self.right < 0:
+            self.left = SCREEN_WIDTH
+
+        if self.left > SCREEN_WIDTH:
+            self.right = 0
+
+        if self.bottom < 0:
+            self.top = SCREEN_HEIGHT
+
+        if self.top > SCREEN_HEIGHT:
+            self.bottom = 0
+
+        super().update()
+
+
+class Bullet(Body):
+    """
+    a shot, points the way it is travelling
+    once fired it is moved by the world's ProjectileField, and its
+    position is only brought up to date when it's checked for a hit
+    """
+
+    def __init__(self):
+        super().__init__(BULLET_IMAGE, SCALE)
+        # slot in the ProjectileField
+        self.field_index = None
+
+    def update(self):
+        super().update()
+        self.angle = math.degrees(math.atan2(self.change_y, self.change_x))
+
+
+class Asteroid(Body):
+    """
+    an asteroid, moved by the world's AsteroidField
+    TODO: change to planet
+    """
+
+    def __init__(self, size, image_no, tiers=ASTEROID_TIERS):
+        tier = tiers[size]
+        super().__init__(tier["images"][image_no], tier["scale"])
+        self.size = size
+        self.image_no = image_no
+        # when it was spawned, hits are reported in this order
+        self.spawn_order = 0
+        # slot in the AsteroidField
+        self.field_index = None
+
+
+class ShooterWorld:
+    """
+    The state and rules of one game of the space shooter.
+
+    Call step() once per tick with the inputs that arrived since the
+    last one. What happened during the step, things spawning, dying,
+    crashing, is listed in self.events for whoever is drawing the game.
+    """
+
+    def __init__(self, max_bullets=None, starting_asteroids=STARTING_ENEMY_COUNT,
+                 tiers=ASTEROID_TIERS, seed=None, profiler=None):
+        # fire does nothing while this many bullets are flying (None for no limit)
+        self.max_bullets = max_bullets
+        # how many of the biggest asteroids a game starts with
+        self.starting_asteroids = starting_asteroids
+        # laid out like ASTEROID_TIERS, so the split rules can be tuned per world
+        self.tiers = tiers
+        self.biggest_asteroid = max(tiers)
+        # everything random in the game comes from here, see RandomStreams.NAMES
+        self.rng = RandomStreams(seed)
+        # times the phases of step(), off unless the caller hands one in
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+
+        # grid index over the asteroids, rebuilt every step
+        self.asteroid_hash = SpatialHash(COLLISION_CELL_SIZE)
+        # moves all the asteroids at once
+        self.asteroid_field = AsteroidField(LEFT_LIMIT, RIGHT_LIMIT, BOTTOM_LIMIT, TOP_LIMIT)
+        # and all the bullets, dropping the ones that fly past where the
+        # asteroids wrap, as there's nothing left out there to hit
+        self.bullet_field = ProjectileField(LEFT_LIMIT, RIGHT_LIMIT, BOTTOM_LIMIT, TOP_LIMIT)
+
+        self.frame_count = 0
+        self.game_over = False
+        self.score = 0
+        self.lives = 3
+        self.ship = None
+        # counts asteroids spawned, see Asteroid.spawn_order
+        self.asteroids_spawned = 0
+        self.events = []
+
+    @property
+    def asteroids(self):
+        return self.asteroid_field.sprites
+
+    @property
+    def bullets(self):
+        return self.bullet_field.items
+
+    def start_new_game(self, seed=None):
+        """
+        sets up the game and initalizes the variables
+        a seed starts the random streams over, otherwise they carry on
+        """
+        if seed is not None:
+            self.rng.reseed(seed)
+        self.frame_count = 0
+        self.game_over = False
+        self.score = 0
+        self.lives = 3
+        self.events = []
+
+        self.asteroid_hash.clear()
+        self.asteroid_field.clear()
+        self.bullet_field.clear()
+        self.asteroids_spawned = 0
+
+        self.ship = Ship()
+
+        # Make asteroids
+        rng = self.rng.spawn
+        tier = self.tiers[self.biggest_asteroid]
+        for i in range(self.starting_asteroids):
+            image_no = self.rng.texture.randrange(len(tier["images"]))
+
+            # spawn asteroid
+            x = rng.randrange(LEFT_LIMIT, RIGHT_LIMIT)
+            y = rng.randrange(BOTTOM_LIMIT, TOP_LIMIT)
+
+            asteroid = self.spawn_asteroid(self.biggest_asteroid, image_no, x, y, rng)
+            self.asteroid_field.add(asteroid)
+
+    def spawn_asteroid(self, size, image_no, x, y, rng):
+        """
+        make an asteroid of the given size and send it off in a direction
+        drawn from rng, the caller adds it to the field
+        """
+        asteroid = Asteroid(size, image_no, self.tiers)
+        asteroid.spawn_order = self.asteroids_spawned
+        self.asteroids_spawned += 1
+
+        # spawn coords
+        asteroid.center_x = x
+        asteroid.center_y = y
+
+        # randomizes velocity
+        speed = self.tiers[size]["speed"]
+        asteroid.change_x = rng.random() * speed * 2 - speed
+        asteroid.change_y = rng.random() * speed * 2 - speed
+
+        # sets asteroid spinning
+        asteroid.change_angle = (rng.random() - 0.5) * 2
+        self.events.append((ASTEROID_SPAWNED, asteroid))
+        return asteroid
+
+    def split_asteroid(self, asteroid):
+        """
+        Split an asteroid into chunks, as set out in the tiers
+        Deletion of original asteroid is handled elsewhere
+        """
+        x = asteroid.center_x
+        y = asteroid.center_y
+        self.score += 1
+
+        tier = self.tiers[asteroid.size]
+        fragment_size = asteroid.size - 1
+        with self.profiler.section("split_asteroid"):
+            for i in range(tier["fragments"]):
+                image_no = self.rng.texture.randrange(len(self.tiers[fragment_size]["images"]))
+                fragment = self.spawn_asteroid(fragment_size, image_no, x, y, self.rng.split)
+                self.asteroid_field.add(fragment)
+                self.asteroid_hash.insert(fragment)
+
+        self.events.append((ASTEROID_SPLIT, asteroid.size))
+
+    def remove_asteroid(self, asteroid):
+        """
+        take an asteroid out of the field and the collision index
+        """
+        self.asteroid_hash.remove(asteroid)
+        self.asteroid_field.remove(asteroid)
+        self.events.append((ASTEROID_REMOVED, asteroid))
+
+    def remove_bullet(self, bullet):
+        if bullet.field_index is not None:
+            self.bullet_field.remove(bullet)
+            self.events.append((BULLET_REMOVED, bullet))
+
+    def asteroids_hit_by(self, body, box=None):
+        """
+        asteroids colliding with body, in the order they were spawned
+        only asteroids sharing a grid cell with it get the exact check
+
+        for a bullet, box is its (left, right, bottom, top) from the
+        bullet field, and its position is only synced from the field
+        if an asteroid is near enough to need the exact check
+        """
+        if box is None:
+            candidates = self.asteroid_hash.query(body)
+        else:
+            candidates = self.asteroid_hash.query_box(*box)
+            if not candidates:
+                return []
+            self.bullet_field.sync(body)
+        for asteroid in candidates:
+            self.asteroid_field.sync_sprite(asteroid)
+        asteroids = [asteroid for asteroid in candidates
+                     if check_for_collision(body, asteroid)]
+        asteroids.sort(key=lambda asteroid: asteroid.spawn_order)
+
+        if DEBUG_COLLISIONS:
+            # sanity check the index against the brute force scan
+            self.asteroid_field.sync_all()
+            asteroids_plain = [asteroid for asteroid in
+                               sorted(self.asteroids, key=lambda asteroid: asteroid.spawn_order)
+                               if check_for_collision(body, asteroid)]
+            if asteroids_plain != asteroids:
+                print('ERROR')
+
+        return asteroids
+
+    def fire(self):
+        """
+        shoot a bullet the way the ship is facing
+        """
+        if self.max_bullets is not None and len(self.bullets) >= self.max_bullets:
+            return
+
+        bullet = Bullet()
+        # TODO: create seperate class for different weapons with different speeds / range
+        bullet.change_x = -math.sin(math.radians(self.ship.angle)) * BULLET_SPEED
+        bullet.change_y = math.cos(math.radians(self.ship.angle)) * BULLET_SPEED
+
+        # spawns bullet at ship center
+        # TODO: offset projectile spawn from weapon locations on player
+        bullet.center_x = self.ship.center_x
+        bullet.center_y = self.ship.center_y
+        bullet.update()
+
+        self.bullet_field.add(bullet)
+        self.events.append((BULLET_SPAWNED, bullet))
+        self.events.append((SHOT_FIRED, None))
+
+    def handle_input(self, action, pressed):
+        """
+        a control was pressed or released
+        """
+        ship = self.ship
+        if pressed:
+            # shoot if not respawning
+            # TODO: fire two projectiles at a time (spawn offset)
+            if action == FIRE and not ship.respawning:
+                self.fire()
+
+            if action == TURN_LEFT:
+                ship.change_angle = 3
+            elif action == TURN_RIGHT:
+                ship.change_angle = -3
+            # TODO: Pull thrust from ship class
+            elif action == THRUST:
+                ship.thrust = 0.15
+            # TODO: Pull reverse thrust from ship class
+            elif action == REVERSE:
+                ship.thrust = -0.2
+        else:
+            if action in (TURN_LEFT, TURN_RIGHT):
+                ship.change_angle = 0
+            elif action in (THRUST, REVERSE):
+                ship.thrust = 0
+
+    def step(self, inputs=()):
+        """
+        apply inputs, a list of (action, pressed) pairs, then move
+        everything one tick
+        """
+        self.events = []
+        for action, pressed in inputs:
+            self.handle_input(action, pressed)
+
+        self.frame_count += 1
+        if self.game_over:
+            return
+
+        profiler = self.profiler
+        with profiler.section("move"):
+            self.ship.update()
+            for bullet in self.bullet_field.step():
+                self.events.append((BULLET_REMOVED, bullet))
+            self.asteroid_field.step()
+
+        # everything moved, so re-bucket the asteroids
+        with profiler.section("rebuild_hash"):
+            self.asteroid_field.rebuild_hash(self.asteroid_hash)
+
+        # checks for collisions between bullets and asteroids
+        # the field has every bullet's hit box, so only bullets that are
+        # near an asteroid need their position and exact check
+        with profiler.section("bullet_collisions"):
+            bullet_field = self.bullet_field
+            for bullet, left, right, bottom, top in bullet_field.boxes():
+                for asteroid in self.asteroids_hit_by(bullet, (left, right, bottom, top)):
+                    # creates new smaller asteroids
+                    self.split_asteroid(asteroid)
+                    # deletes original asteroid and bullet
+                    self.remove_asteroid(asteroid)
+                    self.remove_bullet(bullet)
+
+        if not self.ship.respawning:
+            # same as for bullets but with the ship instead
+            with profiler.section("ship_collisions"):
+                asteroids = self.asteroids_hit_by(self.ship)
+            if asteroids:
+                # number of lives check
+                if self.lives > 0:
+                    self.lives -= 1
+                    self.ship.respawn()
+                    # asteroids[0] refers to the first asteroid in case several collide at once
+                    self.split_asteroid(asteroids[0])
+                    self.remove_asteroid(asteroids[0])
+                    self.events.append((CRASH, None))
+                else:
+                    self.game_over = True
+                    self.events.append((GAME_OVER, None))
+
+
+def random_inputs(rng, chance=0.05):
+    """ Inputs for one tick of a player mashing random controls """
+    if rng.random() >= chance:
+        return []
+    return [(rng.choice(ACTIONS), rng.random() < 0.6)]
+
+
+def play(seed, ticks, profiler=None):
+    """
+    Step headless games with random inputs for a number of ticks,
+    starting a new game whenever one ends. The inputs come from the seed
+    too, so the same seed always plays the same games.
+    Returns the world and how many games were played.
+    """
+    rng = random.Random(f"{seed}:inputs")
+    world = ShooterWorld(seed=seed, profiler=profiler)
+    world.start_new_game()
+    games = 1
+
+    for i in range(ticks):
+        world.step(random_inputs(rng))
+        world.profiler.end_frame()
+        if world.game_over:
+            world.start_new_game()
+            games += 1
+    return world, games
+
+
+def benchmark(ticks=20000, seed=0, profile=None):
+    """
+    Time play(), returns ticks per second
+    with profile, the phases of each tick are timed and saved there
+    """
+    profiler = FrameProfiler(enabled=True, window=ticks) if profile else None
+    start = time.perf_counter()
+    world, games = play(seed, ticks, profiler)
+    elapsed = time.perf_counter() - start
+
+    rate = ticks / elapsed
+    print(f"{ticks} ticks, {games} games in {elapsed:.2f}s: {rate:.0f} ticks/s")
+    if profiler is not None:
+        profiler.export(profile)
+    return rate
+
+
+def state_digest(world):
+    """
+    sha256 of everything that decides how a world plays on, floats
+    down to the last bit, so two worlds with the same digest are the same
+    """
+    digest = hashlib.sha256()
+
+    def floats(*values):
+        digest.update(struct.pack(f"<{len(values)}d", *values))
+
+    floats(world.frame_count, world.score, world.lives, world.game_over,
+           world.asteroids_spawned)
+    ship = world.ship
+    floats(ship.center_x, ship.center_y, ship.angle, ship.change_x, ship.change_y,
+           ship.change_angle, ship.speed, ship.thrust, ship.respawning, ship.alpha)
+    for bullet in world.bullets:
+        floats(bullet.angle)
+    bullets = world.bullet_field
+    for name, dtype in bullets.ARRAYS:
+        digest.update(getattr(bullets, name)[:bullets.count].tobytes())
+
+    field = world.asteroid_field
+    for name, dtype in field.ARRAYS:
+        digest.update(getattr(field, name)[:field.count].tobytes())
+    for asteroid in field.sprites:
+        floats(asteroid.spawn_order, asteroid.image_no)
+
+    digest.update(repr(sorted(world.rng.getstate().items())).encode())
+    return digest.hexdigest()
+
+
+def _played_digest(seed, ticks):
+    return state_digest(play(seed, ticks)[0])
+
+
+def check_determinism(seed=0, ticks=10000):
+    """
+    Play the same seed three times, twice here and once in a freshly
+    started process, and check the worlds end up bit for bit the same.
+    The global random module is stirred between runs to show the game
+    doesn't depend on it. Returns True if they all match.
+    """
+    digests = [_played_digest(seed, ticks)]
+    random.seed(seed + 1)
+    random.random()
+    digests.append(_played_digest(seed, ticks))
+
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        digests.append(pool.apply(_played_digest, (seed, ticks)))
+
+    same = len(set(digests)) == 1
+    print(f"seed {seed}, {ticks} ticks: {digests[0][:16]}",
+          "deterministic" if same else f"MISMATCH {[d[:16] for d in digests]}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the headless space shooter")
+    parser.add_argument("--ticks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-determinism", action="store_true",
+                        help="check that replaying the seed gives the same world instead")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time each phase of a tick, saved as CSV (or JSON for .json)")
+    args = parser.parse_args()
+    if args.check_determinism:
+        if not check_determinism(args.seed, args.ticks):
+            raise SystemExit(1)
+    else:
+        benchmark(args.ticks, args.seed, args.profile)
+
+
+if __name__ == "__main__":
+    main()
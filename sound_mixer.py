@@ -0,0 +1,458 @@
+"""
+Sound effect mixer
+
+arcade.play_sound() starts a new voice every time it is called, so a
+chain of asteroid splits can start a dozen copies of the same explosion
+in one frame. A SoundMixer decodes every sound into PCM when it is
+loaded, straight out of the asset pack's memory map if there is one
+(see asset_pack.py), and the game only ever asks it to play one:
+
+    mixer = SoundMixer()
+    mixer.load_dir("sounds")
+    mixer.start()
+    ...
+    mixer.play("sounds/coin1.wav")      # in on_update, as often as you like
+    mixer.end_frame()                   # at the end of on_update
+
+play() just notes the sound down. The same sound played more than once
+in a frame starts once, at the loudest volume it was asked for.
+end_frame() hands the frame's sounds to the mixer's own thread, which
+starts them, mixes every playing voice into blocks of PCM and writes
+them to the output backend, so on_update never waits on audio.
+
+No sound gets more than max_per_sound voices and there are never more
+than max_voices in all. A sound played when it is at its limit is
+dropped, the copies already playing drown it out anyway.
+
+Backends take the mixed blocks:
+
+    StreamBackend   plays them, needs the sounddevice package
+    ArcadeBackend   ignores them and plays each voice with arcade instead,
+                    the limits still apply but the mixing is arcade's.
+                    The sounds are only loaded by arcade, not decoded,
+                    and the voices are started on the main thread by
+                    end_frame(), so arcade is never called from the
+                    mixer thread
+    NullBackend     throws them away at the speed a sound card would take
+                    them, or keeps them, for running headless
+
+default_backend() picks the first one that works. python sound_mixer.py
+plays a chain reaction into a NullBackend and prints what happened.
+"""
+
+import argparse
+import collections
+import glob
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+import asset_pack
+
+RATE = 44100
+# frames mixed at a time, about 12ms at RATE
+BLOCK_FRAMES = 512
+MAX_VOICES = 16
+MAX_PER_SOUND = 4
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _key(path):
+    """ The name a sound is filed under """
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def _resolve(path):
+    """ The file a path names, arcade's :resources: paths included """
+    if path.startswith(":resources:"):
+        import arcade
+        return os.path.join(os.path.dirname(os.path.abspath(arcade.__file__)),
+                            "resources", path[len(":resources:"):])
+    return path
+
+
+def read_wav(data):
+    """
+    format tag, channels, sample width in bytes, rate and the sample data
+    of a WAV file's bytes, the samples a view into data rather than a
+    copy. The tag is WAVE_FORMAT_PCM or WAVE_FORMAT_IEEE_FLOAT, an
+    extensible file gives the one in its sub format.
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a WAV file")
+    fmt = None
+    position = 12
+    while position + 8 <= len(data):
+        name = data[position:position + 4]
+        size, = struct.unpack_from("<I", data, position + 4)
+        body = data[position + 8:position + 8 + size]
+        if name == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", body)
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE:
+                if len(body) < 40:
+                    raise ValueError("extensible WAV format with no sub format")
+                # the sub format GUID starts with the real format tag
+                fmt = struct.unpack_from("<H", body, 24) + fmt[1:]
+        elif name == b"data":
+            if fmt is None:
+                raise ValueError("WAV data before its format")
+            tag, channels, rate, byte_rate, block_align, bits = fmt
+            if tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                raise ValueError(f"WAV format {tag} isn't PCM or float")
+            # whole frames only
+            return tag, channels, bits // 8, rate, body[:len(body) - len(body) % block_align]
+        # chunks are padded to an even length
+        position += 8 + size + size % 2
+    raise ValueError("WAV file with no data")
+
+
+def frame_count(path, rate=RATE):
+    """ How many frames long a WAV file is at rate, without decoding it """
+    try:
+        tag, channels, width, source_rate, data = read_wav(asset_pack.read_asset(_resolve(path)))
+    except ValueError as ex:
+        raise ValueError(f"{path}: {ex}") from None
+    return len(data) // (channels * width) * rate // source_rate
+
+
+def decode(path, rate=RATE):
+    """ The samples in a PCM or float WAV file, mono float32 from -1 to 1 at rate """
+    try:
+        tag, channels, width, source_rate, data = read_wav(asset_pack.read_asset(_resolve(path)))
+    except ValueError as ex:
+        raise ValueError(f"{path}: {ex}") from None
+    if tag == WAVE_FORMAT_IEEE_FLOAT and width in (4, 8):
+        samples = np.frombuffer(data, "<f4" if width == 4 else "<f8").astype(np.float32)
+    elif tag == WAVE_FORMAT_PCM and width == 1:
+        samples = (np.frombuffer(data, np.uint8).astype(np.float32) - 128) / 128
+    elif tag == WAVE_FORMAT_PCM and width == 2:
+        samples = np.frombuffer(data, "<i2").astype(np.float32) / 2 ** 15
+    elif tag == WAVE_FORMAT_PCM and width == 3:
+        # each sample into the top three bytes of an int32, which keeps its sign
+        padded = np.zeros((len(data) // 3, 4), np.uint8)
+        padded[:, 1:] = np.frombuffer(data, np.uint8).reshape(-1, 3)
+        samples = padded.view("<i4").ravel().astype(np.float32) / 2 ** 31
+    elif tag == WAVE_FORMAT_PCM and width == 4:
+        samples = np.frombuffer(data, "<i4").astype(np.float32) / 2 ** 31
+    else:
+        kind = "float" if tag == WAVE_FORMAT_IEEE_FLOAT else "PCM"
+        raise ValueError(f"{path}: {width * 8} bit {kind} samples aren't supported")
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if source_rate != rate:
+        times = np.arange(0, len(samples) * rate // source_rate) * (source_rate / rate)
+        samples = np.interp(times, np.arange(len(samples)), samples)
+    return samples.astype(np.float32)
+
+
+class NullBackend:
+    """
+    Takes blocks at the rate a sound card would, or as fast as they
+    come if realtime is False, and keeps them if capture is True
+    """
+    wants_pcm = True
+
+    def __init__(self, realtime=True, capture=False):
+        self.realtime = realtime
+        self.blocks = [] if capture else None
+        self.written = 0
+        self.clock = None
+
+    def load(self, name, path):
+        pass
+
+    def voice_started(self, name, volume):
+        pass
+
+    def flush(self):
+        pass
+
+    def write(self, block, frames, rate):
+        if self.blocks is not None:
+            self.blocks.append(block)
+        self.written += frames
+        if self.realtime:
+            # keep a block ahead, like a sound card's buffer would
+            now = time.perf_counter()
+            if self.clock is None or self.clock < now:
+                self.clock = now
+            self.clock += frames / rate
+            time.sleep(max(0.0, self.clock - now - frames / rate))
+
+    def close(self):
+        pass
+
+
+class ArcadeBackend(NullBackend):
+    """
+    Plays each voice the mixer starts with arcade, for when there's no
+    StreamBackend. The mixer thread only queues them, flush() plays them
+    on the main thread.
+    """
+    wants_pcm = False
+
+    def __init__(self):
+        super().__init__()
+        self.sounds = {}
+        # (name, volume) started by the mixer thread, not played yet
+        self.started = collections.deque()
+
+    def load(self, name, path):
+        import arcade
+        self.sounds[name] = arcade.load_sound(path)
+
+    def voice_started(self, name, volume):
+        self.started.append((name, volume))
+
+    def flush(self):
+        while self.started:
+            name, volume = self.started.popleft()
+            # load_sound gives None for files it can't read, play_sound shrugs off errors too
+            sound = self.sounds.get(name)
+            if sound is None:
+                continue
+            try:
+                sound.play(volume)
+            except Exception as ex:
+                print("Error playing sound.", ex)
+
+
+class StreamBackend:
+    """ Plays the mixed blocks on the default output device through sounddevice """
+    wants_pcm = True
+
+    def __init__(self, rate=RATE, block_frames=BLOCK_FRAMES):
+        import sounddevice
+        self.stream = sounddevice.RawOutputStream(samplerate=rate, channels=1, dtype="int16",
+                                                  blocksize=block_frames)
+        self.stream.start()
+
+    def load(self, name, path):
+        pass
+
+    def voice_started(self, name, volume):
+        pass
+
+    def flush(self):
+        pass
+
+    def write(self, block, frames, rate):
+        # blocks until the device has room, which is what paces the mixer
+        self.stream.write(block)
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
+
+
+def default_backend():
+    """ A StreamBackend if sounddevice is installed and there's a device, else an ArcadeBackend """
+    try:
+        return StreamBackend()
+    except Exception:
+        return ArcadeBackend()
+
+
+class Voice:
+    __slots__ = ("name", "samples", "length", "position", "volume")
+
+    def __init__(self, name, samples, length, volume):
+        self.name = name
+        self.samples = samples
+        self.length = length
+        self.position = 0
+        self.volume = volume
+
+
+class SoundMixer:
+    """ Preloaded sounds mixed on a thread of their own, with voice limits """
+
+    def __init__(self, backend=None, max_voices=MAX_VOICES, max_per_sound=MAX_PER_SOUND,
+                 rate=RATE, block_frames=BLOCK_FRAMES):
+        self.backend = backend if backend is not None else default_backend()
+        self.max_voices = max_voices
+        self.max_per_sound = max_per_sound
+        self.rate = rate
+        self.block_frames = block_frames
+        self.volume = 1.0
+        # name -> samples, None if the backend doesn't want PCM
+        self.sounds = {}
+        # name -> frames long
+        self.lengths = {}
+        # name -> volume, played this frame
+        self.pending = {}
+        # the frames handed over by end_frame() the mixer hasn't started yet
+        self.frames = collections.deque()
+        self.lock = threading.Lock()
+        # only the mixer thread touches these
+        self.voices = []
+        self.thread = None
+        self.closing = threading.Event()
+
+        self.triggers = 0
+        self.coalesced = 0
+        self.started = 0
+        self.dropped = 0
+        self.peak_voices = 0
+        self.blocks = 0
+        self.mix_seconds = 0.0
+        self.worst_mix_seconds = 0.0
+
+    def load(self, path):
+        """ Decode a sound so it can be played, returns the name to play it by """
+        name = _key(path)
+        if name not in self.sounds:
+            if self.backend.wants_pcm:
+                samples = decode(path, self.rate)
+                self.lengths[name] = len(samples)
+            else:
+                # the backend loads it itself, only how long it is matters here
+                samples = None
+                self.lengths[name] = frame_count(path, self.rate)
+            self.sounds[name] = samples
+            self.backend.load(name, path)
+        return name
+
+    def load_dir(self, directory, pattern="*.wav"):
+        """ Decode every sound in directory, returns their names. Sounds it can't decode are skipped """
+        names = []
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            try:
+                names.append(self.load(path))
+            except ValueError as ex:
+                print(f"Warning, skipping a sound: {ex}")
+        return names
+
+    def play(self, path, volume=1.0):
+        """ Play a loaded sound once end_frame() is called, same sounds in the same frame count once """
+        name = _key(path)
+        if name not in self.sounds:
+            raise KeyError(f"{path} hasn't been loaded")
+        with self.lock:
+            self.triggers += 1
+            if name in self.pending:
+                self.coalesced += 1
+                volume = max(volume, self.pending[name])
+            self.pending[name] = volume
+
+    def end_frame(self):
+        """ Hand this frame's sounds to the mixer, and let the backend start what the mixer has started """
+        with self.lock:
+            if self.pending:
+                self.frames.append(self.pending)
+                self.pending = {}
+        self.backend.flush()
+
+    def _start_voices(self):
+        with self.lock:
+            frames = list(self.frames)
+            self.frames.clear()
+        for played in frames:
+            for name, volume in played.items():
+                playing = sum(1 for voice in self.voices if voice.name == name)
+                if playing >= self.max_per_sound or len(self.voices) >= self.max_voices:
+                    self.dropped += 1
+                    continue
+                self.voices.append(Voice(name, self.sounds[name], self.lengths[name], volume))
+                self.backend.voice_started(name, volume)
+                self.started += 1
+        self.peak_voices = max(self.peak_voices, len(self.voices))
+
+    def mix(self, frames=None):
+        """ Start the sounds handed over, and mix the next frames of every voice as int16 bytes """
+        start = time.perf_counter()
+        frames = frames or self.block_frames
+        self._start_voices()
+
+        out = np.zeros(frames, np.float32) if self.backend.wants_pcm else None
+        playing = []
+        for voice in self.voices:
+            if out is not None:
+                chunk = voice.samples[voice.position:voice.position + frames]
+                out[:len(chunk)] += chunk * voice.volume
+            voice.position += frames
+            if voice.position < voice.length:
+                playing.append(voice)
+        self.voices = playing
+
+        block = None
+        if out is not None:
+            out *= self.volume * 2 ** 15
+            block = np.clip(out, -2 ** 15, 2 ** 15 - 1).astype("<i2").tobytes()
+
+        seconds = time.perf_counter() - start
+        self.blocks += 1
+        self.mix_seconds += seconds
+        self.worst_mix_seconds = max(self.worst_mix_seconds, seconds)
+        return block
+
+    def _run(self):
+        while not self.closing.is_set():
+            block = self.mix()
+            self.backend.write(block, self.block_frames, self.rate)
+
+    def start(self):
+        """ Start mixing on the mixer thread """
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="sound mixer", daemon=True)
+            self.thread.start()
+
+    def close(self):
+        self.closing.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.backend.close()
+
+    def stats(self):
+        with self.lock:
+            return {"triggers": self.triggers, "coalesced": self.coalesced,
+                    "started": self.started, "dropped": self.dropped,
+                    "voices": len(self.voices), "peak_voices": self.peak_voices,
+                    "blocks": self.blocks,
+                    "mix_ms": self.mix_seconds / max(1, self.blocks) * 1000,
+                    "worst_mix_ms": self.worst_mix_seconds * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play a chain reaction of sounds into a NullBackend")
+    parser.add_argument("--directory", default="sounds")
+    parser.add_argument("--frames", type=int, default=120, help="game frames to run, at 60 a second")
+    parser.add_argument("--burst", type=int, default=12, help="times each sound is played per frame")
+    parser.add_argument("--sounds", type=int, default=3, help="different sounds played per frame")
+    args = parser.parse_args()
+
+    mixer = SoundMixer(NullBackend())
+    start = time.perf_counter()
+    names = mixer.load_dir(args.directory)
+    print(f"decoded {len(names)} sounds in {(time.perf_counter() - start) * 1000:.0f}ms, "
+          f"{sum(mixer.lengths.values()) * 4 / 2 ** 20:.1f}MB of PCM")
+    if not names:
+        return
+
+    mixer.start()
+    worst_frame = 0.0
+    for frame in range(args.frames):
+        frame_start = time.perf_counter()
+        for number in range(args.sounds):
+            for _ in range(args.burst):
+                mixer.play(names[(frame + number) % len(names)])
+        mixer.end_frame()
+        worst_frame = max(worst_frame, time.perf_counter() - frame_start)
+        time.sleep(max(0.0, 1 / 60 - (time.perf_counter() - frame_start)))
+    mixer.close()
+
+    stats = mixer.stats()
+    print(f"{stats['triggers']} plays: {stats['coalesced']} coalesced, "
+          f"{stats['started']} started, {stats['dropped']} dropped at the limits")
+    print(f"peak {stats['peak_voices']} voices, {stats['blocks']} blocks mixed "
+          f"at {stats['mix_ms']:.3f}ms, worst {stats['worst_mix_ms']:.3f}ms")
+    print(f"slowest frame spent {worst_frame * 1000:.3f}ms playing sounds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Uniform grid spatial index
+
+Buckets objects by the grid cells their bounding box overlaps, so a
+collision query only has to look at the handful of objects sharing a
+cell with the thing being tested instead of the whole list.
+
+Anything with left/right/bottom/top attributes can be stored, which
+covers arcade.Sprite as well as plain simulation objects.
+"""
+
+
+class SpatialHash:
+    """
+    Grid of square cells, each holding the objects that overlap it.
+
+    Call rebuild() once per tick after everything has moved, then keep it
+    in sync with insert()/remove() while objects spawn and die during the
+    same tick.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        # (cell_x, cell_y) -> list of objects in that cell
+        self.cells = {}
+        # id(obj) -> cell keys the object was inserted under
+        self.keys_for = {}
+
+    def __len__(self):
+        return len(self.keys_for)
+
+    def __contains__(self, obj):
+        return id(obj) in self.keys_for
+
+    def _cell_keys(self, left, right, bottom, top):
+        """ Cell keys covered by an axis-aligned box """
+        size = self.cell_size
+        min_x = int(left // size)
+        max_x = int(right // size)
+        min_y = int(bottom // size)
+        max_y = int(top // size)
+        return [(cx, cy)
+                for cx in range(min_x, max_x + 1)
+                for cy in range(min_y, max_y + 1)]
+
+    def clear(self):
+        self.cells.clear()
+        self.keys_for.clear()
+
+    def insert(self, obj):
+        """ Add an object under every cell its bounding box touches """
+        self.insert_box(obj, obj.left, obj.right, obj.bottom, obj.top)
+
+    def insert_box(self, obj, left, right, bottom, top):
+        """ Add an object under a bounding box worked out by the caller """
+        keys = self._cell_keys(left, right, bottom, top)
+        self.keys_for[id(obj)] = keys
+        cells = self.cells
+        for key in keys:
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [obj]
+            else:
+                bucket.append(obj)
+
+    def remove(self, obj):
+        """ Drop an object, ignoring ones that were never inserted """
+        keys = self.keys_for.pop(id(obj), None)
+        if keys is None:
+            return
+        cells = self.cells
+        for key in keys:
+            bucket = cells[key]
+            bucket.remove(obj)
+            if not bucket:
+                del cells[key]
+
+    def rebuild(self, objects):
+        """ Throw away the old grid and insert every object again """
+        self.clear()
+        for obj in objects:
+            self.insert(obj)
+
+    def query_box(self, left, right, bottom, top):
+        """
+        Objects sharing a cell with the box, in a stable order and
+        without duplicates. These are only candidates, callers still
+        have to do the exact overlap test.
+        """
+        found = {}
+        cells = self.cells
+        for key in self._cell_keys(left, right, bottom, top):
+            bucket = cells.get(key)
+            if bucket:
+                for obj in bucket:
+                    found[id(obj)] = obj
+        return list(found.values())
+
+    def query(self, obj):
+        """ Candidates near another object's bounding box """
+        return self.query_box(obj.left, obj.right, obj.bottom, obj.top)
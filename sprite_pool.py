@@ -0,0 +1,105 @@
+"""
+Sprite pooling
+
+Building a Sprite means running its constructor and looking up its
+textures, and throwing it away again leaves work for the garbage
+collector. Things that are spawned and destroyed all the time, like
+bullets and asteroid fragments, are handed out from a pool instead and
+given back when they despawn.
+"""
+
+
+class SpritePool:
+    """
+    Recycles sprites made by factory().
+
+    preallocate sprites are built up front. When the pool runs dry it
+    builds more, up to cap sprites in total (None for no limit), after
+    which acquire() returns None.
+    """
+
+    def __init__(self, factory, preallocate=0, cap=None, reset=None):
+        self.factory = factory
+        self.cap = cap
+        # called on every sprite handed back, to clear its old state
+        self.reset = reset
+
+        self.free = []
+        # every sprite this pool has made
+        self.sprites = []
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.in_use = 0
+        self.high_water = 0
+
+        for i in range(preallocate):
+            if cap is not None and self.allocated >= cap:
+                break
+            self.free.append(self._make())
+
+    def _make(self):
+        sprite = self.factory()
+        sprite.pool = self
+        sprite.pool_free = True
+        self.sprites.append(sprite)
+        return sprite
+
+    @property
+    def allocated(self):
+        return len(self.sprites)
+
+    def acquire(self):
+        """ A sprite ready for use, or None if the cap is reached """
+        if self.free:
+            sprite = self.free.pop()
+            self.hits += 1
+        elif self.cap is not None and self.allocated >= self.cap:
+            return None
+        else:
+            sprite = self._make()
+            self.misses += 1
+
+        sprite.pool_free = False
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+
+    def release(self, sprite):
+        """
+        Take a sprite out of all its sprite lists and keep it for reuse.
+        Releasing a sprite twice does nothing.
+        """
+        if sprite.pool_free:
+            return
+        sprite.remove_from_sprite_lists()
+        if self.reset is not None:
+            self.reset(sprite)
+        sprite.pool_free = True
+        self.in_use -= 1
+        self.free.append(sprite)
+
+    def release_all(self):
+        """ Hand back every sprite still out, e.g. when a game restarts """
+        for sprite in self.sprites:
+            self.release(sprite)
+
+    def stats(self):
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "allocated": self.allocated,
+                "in_use": self.in_use,
+                "free": len(self.free),
+                "high_water": self.high_water,
+                "cap": self.cap}
+
+
+def reset_moving_sprite(sprite):
+    """ Clear the motion left over from a sprite's previous life """
+    sprite.change_x = 0
+    sprite.change_y = 0
+    sprite.change_angle = 0
+    sprite.angle = 0
+    sprite.alpha = 255
@@ -9,13 +9,18 @@ Artwork from http://kenney.nl
 If Python and Arcade are installed, this example can be run from the command line with:
 python -m arcade.examples.asteroid_smasher
 """
-import random
 import math
 import arcade
 import os
 
 from typing import cast
 
+from asteroid_field import AsteroidField
+from projectile_field import ProjectileField
+from random_streams import RandomStreams
+from sound_mixer import SoundMixer
+import texture_cache
+
 STARTING_ASTEROID_COUNT = 3
 SCALE = 0.5
 OFFSCREEN_SPACE = 300
@@ -122,11 +127,18 @@ class AsteroidSprite(arcade.Sprite):
     """ Sprite that represents an asteroid. """
 
     def __init__(self, image_file_name, scale):
-        super().__init__(image_file_name, scale=scale)
+        # every split makes new asteroids, share their textures
+        super().__init__(scale=scale)
+        self.texture = texture_cache.load_texture(image_file_name)
+        self.textures = [self.texture]
         self.size = 0
+        # Slot in the AsteroidField moving this sprite, if any.
+        self.field_index = None
 
     def update(self):
-        """ Move the asteroid around. """
+        """ Move the asteroid around, unless an AsteroidField does it. """
+        if self.field_index is not None:
+            return
         super().update()
         if self.center_x < LEFT_LIMIT:
             self.center_x = RIGHT_LIMIT
@@ -146,11 +158,16 @@ class BulletSprite(TurningSprite):
     that aligns to its direction.
     """
 
+    def __init__(self, filename, scale):
+        super().__init__(filename, scale)
+        # Slot in the ProjectileField moving this sprite, if any.
+        self.field_index = None
+
     def update(self):
+        """ Move the bullet, unless a ProjectileField does it. """
+        if self.field_index is not None:
+            return
         super().update()
-        if self.center_x < -100 or self.center_x > 1500 or \
-                self.center_y > 1100 or self.center_y < -100:
-            self.remove_from_sprite_lists()
 
 
 class MyGame(arcade.Window):
@@ -176,17 +193,29 @@ class MyGame(arcade.Window):
         self.bullet_list = arcade.SpriteList()
         self.ship_life_list = arcade.SpriteList()
 
+        # Moves all the asteroids at once
+        self.asteroid_field = AsteroidField(LEFT_LIMIT, RIGHT_LIMIT, BOTTOM_LIMIT, TOP_LIMIT)
+        # And the bullets, dropping them once they are past where the
+        # asteroids wrap and there's nothing left to hit
+        self.bullet_field = ProjectileField(LEFT_LIMIT, RIGHT_LIMIT, BOTTOM_LIMIT, TOP_LIMIT)
+
+        # Where asteroids spawn, how they move and look
+        self.rng = RandomStreams()
+
         # Set up the player
         self.score = 0
         self.player_sprite = None
         self.lives = 3
 
-        # Sounds
-        self.laser_sound = arcade.load_sound(":resources:sounds/hurt5.wav")
-        self.hit_sound1 = arcade.load_sound(":resources:sounds/explosion1.wav")
-        self.hit_sound2 = arcade.load_sound(":resources:sounds/explosion2.wav")
-        self.hit_sound3 = arcade.load_sound(":resources:sounds/hit1.wav")
-        self.hit_sound4 = arcade.load_sound(":resources:sounds/hit2.wav")
+        # Sounds, mixed on their own thread. A chain of splits plays
+        # each one once a frame, however many fragments there are.
+        self.sounds = SoundMixer()
+        self.laser_sound = self.sounds.load(":resources:sounds/hurt5.wav")
+        self.hit_sound1 = self.sounds.load(":resources:sounds/explosion1.wav")
+        self.hit_sound2 = self.sounds.load(":resources:sounds/explosion2.wav")
+        self.hit_sound3 = self.sounds.load(":resources:sounds/hit1.wav")
+        self.hit_sound4 = self.sounds.load(":resources:sounds/hit2.wav")
+        self.sounds.start()
 
     def start_new_game(self):
         """ Set up the game and initialize the variables. """
@@ -199,6 +228,8 @@ class MyGame(arcade.Window):
         self.asteroid_list = arcade.SpriteList()
         self.bullet_list = arcade.SpriteList()
         self.ship_life_list = arcade.SpriteList()
+        self.asteroid_field.clear()
+        self.bullet_field.clear()
 
         # Set up the player
         self.score = 0
@@ -222,20 +253,21 @@ class MyGame(arcade.Window):
                       ":resources:images/space_shooter/meteorGrey_big3.png",
                       ":resources:images/space_shooter/meteorGrey_big4.png")
         for i in range(STARTING_ASTEROID_COUNT):
-            image_no = random.randrange(4)
+            image_no = self.rng.texture.randrange(4)
             enemy_sprite = AsteroidSprite(image_list[image_no], SCALE)
             enemy_sprite.guid = "Asteroid"
 
-            enemy_sprite.center_y = random.randrange(BOTTOM_LIMIT, TOP_LIMIT)
-            enemy_sprite.center_x = random.randrange(LEFT_LIMIT, RIGHT_LIMIT)
+            enemy_sprite.center_y = self.rng.spawn.randrange(BOTTOM_LIMIT, TOP_LIMIT)
+            enemy_sprite.center_x = self.rng.spawn.randrange(LEFT_LIMIT, RIGHT_LIMIT)
 
-            enemy_sprite.change_x = random.random() * 2 - 1
-            enemy_sprite.change_y = random.random() * 2 - 1
+            enemy_sprite.change_x = self.rng.spawn.random() * 2 - 1
+            enemy_sprite.change_y = self.rng.spawn.random() * 2 - 1
 
-            enemy_sprite.change_angle = (random.random() - 0.5) * 2
+            enemy_sprite.change_angle = (self.rng.spawn.random() - 0.5) * 2
             enemy_sprite.size = 4
             self.all_sprites_list.append(enemy_sprite)
             self.asteroid_list.append(enemy_sprite)
+            self.asteroid_field.add(enemy_sprite)
 
     def on_draw(self):
         """
@@ -275,8 +307,9 @@ class MyGame(arcade.Window):
 
             self.all_sprites_list.append(bullet_sprite)
             self.bullet_list.append(bullet_sprite)
+            self.bullet_field.add(bullet_sprite)
 
-            arcade.play_sound(self.laser_sound)
+            self.sounds.play(self.laser_sound)
 
         if symbol == arcade.key.LEFT:
             self.player_sprite.change_angle = 3
@@ -306,7 +339,7 @@ class MyGame(arcade.Window):
 
         if asteroid.size == 4:
             for i in range(3):
-                image_no = random.randrange(2)
+                image_no = self.rng.texture.randrange(2)
                 image_list = [":resources:images/space_shooter/meteorGrey_med1.png",
                               ":resources:images/space_shooter/meteorGrey_med2.png"]
 
@@ -316,19 +349,20 @@ class MyGame(arcade.Window):
                 enemy_sprite.center_y = y
                 enemy_sprite.center_x = x
 
-                enemy_sprite.change_x = random.random() * 2.5 - 1.25
-                enemy_sprite.change_y = random.random() * 2.5 - 1.25
+                enemy_sprite.change_x = self.rng.split.random() * 2.5 - 1.25
+                enemy_sprite.change_y = self.rng.split.random() * 2.5 - 1.25
 
-                enemy_sprite.change_angle = (random.random() - 0.5) * 2
+                enemy_sprite.change_angle = (self.rng.split.random() - 0.5) * 2
                 enemy_sprite.size = 3
 
                 self.all_sprites_list.append(enemy_sprite)
                 self.asteroid_list.append(enemy_sprite)
-                self.hit_sound1.play()
+                self.asteroid_field.add(enemy_sprite)
+                self.sounds.play(self.hit_sound1)
 
         elif asteroid.size == 3:
             for i in range(3):
-                image_no = random.randrange(2)
+                image_no = self.rng.texture.randrange(2)
                 image_list = [":resources:images/space_shooter/meteorGrey_small1.png",
                               ":resources:images/space_shooter/meteorGrey_small2.png"]
 
@@ -338,19 +372,20 @@ class MyGame(arcade.Window):
                 enemy_sprite.center_y = y
                 enemy_sprite.center_x = x
 
-                enemy_sprite.change_x = random.random() * 3 - 1.5
-                enemy_sprite.change_y = random.random() * 3 - 1.5
+                enemy_sprite.change_x = self.rng.split.random() * 3 - 1.5
+                enemy_sprite.change_y = self.rng.split.random() * 3 - 1.5
 
-                enemy_sprite.change_angle = (random.random() - 0.5) * 2
+                enemy_sprite.change_angle = (self.rng.split.random() - 0.5) * 2
                 enemy_sprite.size = 2
 
                 self.all_sprites_list.append(enemy_sprite)
                 self.asteroid_list.append(enemy_sprite)
-                self.hit_sound2.play()
+                self.asteroid_field.add(enemy_sprite)
+                self.sounds.play(self.hit_sound2)
 
         elif asteroid.size == 2:
             for i in range(3):
-                image_no = random.randrange(2)
+                image_no = self.rng.texture.randrange(2)
                 image_list = [":resources:images/space_shooter/meteorGrey_tiny1.png",
                               ":resources:images/space_shooter/meteorGrey_tiny2.png"]
 
@@ -360,18 +395,19 @@ class MyGame(arcade.Window):
                 enemy_sprite.center_y = y
                 enemy_sprite.center_x = x
 
-                enemy_sprite.change_x = random.random() * 3.5 - 1.75
-                enemy_sprite.change_y = random.random() * 3.5 - 1.75
+                enemy_sprite.change_x = self.rng.split.random() * 3.5 - 1.75
+                enemy_sprite.change_y = self.rng.split.random() * 3.5 - 1.75
 
-                enemy_sprite.change_angle = (random.random() - 0.5) * 2
+                enemy_sprite.change_angle = (self.rng.split.random() - 0.5) * 2
                 enemy_sprite.size = 1
 
                 self.all_sprites_list.append(enemy_sprite)
                 self.asteroid_list.append(enemy_sprite)
-                self.hit_sound3.play()
+                self.asteroid_field.add(enemy_sprite)
+                self.sounds.play(self.hit_sound3)
 
         elif asteroid.size == 1:
-            self.hit_sound4.play()
+            self.sounds.play(self.hit_sound4)
 
     def on_update(self, x):
         """ Move everything """
@@ -381,6 +417,17 @@ class MyGame(arcade.Window):
         if not self.game_over:
             self.all_sprites_list.update()
 
+            # Move the asteroids in one go, the collision checks below
+            # need every sprite in the right place.
+            self.asteroid_field.step()
+            self.asteroid_field.sync_all()
+
+            # Same for the bullets, only the ones that flew off are
+            # taken out of the sprite lists
+            for bullet in self.bullet_field.step():
+                bullet.remove_from_sprite_lists()
+            self.bullet_field.sync_all()
+
             for bullet in self.bullet_list:
                 asteroids_plain = arcade.check_for_collision_with_list(bullet, self.asteroid_list)
                 asteroids_spatial = arcade.check_for_collision_with_list(bullet, self.asteroid_list)
@@ -391,7 +438,9 @@ class MyGame(arcade.Window):
 
                 for asteroid in asteroids:
                     self.split_asteroid(cast(AsteroidSprite, asteroid))  # expected AsteroidSprite, got Sprite instead
+                    self.asteroid_field.remove(asteroid)
                     asteroid.remove_from_sprite_lists()
+                    self.bullet_field.remove(bullet)
                     bullet.remove_from_sprite_lists()
 
             if not self.player_sprite.respawning:
@@ -401,6 +450,7 @@ class MyGame(arcade.Window):
                         self.lives -= 1
                         self.player_sprite.respawn()
                         self.split_asteroid(cast(AsteroidSprite, asteroids[0]))
+                        self.asteroid_field.remove(asteroids[0])
                         asteroids[0].remove_from_sprite_lists()
                         self.ship_life_list.pop().remove_from_sprite_lists()
                         print("Crash")
@@ -408,6 +458,12 @@ class MyGame(arcade.Window):
                         self.game_over = True
                         print("Game over")
 
+        self.sounds.end_frame()
+
+    def on_close(self):
+        self.sounds.close()
+        super().on_close()
+
 
 def main():
     window = MyGame()
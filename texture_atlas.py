@@ -0,0 +1,284 @@
+"""
+Texture atlases
+
+The platformer's sprites come from a couple of hundred small PNGs, each
+opened and decoded on its own the first time something uses it. The
+atlas builder packs every image in SOURCE_DIRS into a few big sheets
+in images/atlas/, with a manifest.json saying where each original ended
+up:
+
+    {"atlases": ["atlas_0.png", ...],
+     "images": {"images/tiles/grassMid.png":
+                    {"atlas": 0, "x": 0, "y": 0, "width": 128, "height": 128,
+                     "uv": [u0, v0, u1, v1], "hit_box": [[x, y], ...]}, ...},
+     "sources": {"images/tiles/grassMid.png": [mtime_ns, size], ...}}
+
+uv is the same rectangle as a fraction of the sheet, (0, 0) top left.
+hit_box is what arcade would work out from the image's pixels every
+time it loads it, which is most of the cost of loading a tile.
+
+load_sprite() and generate_sprites() stand in for arcade.Sprite(path,
+scale) and arcade.generate_sprites(). They cut images out of the sheets
+instead, so each sheet is decoded once and no hit box is worked out
+again. Sheets are decoded through texture_cache, so they count towards
+its budget, and images that aren't in the atlas are loaded from it.
+
+The first call builds the atlas if it is missing or any source image
+has changed since, python texture_atlas.py builds it ahead of time.
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+
+import arcade
+import PIL.Image
+
+import texture_cache
+
+ATLAS_DIR = os.path.join("images", "atlas")
+SOURCE_DIRS = ("images/tiles", "images/items", "images/enemies", "images/player_1", "images/alien")
+MANIFEST = "manifest.json"
+MAX_SIZE = 2048
+# empty pixels around each image, so filtering never samples a neighbour
+PADDING = 2
+
+
+def _key(path):
+    """ The name a path is filed under in the manifest """
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def find_images(source_dirs=SOURCE_DIRS):
+    paths = []
+    for directory in source_dirs:
+        paths.extend(glob.glob(os.path.join(directory, "*.png")))
+    return sorted(_key(path) for path in paths)
+
+
+def _source_stats(paths):
+    stats = {}
+    for path in paths:
+        stat = os.stat(path)
+        stats[path] = [stat.st_mtime_ns, stat.st_size]
+    return stats
+
+
+def pack(sizes, max_size=MAX_SIZE, padding=PADDING):
+    """
+    Shelf pack (width, height) boxes into max_size square sheets,
+    returns [(sheet, x, y)] in the order of sizes and each sheet's
+    (width, height)
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    places = [None] * len(sizes)
+    sheets = []
+    x = y = shelf_height = 0
+    for i in order:
+        width, height = sizes[i][0] + padding * 2, sizes[i][1] + padding * 2
+        if width > max_size or height > max_size:
+            raise ValueError(f"A {sizes[i]} image doesn't fit in a {max_size} atlas")
+        if not sheets or x + width > max_size:
+            # next shelf, or next sheet if this one is full
+            y += shelf_height
+            x = shelf_height = 0
+            if not sheets or y + height > max_size:
+                sheets.append([0, 0])
+                y = 0
+        places[i] = (len(sheets) - 1, x + padding, y + padding)
+        x += width
+        shelf_height = max(shelf_height, height)
+        sheet = sheets[-1]
+        sheet[0] = max(sheet[0], x)
+        sheet[1] = max(sheet[1], y + shelf_height)
+    return places, [tuple(sheet) for sheet in sheets]
+
+
+def build(source_dirs=SOURCE_DIRS, out_dir=ATLAS_DIR, max_size=MAX_SIZE, padding=PADDING):
+    """ Pack the images in source_dirs into out_dir, returns the manifest """
+    paths = find_images(source_dirs)
+    images = [PIL.Image.open(path).convert("RGBA") for path in paths]
+    places, sheet_sizes = pack([image.size for image in images], max_size, padding)
+
+    sheets = [PIL.Image.new("RGBA", size) for size in sheet_sizes]
+    entries = {}
+    for path, image, (sheet, x, y) in zip(paths, images, places):
+        sheets[sheet].paste(image, (x, y))
+        sheet_width, sheet_height = sheet_sizes[sheet]
+        entries[path] = {"atlas": sheet, "x": x, "y": y,
+                         "width": image.width, "height": image.height,
+                         "uv": [x / sheet_width, y / sheet_height,
+                                (x + image.width) / sheet_width,
+                                (y + image.height) / sheet_height],
+                         "hit_box": [list(point) for point in arcade.calculate_points(image)]}
+
+    os.makedirs(out_dir, exist_ok=True)
+    names = []
+    for number, sheet in enumerate(sheets):
+        names.append(f"atlas_{number}.png")
+        sheet.save(os.path.join(out_dir, names[-1]))
+    manifest = {"atlases": names, "images": entries,
+                "sources": _source_stats(paths), "source_dirs": list(source_dirs)}
+    # write then rename, so nobody reads half a manifest
+    temp_path = os.path.join(out_dir, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(temp_path, "w") as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(temp_path, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+def read_manifest(out_dir=ATLAS_DIR):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_stale(manifest, source_dirs=SOURCE_DIRS, out_dir=ATLAS_DIR):
+    """ Whether the atlas is missing or any source image was added, removed or changed """
+    if manifest is None or manifest.get("source_dirs") != list(source_dirs):
+        return True
+    if not all(os.path.exists(os.path.join(out_dir, name)) for name in manifest["atlases"]):
+        return True
+    paths = find_images(source_dirs)
+    return _source_stats(paths) != manifest["sources"]
+
+
+class TextureAtlas:
+    """ Sprites and textures cut out of a built atlas """
+
+    def __init__(self, manifest, out_dir=ATLAS_DIR):
+        self.manifest = manifest
+        self.entries = manifest["images"]
+        self.sheet_paths = [os.path.join(out_dir, name) for name in manifest["atlases"]]
+        # path -> Texture cut out of its sheet
+        self.textures = {}
+        # sprites are made on loader threads too
+        self.lock = threading.Lock()
+
+    def __contains__(self, path):
+        return _key(path) in self.entries
+
+    def _cut(self, key, entry):
+        sheet = texture_cache.load_image(self.sheet_paths[entry["atlas"]])
+        x, y = entry["x"], entry["y"]
+        texture = arcade.Texture(key, sheet.crop((x, y, x + entry["width"], y + entry["height"])))
+        texture.hit_box_points = tuple(tuple(point) for point in entry["hit_box"])
+        return texture
+
+    def texture(self, path):
+        """ arcade.load_texture(path), from the atlas if it is in it """
+        key = _key(path)
+        texture = self.textures.get(key)
+        if texture is not None:
+            return texture
+        entry = self.entries.get(key)
+        if entry is None:
+            return texture_cache.load_texture(path)
+        with self.lock:
+            texture = self.textures.get(key)
+            if texture is None:
+                texture = self.textures[key] = self._cut(key, entry)
+        return texture
+
+    def sprite(self, path, scale=1):
+        """ arcade.Sprite(path, scale), from the atlas if it is in it """
+        if _key(path) not in self.entries:
+            return texture_cache.load_sprite(path, scale)
+        sprite = arcade.Sprite(scale=scale)
+        sprite.texture = self.texture(path)
+        sprite.textures = [sprite.texture]
+        return sprite
+
+    def generate_sprites(self, my_map, layer_name, scaling, base_directory=""):
+        """ arcade.generate_sprites(), with the tiles' images from the atlas """
+        sprite_list = arcade.SpriteList()
+
+        if layer_name not in my_map.layers_int_data:
+            print(f"Warning, no layer named '{layer_name}'.")
+            return sprite_list
+
+        tile_width = my_map.tilewidth * scaling
+        tile_height = my_map.tileheight * scaling
+        for row_index, row in enumerate(my_map.layers_int_data[layer_name]):
+            for column_index, item in enumerate(row):
+                tile_info = my_map.global_tile_set.get(str(item))
+                if tile_info is None:
+                    if item != 0:
+                        print(f"Warning, could not find {item} image to load.")
+                    continue
+                my_sprite = self.sprite(base_directory + tile_info.source, scaling)
+                my_sprite.center_x = column_index * tile_width - tile_width / 2
+                my_sprite.center_y = (my_map.height - row_index) * tile_height - tile_height / 2
+                if tile_info.points is not None:
+                    my_sprite.set_points(tile_info.points)
+                sprite_list.append(my_sprite)
+        return sprite_list
+
+
+_default = None
+# levels are built on a loader thread too
+_default_lock = threading.Lock()
+
+
+def default_atlas():
+    """ The atlas in ATLAS_DIR, built first if it is out of date """
+    global _default
+    with _default_lock:
+        if _default is None:
+            manifest = read_manifest()
+            if is_stale(manifest):
+                manifest = build()
+            _default = TextureAtlas(manifest)
+        return _default
+
+
+def load_sprite(path, scale=1):
+    return default_atlas().sprite(path, scale)
+
+
+def load_texture(path):
+    return default_atlas().texture(path)
+
+
+def generate_sprites(my_map, layer_name, scaling, base_directory=""):
+    return default_atlas().generate_sprites(my_map, layer_name, scaling, base_directory)
+
+
+def check(atlas):
+    """ Compare every image in the atlas with its source, returns the paths that differ """
+    wrong = []
+    for path in atlas.entries:
+        original = PIL.Image.open(path).convert("RGBA")
+        if atlas.texture(path).image.tobytes() != original.tobytes():
+            wrong.append(path)
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the game's images into texture atlases")
+    parser.add_argument("--max-size", type=int, default=MAX_SIZE)
+    parser.add_argument("--padding", type=int, default=PADDING)
+    parser.add_argument("--check", action="store_true",
+                        help="check every packed image against its source file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build(max_size=args.max_size, padding=args.padding)
+    print(f"packed {len(manifest['images'])} images into {len(manifest['atlases'])} atlases "
+          f"in {time.perf_counter() - start:.2f}s")
+    for name in manifest["atlases"]:
+        with PIL.Image.open(os.path.join(ATLAS_DIR, name)) as sheet:
+            print(f"    {name} {sheet.width}x{sheet.height}")
+
+    if args.check:
+        wrong = check(TextureAtlas(manifest))
+        print("all images match" if not wrong else f"{len(wrong)} images differ: {wrong}")
+
+
+if __name__ == "__main__":
+    main()
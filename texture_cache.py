@@ -0,0 +1,286 @@
+"""
+Texture cache
+
+arcade.load_texture() keeps every texture it ever made, works out a new
+hit box for each one and isn't meant to be called from two threads at
+once. A TextureCache hands out textures the same way, but:
+
+- each image file is decoded once and shared by every texture made
+  from it, however many sprites use them, read out of the asset pack
+  if there is one (see asset_pack.py)
+- hit boxes are worked out once per image and hit box mode
+- decoded images are kept within a memory budget, the least recently
+  used ones are dropped first, along with the textures made from them
+- loader threads can call it at the same time as the game, and two
+  threads asking for the same image still only decode it once
+
+Textures are filed by path and hit box mode:
+
+    "detailed"  the outline arcade.load_texture() would work out
+    "simple"    the box around the image's non transparent pixels
+    "none"      the whole image
+
+Scale isn't part of the key. An arcade texture is the same at every
+scale, sprites scale it and its hit box when they draw and collide, so
+keying on it would only keep copies. sprite() takes a scale and hands
+each sprite the shared texture.
+
+A texture that was dropped keeps working for the sprites that have it,
+the cache just makes a new one the next time it is asked for.
+
+    wall = texture_cache.load_sprite("images/tiles/grassMid.png", TILE_SCALING)
+    print(texture_cache.stats())
+
+python texture_cache.py loads a set of images over and over, from
+several threads if asked, and prints how the cache did.
+"""
+
+import argparse
+import collections
+import glob
+import os
+import threading
+import time
+
+import arcade
+import PIL.Image
+
+import asset_pack
+
+# how much decoded image data the default cache keeps
+DEFAULT_BUDGET = 64 * 1024 * 1024
+HIT_BOX_MODES = ("detailed", "simple", "none")
+
+
+def _key(path):
+    """ The name a path is filed under """
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def _resolve(path):
+    """ The file a path names, arcade's :resources: paths included """
+    if path.startswith(":resources:"):
+        return os.path.join(os.path.dirname(os.path.abspath(arcade.__file__)),
+                            "resources", path[len(":resources:"):])
+    return path
+
+
+def _rectangle(left, top, right, bottom, width, height):
+    """ Hit box points of an image rectangle, from the image's center, y up """
+    return ((left - width / 2, height / 2 - bottom), (right - width / 2, height / 2 - bottom),
+            (right - width / 2, height / 2 - top), (left - width / 2, height / 2 - top))
+
+
+def hit_box(image, mode="detailed"):
+    """ The hit box points of an image, worked out the way mode says """
+    if mode == "detailed":
+        return arcade.calculate_points(image)
+    if mode == "simple":
+        box = image.getchannel("A").getbbox() or (0, 0, image.width, image.height)
+        return _rectangle(*box, image.width, image.height)
+    if mode == "none":
+        return _rectangle(0, 0, image.width, image.height, image.width, image.height)
+    raise ValueError(f"Unknown hit box mode {mode!r}, expected one of {HIT_BOX_MODES}")
+
+
+class TextureCache:
+    """ Decoded images and the textures made from them, within budget bytes """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        # path -> decoded image, least recently used first
+        self.images = collections.OrderedDict()
+        # path -> {hit box mode -> Texture}
+        self.textures = {}
+        # bytes of decoded image held
+        self.bytes = 0
+        # key -> Event set once the thread loading it is done
+        self.loading = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.evictions = 0
+        self.peak_bytes = 0
+
+    def __contains__(self, path):
+        return _key(path) in self.images
+
+    def __len__(self):
+        return len(self.images)
+
+    def _once(self, key, find, make):
+        """
+        find() under the lock, or make() it if no other thread already
+        is, or wait for the thread that is and look again
+        """
+        while True:
+            with self.lock:
+                found = find()
+                if found is not None:
+                    return found, False
+                event = self.loading.get(key)
+                if event is None:
+                    event = self.loading[key] = threading.Event()
+                    break
+            event.wait()
+        try:
+            return make(), True
+        finally:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+
+    def _evict(self):
+        """ Drop least recently used images until within budget, keeps the newest one """
+        while self.bytes > self.budget and len(self.images) > 1:
+            path, image = self.images.popitem(last=False)
+            self.textures.pop(path, None)
+            self.bytes -= image.width * image.height * len(image.getbands())
+            self.evictions += 1
+
+    def set_budget(self, budget):
+        with self.lock:
+            self.budget = budget
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.textures.clear()
+            self.bytes = 0
+
+    def image(self, path):
+        """ The decoded RGBA image in path, shared, don't change it """
+        key = _key(path)
+
+        def find():
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+            return image
+
+        def make():
+            with asset_pack.open_asset(_resolve(path)) as file:
+                image = PIL.Image.open(file).convert("RGBA")
+            with self.lock:
+                self.decodes += 1
+                self.images[key] = image
+                self.bytes += image.width * image.height * len(image.getbands())
+                self.peak_bytes = max(self.peak_bytes, self.bytes)
+                self._evict()
+            return image
+
+        return self._once(("image", key), find, make)[0]
+
+    def texture(self, path, hit_box_mode="detailed"):
+        """ arcade.load_texture(path), with its hit box worked out the way hit_box_mode says """
+        if hit_box_mode not in HIT_BOX_MODES:
+            raise ValueError(f"Unknown hit box mode {hit_box_mode!r}, expected one of {HIT_BOX_MODES}")
+        key = _key(path)
+
+        def find():
+            texture = self.textures.get(key, {}).get(hit_box_mode)
+            if texture is not None:
+                self.images.move_to_end(key)
+            return texture
+
+        def make():
+            image = self.image(path)
+            texture = arcade.Texture(key, image)
+            texture.hit_box_points = hit_box(image, hit_box_mode)
+            with self.lock:
+                # only keep it while its image is, or eviction can't free it
+                if key in self.images:
+                    self.textures.setdefault(key, {})[hit_box_mode] = texture
+            return texture
+
+        texture, made = self._once(("texture", key, hit_box_mode), find, make)
+        with self.lock:
+            if made:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return texture
+
+    def sprite(self, path, scale=1, hit_box_mode="detailed"):
+        """ arcade.Sprite(path, scale), with the cached texture """
+        sprite = arcade.Sprite(scale=scale)
+        sprite.texture = self.texture(path, hit_box_mode)
+        sprite.textures = [sprite.texture]
+        return sprite
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "decodes": self.decodes,
+                    "evictions": self.evictions, "images": len(self.images),
+                    "bytes": self.bytes, "peak_bytes": self.peak_bytes, "budget": self.budget}
+
+
+_default = TextureCache()
+
+
+def default_cache():
+    """ The cache every load_* function shares """
+    return _default
+
+
+def set_budget(budget):
+    _default.set_budget(budget)
+
+
+def load_image(path):
+    return _default.image(path)
+
+
+def load_texture(path, hit_box_mode="detailed"):
+    return _default.texture(path, hit_box_mode)
+
+
+def load_sprite(path, scale=1, hit_box_mode="detailed"):
+    return _default.sprite(path, scale, hit_box_mode)
+
+
+def stats():
+    return _default.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load images through a texture cache and print how it did")
+    parser.add_argument("patterns", nargs="*", default=["images/tiles/*.png", "images/items/*.png"])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET / 2 ** 20, help="budget in MB")
+    parser.add_argument("--rounds", type=int, default=5, help="times to load every image")
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in args.patterns for path in glob.glob(pattern))
+    if not paths:
+        parser.error("no images match")
+    cache = TextureCache(int(args.budget * 2 ** 20))
+
+    def load():
+        for _ in range(args.rounds):
+            for path in paths:
+                cache.sprite(path, 0.5)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=load) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    stats = cache.stats()
+    loads = stats["hits"] + stats["misses"]
+    print(f"{len(paths)} images x {args.rounds} rounds x {args.threads} threads: "
+          f"{loads} loads in {seconds * 1000:.0f}ms ({seconds / loads * 1e6:.0f}us each)")
+    print(f"    {stats['hits']} hits, {stats['misses']} misses, {stats['decodes']} decodes, "
+          f"{stats['evictions']} evictions")
+    print(f"    {stats['bytes'] / 2 ** 20:.1f}MB held, {stats['peak_bytes'] / 2 ** 20:.1f}MB peak, "
+          f"{stats['budget'] / 2 ** 20:.1f}MB budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Chunked sprite lists
+
+A tile layer as one SpriteList gets drawn, all of it, every frame, even
+though only a screen's worth of it can be seen. A ChunkedSpriteList
+splits the sprites into square chunks by where their centers are, each
+chunk its own SpriteList, and only draws the chunks near the view:
+
+    chunks = ChunkedSpriteList(wall_list, chunk_size=1024, margin=64)
+    chunks.draw(view_left, view_left + SCREEN_WIDTH,
+                view_bottom, view_bottom + SCREEN_HEIGHT)
+
+The sprites stay in the list they came from too, so collisions and
+physics carry on using that. remove_from_sprite_lists() takes a sprite
+out of its chunk as well, make the chunks with is_static=False for a
+layer where that happens.
+
+A sprite sticks out of its chunk by up to half its size, margin should
+be at least that so edge tiles don't pop in late.
+"""
+
+import math
+
+import arcade
+
+
+def chunk_key(sprite, chunk_size):
+    """ (column, row) of the chunk the sprite's center is in """
+    return (math.floor(sprite.center_x / chunk_size),
+            math.floor(sprite.center_y / chunk_size))
+
+
+class ChunkedSpriteList:
+    """
+    The sprites of a sprite list by chunk. A chunk is a SpriteList of
+    the sprites whose centers are in one chunk_size square, (column,
+    row) counted from the origin. Chunks are is_static by default, their
+    sprites are expected to stay put. Pass is_static=False for sprites
+    that get taken out while playing, like coins, or every removal
+    rebuilds a static buffer.
+    """
+
+    def __init__(self, sprite_list, chunk_size, margin=0, is_static=True):
+        self.sprite_list = sprite_list
+        self.chunk_size = chunk_size
+        self.margin = margin
+        # (column, row) -> SpriteList of the sprites centered in that chunk
+        self.chunks = {}
+        for sprite in sprite_list:
+            key = chunk_key(sprite, chunk_size)
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = self.chunks[key] = arcade.SpriteList(is_static=is_static)
+            chunk.append(sprite)
+        # how many chunks the last draw() or update() got through
+        self.visible = 0
+
+    def __len__(self):
+        return len(self.sprite_list)
+
+    def visible_chunks(self, left, right, bottom, top):
+        """ The chunks that overlap the rectangle, grown by margin """
+        size = self.chunk_size
+        margin = self.margin
+        first_column = math.floor((left - margin) / size)
+        last_column = math.floor((right + margin) / size)
+        first_row = math.floor((bottom - margin) / size)
+        last_row = math.floor((top + margin) / size)
+
+        chunks = self.chunks
+        if (last_column - first_column + 1) * (last_row - first_row + 1) > len(chunks):
+            # zoomed out past the map, cheaper to check every chunk
+            found = [chunk for (column, row), chunk in chunks.items()
+                     if first_column <= column <= last_column and first_row <= row <= last_row]
+        else:
+            found = []
+            for column in range(first_column, last_column + 1):
+                for row in range(first_row, last_row + 1):
+                    chunk = chunks.get((column, row))
+                    if chunk is not None:
+                        found.append(chunk)
+        self.visible = len(found)
+        return found
+
+    def draw(self, left, right, bottom, top):
+        for chunk in self.visible_chunks(left, right, bottom, top):
+            chunk.draw()
+
+    def update(self, left, right, bottom, top):
+        for chunk in self.visible_chunks(left, right, bottom, top):
+            chunk.update()
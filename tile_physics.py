@@ -0,0 +1,320 @@
+"""
+Tile grid physics
+
+arcade.PhysicsEnginePlatformer checks the player against every sprite
+in the wall list, several times a step. The walls of a tiled map are a
+grid though, so the only walls the player can be touching are the ones
+in the few cells around it. GridPhysicsEngine moves the player with
+the same steps as arcade's engine, pushing it out of walls it starts
+in, nudging it a pixel or a quarter pixel at a time and running up
+ramps, with the same polygon tests against the player's own hit box.
+It only ever tests the walls in the cells around the player though,
+taken straight off the map layer's tile ids, so a step costs the same
+on a map of 40 columns as on one of 40,000, and the player ends up in
+the same place as with arcade's engine.
+
+A wall sprite is only made for a cell the first time the player comes
+near it.
+
+    grid = TileGrid(my_map, "Platforms", TILE_SCALING)
+    engine = GridPhysicsEngine(player_sprite, grid, GRAVITY)
+    if engine.can_jump(): ...
+    engine.update()
+
+python tile_physics.py runs both engines side by side over the same
+inputs on the platformer's maps, prints how long a step takes with each
+and the first tick, if any, where the player isn't in the same place.
+"""
+
+import argparse
+import math
+import time
+import warnings
+
+import arcade
+
+import texture_atlas
+from level_cache import load_level
+
+# slack on the bounding box check that picks the walls worth a polygon test
+EPSILON = 1e-6
+
+
+class TileGrid:
+    """
+    The solid tiles of one map layer, with the same positions, images
+    and hit boxes generate_sprites gives their sprites
+    """
+
+    def __init__(self, my_map, layer_name, scaling):
+        self.columns = my_map.width
+        self.rows = my_map.height
+        self.scaling = scaling
+        self.cell_width = my_map.tilewidth * scaling
+        self.cell_height = my_map.tileheight * scaling
+
+        # tile ids, row after row from the top, 0 for nothing
+        tiles = getattr(my_map, "layer_arrays", {}).get(layer_name)
+        if tiles is None:
+            tiles = [item for row in my_map.layers_int_data[layer_name] for item in row]
+        self.tiles = tiles
+
+        # tile id -> the map's tile info, what its sprites are made from
+        self.tile_info = {}
+        # tile id -> (left, right, bottom, top) of its hit box, from its center
+        self.boxes = {}
+        for tile_id in set(tiles) - {0}:
+            tile = my_map.global_tile_set.get(str(tile_id))
+            if tile is None:
+                continue
+            self.tile_info[tile_id] = tile
+            sprite = self._make_sprite(tile)
+            self.boxes[tile_id] = (sprite.left, sprite.right, sprite.bottom, sprite.top)
+
+        # index into tiles -> its wall sprite, made the first time it's needed
+        self.sprites = {}
+
+    def __len__(self):
+        """ How many solid tiles there are """
+        return sum(1 for tile_id in self.tiles if tile_id in self.boxes)
+
+    def _make_sprite(self, tile):
+        sprite = texture_atlas.load_sprite(tile.source, self.scaling)
+        if tile.points is not None:
+            sprite.set_points(tile.points)
+        return sprite
+
+    def cell_center(self, column, row):
+        """ Where generate_sprites puts the center of a tile, worked out the same way """
+        return (column * self.cell_width - self.cell_width / 2,
+                (self.rows - row) * self.cell_height - self.cell_height / 2)
+
+    def sprite(self, column, row):
+        """ The wall sprite in a cell, like the one generate_sprites makes for it """
+        index = row * self.columns + column
+        sprite = self.sprites.get(index)
+        if sprite is None:
+            sprite = self._make_sprite(self.tile_info[self.tiles[index]])
+            sprite.center_x, sprite.center_y = self.cell_center(column, row)
+            self.sprites[index] = sprite
+        return sprite
+
+    def walls_near(self, left, right, bottom, top):
+        """
+        The wall sprites whose hit box's bounding box touches the box,
+        in the order generate_sprites would list them
+        """
+        # generate_sprites puts column 0 half a tile left of x = 0, and
+        # a cell either side catches hit boxes poking out of their cell
+        first_column = max(0, math.floor(left / self.cell_width))
+        last_column = min(self.columns - 1, math.floor(right / self.cell_width) + 2)
+        first_row = max(0, self.rows - 2 - math.floor(top / self.cell_height))
+        last_row = min(self.rows - 1, self.rows - math.floor(bottom / self.cell_height))
+
+        walls = []
+        tiles = self.tiles
+        boxes = self.boxes
+        for row in range(first_row, last_row + 1):
+            start = row * self.columns
+            for column in range(first_column, last_column + 1):
+                box = boxes.get(tiles[start + column])
+                if box is None:
+                    continue
+                center_x, center_y = self.cell_center(column, row)
+                if (center_x + box[0] <= right + EPSILON and center_x + box[1] >= left - EPSILON
+                        and center_y + box[2] <= top + EPSILON and center_y + box[3] >= bottom - EPSILON):
+                    walls.append(self.sprite(column, row))
+        return walls
+
+
+class GridPhysicsEngine:
+    """
+    Gravity, walls and jumping for one sprite on a TileGrid, a drop in
+    for arcade.PhysicsEnginePlatformer without ladders, moving platforms
+    or multi-jump. The steps are arcade's own, see arcade's
+    physics_engines._move_sprite, with its wall list checks swapped for
+    checks against the walls around the player.
+    """
+
+    def __init__(self, player_sprite, grid, gravity_constant=0.5):
+        self.player_sprite = player_sprite
+        self.grid = grid
+        self.gravity_constant = gravity_constant
+
+    def _hits(self):
+        """ check_for_collision_with_list(player, walls), only looking near the player """
+        player = self.player_sprite
+        points = player.get_adjusted_hit_box()
+        xs = [x for x, y in points]
+        ys = [y for x, y in points]
+        return [wall for wall in self.grid.walls_near(min(xs), max(xs), min(ys), max(ys))
+                if arcade.check_for_collision(player, wall)]
+
+    def is_on_ladder(self):
+        return False
+
+    def can_jump(self, y_distance=5):
+        """ Whether there is a floor within y_distance under the player """
+        # moved down and back up, like arcade does, rounding and all
+        player = self.player_sprite
+        player.center_y -= y_distance
+        hits = self._hits()
+        player.center_y += y_distance
+        return bool(hits)
+
+    def jump(self, velocity):
+        self.player_sprite.change_y = velocity
+
+    def _push_out(self):
+        """ Try further and further away in eight directions for a spot clear of walls """
+        player = self.player_sprite
+        original_x = player.center_x
+        original_y = player.center_y
+
+        vary = 1
+        while True:
+            for x, y in ((original_x, original_y + vary), (original_x, original_y - vary),
+                         (original_x + vary, original_y), (original_x - vary, original_y),
+                         (original_x + vary, original_y + vary), (original_x + vary, original_y - vary),
+                         (original_x - vary, original_y + vary), (original_x - vary, original_y - vary)):
+                player.center_x = x
+                player.center_y = y
+                if not self._hits():
+                    return
+            vary *= 2
+
+    def update(self):
+        """ Move the player a step and stop it at walls, returns the wall sprites it hit """
+        player = self.player_sprite
+        player.change_y -= self.gravity_constant
+        player.angle += player.change_angle
+
+        # Starting inside a wall, e.g. spawned overlapping one
+        if self._hits():
+            self._push_out()
+
+        # Up or down first, so landing on a floor doesn't count as a wall
+        player.center_y += player.change_y
+        hits = self._hits()
+        if hits:
+            if player.change_y > 0:
+                while self._hits():
+                    player.center_y -= 1
+            elif player.change_y < 0:
+                for wall in hits:
+                    while arcade.check_for_collision(player, wall):
+                        player.center_y += 0.25
+            player.change_y = min(0.0, hits[0].change_y)
+        player.center_y = round(player.center_y, 2)
+
+        # Then sideways, running up ramps if there's room
+        player.center_x += player.change_x
+        check_again = True
+        while check_again:
+            check_again = False
+            side_hits = self._hits()
+            for wall in side_hits:
+                if wall not in hits:
+                    hits.append(wall)
+            if not side_hits:
+                continue
+
+            change_x = player.change_x
+            if change_x > 0:
+                for _ in side_hits:
+                    player.center_y += change_x
+                    if self._hits():
+                        player.center_y -= change_x
+                        player.center_x -= 1
+                        check_again = True
+                        break
+            elif change_x < 0:
+                for wall in side_hits:
+                    player.center_y -= change_x
+                    if self._hits():
+                        player.center_y += change_x
+                        player.left = max(wall.right, player.left)
+                        check_again = True
+                        break
+        return hits
+
+
+def widen(my_map, times):
+    """ The map with its layers repeated times over side by side, to make a long level """
+    for name, rows in my_map.layers_int_data.items():
+        my_map.layers_int_data[name] = [list(row) * times for row in rows]
+    my_map.width *= times
+    if hasattr(my_map, "layer_arrays"):
+        del my_map.layer_arrays
+    return my_map
+
+
+def benchmark(tmx_file, ticks, times=1, scaling=0.5, gravity=1):
+    """
+    Run right with both engines side by side, jumping whenever possible
+    every so often. Returns how many walls there are, {engine name:
+    (seconds per step, x, y)} and the first tick the two players weren't
+    in the same place or moving the same way, None if they always were.
+    """
+    my_map = widen(load_level(tmx_file, scaling), times)
+    walls = texture_atlas.generate_sprites(my_map, "Platforms", scaling)
+    grid = TileGrid(my_map, "Platforms", scaling)
+
+    engines = {}
+    for name in ("sprites", "grid"):
+        player = texture_atlas.load_sprite("images/player_1/player_stand.png", 1)
+        player.center_x = 64
+        player.center_y = 94
+        player.change_x = 5
+        if name == "sprites":
+            engines[name] = arcade.PhysicsEnginePlatformer(player, walls, gravity)
+        else:
+            engines[name] = GridPhysicsEngine(player, grid, gravity)
+    seconds = dict.fromkeys(engines, 0.0)
+
+    first_difference = None
+    for tick in range(ticks):
+        for name, engine in engines.items():
+            start = time.perf_counter()
+            if tick % 23 == 5 and engine.can_jump():
+                engine.player_sprite.change_y = 20
+            engine.update()
+            seconds[name] += time.perf_counter() - start
+        if first_difference is None:
+            states = [(player.center_x, player.center_y, player.change_x, player.change_y)
+                      for player in (engine.player_sprite for engine in engines.values())]
+            if states[0] != states[1]:
+                first_difference = tick
+
+    results = {name: (seconds[name] / ticks, engine.player_sprite.center_x, engine.player_sprite.center_y)
+               for name, engine in engines.items()}
+    return len(walls), results, first_difference
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the sprite and grid platformer physics side by side")
+    parser.add_argument("tmx_files", nargs="*", default=["map2_level_1.tmx", "map2_level_2.tmx"])
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--widen", type=int, nargs="+", default=[1, 10],
+                        help="also time the map repeated this many times side by side")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", DeprecationWarning)
+    for tmx_file in args.tmx_files:
+        for times in args.widen:
+            walls, results, first_difference = benchmark(tmx_file, args.ticks, times)
+            sprites = results["sprites"][0]
+            grid = results["grid"][0]
+            print(f"{tmx_file} x{times}: {walls} walls, "
+                  f"sprites {sprites * 1e6:.0f}us/step, grid {grid * 1e6:.1f}us/step "
+                  f"({sprites / grid:.0f}x)")
+            for name, (seconds, x, y) in results.items():
+                print(f"    {name:<8} ended at ({x:.2f}, {y:.2f})")
+            if first_difference is None:
+                print(f"    same place every one of {args.ticks} ticks")
+            else:
+                print(f"    first differ at tick {first_difference}")
+
+
+if __name__ == "__main__":
+    main()
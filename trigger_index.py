@@ -0,0 +1,106 @@
+"""
+Trigger index
+
+Coins, spikes and the like only need to know when the player is on
+them, but check_for_collision_with_list tests the player against every
+one of them every frame. A TriggerIndex files each trigger under the
+grid cells it covers, so a lookup only tests the few triggers in the
+cells the player's box is in, however many there are on the level:
+
+    coins = TriggerIndex.from_layer(my_map, "Coins", coin_list, TILE_SCALING)
+    for coin in coins.hits(player_sprite):
+        coin.remove_from_sprite_lists()
+        coins.remove(coin)
+
+Those few still get arcade's exact check_for_collision, so what counts
+as a hit is the same as before.
+"""
+
+import math
+
+import arcade
+
+
+class TriggerIndex:
+    """ Sprites filed by the cell_width by cell_height cells their boxes cover """
+
+    def __init__(self, cell_width, cell_height=None):
+        self.cell_width = cell_width
+        self.cell_height = cell_height or cell_width
+        # (column, row) -> the sprites in that cell
+        self.cells = {}
+        # sprite -> the cells it is filed under
+        self.sprite_cells = {}
+
+    @classmethod
+    def from_sprites(cls, sprite_list, cell_size):
+        """ An index of sprite_list, each sprite under every cell its box touches """
+        index = cls(cell_size)
+        for sprite in sprite_list:
+            index.add(sprite)
+        return index
+
+    @classmethod
+    def from_layer(cls, my_map, layer_name, sprite_list, scaling):
+        """
+        An index of the sprites generate_sprites made from a map layer,
+        each filed under the grid cell its tile id is in
+        """
+        cell_width = my_map.tilewidth * scaling
+        cell_height = my_map.tileheight * scaling
+        index = cls(cell_width, cell_height)
+
+        # generate_sprites makes a sprite for each known tile id in turn,
+        # column 0 half a tile left of x = 0
+        sprites = iter(sprite_list)
+        rows = my_map.layers_int_data[layer_name]
+        for row_index, row in enumerate(rows):
+            cell_row = len(rows) - 1 - row_index
+            for column_index, item in enumerate(row):
+                if str(item) in my_map.global_tile_set:
+                    index.add(next(sprites), [(column_index - 1, cell_row)])
+        return index
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def _cells(self, left, right, bottom, top):
+        first_column = math.floor(left / self.cell_width)
+        last_column = math.floor(right / self.cell_width)
+        first_row = math.floor(bottom / self.cell_height)
+        last_row = math.floor(top / self.cell_height)
+        return [(column, row)
+                for column in range(first_column, last_column + 1)
+                for row in range(first_row, last_row + 1)]
+
+    def add(self, sprite, cells=None):
+        """ File sprite under cells, by default the ones its box touches """
+        if cells is None:
+            cells = self._cells(sprite.left, sprite.right, sprite.bottom, sprite.top)
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(sprite)
+        self.sprite_cells[sprite] = cells
+
+    def remove(self, sprite):
+        for cell in self.sprite_cells.pop(sprite):
+            sprites = self.cells[cell]
+            sprites.remove(sprite)
+            if not sprites:
+                del self.cells[cell]
+
+    def candidates(self, left, right, bottom, top):
+        """ The sprites filed in the cells the box touches, each once """
+        # a dict keeps them in the order they were found, without a list search for each
+        found = {}
+        cells = self.cells
+        for cell in self._cells(left, right, bottom, top):
+            sprites = cells.get(cell)
+            if sprites:
+                found.update(dict.fromkeys(sprites))
+        return list(found)
+
+    def hits(self, sprite):
+        """ The indexed sprites sprite is touching, like check_for_collision_with_list """
+        return [other for other in self.candidates(sprite.left, sprite.right,
+                                                   sprite.bottom, sprite.top)
+                if arcade.check_for_collision(sprite, other)]